@@ -0,0 +1,359 @@
+"""Client throughput benchmarks against the fake ComfyUI server.
+
+Every scenario starts its own ``python -m comfy_sdk.testing`` subprocess so
+the server never shares a GIL or an allocator with the client being measured,
+then runs the same workload through ``ComfyClient`` and ``AsyncComfyClient``.
+Results can be saved and compared between commits:
+
+    python benchmarks/client_bench.py --json base.json
+    python benchmarks/client_bench.py --compare base.json --max-regression 15
+    python benchmarks/client_bench.py --quick --only submit,events
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+from comfy_sdk import AsyncComfyClient, ComfyClient  # noqa: E402
+
+MB = 1024 * 1024
+WORKFLOW = {"1": {"class_type": "SaveImage", "inputs": {"filename_prefix": "bench"}}}
+
+
+class Scenario(NamedTuple):
+    name: str
+    unit: str
+    higher_is_better: bool
+    server: Dict[str, Any]
+    size: int
+    quick_size: int
+    run: Callable[[ComfyClient, int], float]
+    arun: Callable[[AsyncComfyClient, int], Any]
+
+
+@contextlib.contextmanager
+def fake_server(**options: Any) -> Iterator[int]:
+    """Run the fake server in a subprocess and yield its port."""
+    args = [sys.executable, "-m", "comfy_sdk.testing", "--port", "0"]
+    for name, value in options.items():
+        flag = "--" + name.replace("_", "-")
+        if value is True:
+            args.append(flag)
+        elif value is not False:
+            args += [flag, str(value)]
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("listening on "):
+            raise RuntimeError(f"fake server failed to start: {line!r}")
+        yield int(line.rsplit(":", 1)[1])
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _best(samples: List[float], higher_is_better: bool) -> float:
+    return max(samples) if higher_is_better else min(samples)
+
+
+# Submits per second against a paused server, so only the POST round trip is timed.
+
+
+def submit(client: ComfyClient, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        client.queue_prompt(WORKFLOW)
+    return n / (time.perf_counter() - started)
+
+
+async def asubmit(client: AsyncComfyClient, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        await client.queue_prompt(WORKFLOW)
+    return n / (time.perf_counter() - started)
+
+
+# Completed prompts per second with ``n`` callers each submitting and waiting at once.
+
+
+def waiters(client: ComfyClient, n: int) -> float:
+    def one(_: int) -> Dict[str, Any]:
+        return client.wait_for_completion(client.queue_prompt(WORKFLOW).prompt_id, timeout=120)
+
+    client.connect(connect_websocket=True)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        list(executor.map(one, range(n)))
+    return n / (time.perf_counter() - started)
+
+
+async def awaiters(client: AsyncComfyClient, n: int) -> float:
+    async def one() -> Dict[str, Any]:
+        return await client.wait_for_completion((await client.queue_prompt(WORKFLOW)).prompt_id, timeout=120)
+
+    await client.connect(connect_websocket=True)
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return n / (time.perf_counter() - started)
+
+
+# Sequential ``/view`` downloads of 8 MiB images.
+
+DOWNLOAD_SIZE = 8 * MB
+
+
+def download(client: ComfyClient, n: int) -> float:
+    started = time.perf_counter()
+    received = sum(len(client.get_images(f"ComfyUI_{index:05d}_.png")) for index in range(n))
+    return received / MB / (time.perf_counter() - started)
+
+
+async def adownload(client: AsyncComfyClient, n: int) -> float:
+    started = time.perf_counter()
+    received = 0
+    for index in range(n):
+        received += len(await client.get_images(f"ComfyUI_{index:05d}_.png"))
+    return received / MB / (time.perf_counter() - started)
+
+
+# Sequential 8 MiB ``/upload/image`` posts.
+
+UPLOAD = os.urandom(8 * MB)
+
+
+def upload(client: ComfyClient, n: int) -> float:
+    started = time.perf_counter()
+    for index in range(n):
+        client.upload_image(UPLOAD, f"bench_{index}.png", overwrite=True)
+    return n * len(UPLOAD) / MB / (time.perf_counter() - started)
+
+
+async def aupload(client: AsyncComfyClient, n: int) -> float:
+    started = time.perf_counter()
+    for index in range(n):
+        await client.upload_image(UPLOAD, f"bench_{index}.png", overwrite=True)
+    return n * len(UPLOAD) / MB / (time.perf_counter() - started)
+
+
+# WebSocket events dispatched per second: one prompt whose node reports ``n`` progress steps.
+
+
+def events(client: ComfyClient, n: int) -> float:
+    client.connect(connect_websocket=True)
+    started = time.perf_counter()
+    client.wait_for_completion(client.queue_prompt(WORKFLOW).prompt_id, timeout=120)
+    return n / (time.perf_counter() - started)
+
+
+async def aevents(client: AsyncComfyClient, n: int) -> float:
+    await client.connect(connect_websocket=True)
+    started = time.perf_counter()
+    await client.wait_for_completion((await client.queue_prompt(WORKFLOW)).prompt_id, timeout=120)
+    return n / (time.perf_counter() - started)
+
+
+# Binary preview frames delivered to an ``on_preview`` subscriber per second.
+
+
+def previews(client: ComfyClient, n: int) -> float:
+    frames: List[Any] = []
+    client.connect(connect_websocket=True)
+    subscription = client.on_preview(frames.append)
+    started = time.perf_counter()
+    client.wait_for_completion(client.queue_prompt(WORKFLOW).prompt_id, timeout=120)
+    elapsed = time.perf_counter() - started
+    subscription.close()
+    return len(frames) / elapsed
+
+
+async def apreviews(client: AsyncComfyClient, n: int) -> float:
+    frames: List[Any] = []
+    await client.connect(connect_websocket=True)
+    subscription = await client.on_preview(frames.append)
+    started = time.perf_counter()
+    await client.wait_for_completion((await client.queue_prompt(WORKFLOW)).prompt_id, timeout=120)
+    elapsed = time.perf_counter() - started
+    subscription.close()
+    return len(frames) / elapsed
+
+
+# Python heap held per submitted prompt with a registered waiter, on a paused server.
+
+
+def memory(client: ComfyClient, n: int) -> float:
+    dispatcher = client._ensure_dispatcher()
+    client.queue_prompt(WORKFLOW)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = []
+    for _ in range(n):
+        response = client.queue_prompt(WORKFLOW)
+        held.append((response, dispatcher.register(response.prompt_id)))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for _, future in held:
+        future.cancel()
+    return (after - before) / n
+
+
+async def amemory(client: AsyncComfyClient, n: int) -> float:
+    dispatcher = await client._ensure_dispatcher()
+    await client.queue_prompt(WORKFLOW)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = []
+    for _ in range(n):
+        response = await client.queue_prompt(WORKFLOW)
+        held.append((response, dispatcher.register(response.prompt_id)))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for _, future in held:
+        future.cancel()
+    return (after - before) / n
+
+
+SCENARIOS = [
+    Scenario("submit", "submits/s", True, {"paused": True}, 2000, 200, submit, asubmit),
+    Scenario("waiters", "prompts/s", True, {"exec_time": 0.001}, 256, 32, waiters, awaiters),
+    Scenario("download", "MB/s", True, {"image_size": DOWNLOAD_SIZE}, 40, 5, download, adownload),
+    Scenario("upload", "MB/s", True, {}, 40, 5, upload, aupload),
+    Scenario("events", "events/s", True, {}, 50000, 5000, events, aevents),
+    Scenario("previews", "frames/s", True, {"preview_size": 64 * 1024}, 5000, 500, previews, apreviews),
+    Scenario("memory", "bytes/prompt", False, {"paused": True}, 2000, 200, memory, amemory),
+]
+
+
+def _server_options(scenario: Scenario, size: int) -> Dict[str, Any]:
+    options = dict(scenario.server)
+    if scenario.name == "events":
+        options["progress_steps"] = size
+    elif scenario.name == "previews":
+        options["previews"] = size
+    return options
+
+
+def _run_sync(scenario: Scenario, port: int, size: int) -> float:
+    client = ComfyClient(port=port)
+    try:
+        client.connect()
+        return scenario.run(client, size)
+    finally:
+        client.close()
+
+
+async def _run_async(scenario: Scenario, port: int, size: int) -> float:
+    client = AsyncComfyClient(port=port)
+    try:
+        await client.connect()
+        return await scenario.arun(client, size)
+    finally:
+        await client.close()
+
+
+def run(scenarios: List[Scenario], flavours: List[str], repeat: int, quick: bool) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for scenario in scenarios:
+        size = scenario.quick_size if quick else scenario.size
+        for flavour in flavours:
+            samples = []
+            for _ in range(repeat):
+                # A fresh server per sample keeps history and queue growth out of later runs.
+                with fake_server(**_server_options(scenario, size)) as port:
+                    if flavour == "sync":
+                        samples.append(_run_sync(scenario, port, size))
+                    else:
+                        samples.append(asyncio.run(_run_async(scenario, port, size)))
+            key = f"{flavour}.{scenario.name}"
+            results[key] = _best(samples, scenario.higher_is_better)
+            print(f"{key:<18} {results[key]:14,.1f} {scenario.unit}", flush=True)
+    return results
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """Print the change against ``baseline``; return False if any metric regressed past ``max_regression`` %."""
+    directions = {scenario.name: scenario.higher_is_better for scenario in SCENARIOS}
+    ok = True
+    print(f"\ncompared with {baseline.get('revision') or 'baseline'}:")
+    for key, value in results.items():
+        old = baseline.get("results", {}).get(key)
+        if not old:
+            continue
+        change = (value - old) / old * 100
+        regression = -change if directions[key.split(".", 1)[1]] else change
+        flag = ""
+        if max_regression is not None and regression > max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{key:<18} {old:14,.1f} -> {value:14,.1f} {change:+7.1f}%{flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help="comma-separated scenarios: " + ",".join(s.name for s in SCENARIOS))
+    parser.add_argument("--client", choices=("sync", "async", "both"), default="both")
+    parser.add_argument("--repeat", type=int, default=3, help="samples per scenario (best is kept)")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast smoke run")
+    parser.add_argument("--json", metavar="PATH", help="write results to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="baseline written by an earlier --json run")
+    parser.add_argument("--max-regression", type=float, help="exit 1 if a metric is this many %% worse")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.only:
+        wanted = set(args.only.split(","))
+        unknown = wanted - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in SCENARIOS if scenario.name in wanted]
+    flavours = ["sync", "async"] if args.client == "both" else [args.client]
+
+    results = run(scenarios, flavours, args.repeat, args.quick)
+    if args.json:
+        report = {
+            "revision": _revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Cold-import benchmark for ``comfy_sdk``.
+
+Each measurement runs in a fresh interpreter with ``-X importtime`` and the
+best of ``--runs`` is reported. The script exits non-zero when a bare
+``import comfy_sdk`` exceeds ``--budget-ms`` or pulls in one of the
+transport/heavy modules that must stay lazy, so it can gate CI:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 20 --budget-ms 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Modules that a bare ``import comfy_sdk`` must not load.
+FORBIDDEN = ("httpx", "websocket", "websockets", "requests", "asyncio", "pandas", "numpy", "PIL", "pydantic", "fastapi")
+
+SCENARIOS: Dict[str, str] = {
+    "import comfy_sdk": "import comfy_sdk",
+    "from comfy_sdk import WorkflowTemplate": "from comfy_sdk import WorkflowTemplate",
+    "from comfy_sdk import ComfyClient": "from comfy_sdk import ComfyClient",
+    "ComfyUI()": "from comfy_sdk import ComfyUI; ComfyUI()",
+}
+
+_PROBE = "import sys; {code}; print(' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))"
+
+
+def _run(code: str) -> Tuple[float, List[str]]:
+    """Run ``code`` in a fresh interpreter; return (microseconds spent importing, top-level modules loaded)."""
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(code=code)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return _cumulative(result.stderr), result.stdout.split()
+
+
+def _cumulative(stderr: str) -> float:
+    """Sum the cumulative time of every import triggered after interpreter startup (i.e. by the probe)."""
+    total = 0
+    started = False
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if name.strip() == "site":
+            started = True
+            continue
+        # Top-level entries have exactly one space after the bar.
+        if started and not name.startswith("  "):
+            total += int(parts[1])
+    return total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per scenario (best is kept)")
+    parser.add_argument("--budget-ms", type=float, default=15.0, help="maximum cold time for a bare 'import comfy_sdk'")
+    args = parser.parse_args()
+
+    failed = False
+    for label, code in SCENARIOS.items():
+        best = float("inf")
+        modules: List[str] = []
+        for _ in range(args.runs):
+            elapsed, modules = _run(code)
+            best = min(best, elapsed)
+        print(f"{label:<42} {best / 1000:8.2f} ms")
+        if code == "import comfy_sdk":
+            loaded = sorted(set(modules) & set(FORBIDDEN))
+            if loaded:
+                print(f"  FAIL: eagerly imports {', '.join(loaded)}")
+                failed = True
+            if best / 1000 > args.budget_ms:
+                print(f"  FAIL: over the {args.budget_ms:.1f} ms budget")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Thread-safety stress check for one shared ``ComfyClient``.
+
+Each round creates a fresh client and releases ``--threads`` workers at once
+from a barrier, so they race to build the HTTP pool and start the WebSocket
+dispatcher before submitting and awaiting their prompts. The script exits
+non-zero if the workers ended up with more than one HTTP client or WebSocket
+connection, or if any prompt failed to complete:
+
+    python benchmarks/thread_stress.py
+    python benchmarks/thread_stress.py --threads 128 --rounds 20
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Set
+
+from client_bench import WORKFLOW, fake_server
+
+from comfy_sdk import ComfyClient
+
+
+def stress_round(port: int, threads: int, prompts: int, timeout: float) -> str:
+    """Run one round; return an error description, or ``""`` if the client behaved."""
+    client = ComfyClient(port=port)
+    barrier = threading.Barrier(threads)
+    http_clients: Set[int] = set()
+    connections: Set[float] = set()
+
+    def worker(_: int) -> None:
+        barrier.wait()
+        http_clients.add(id(client._ensure_http_client()))
+        dispatcher = client._ensure_dispatcher()
+        for _ in range(prompts):
+            client.wait_for_completion(client.queue_prompt(WORKFLOW).prompt_id, timeout=timeout)
+        connections.add(dispatcher._connected_at)
+
+    try:
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(worker, range(threads)))
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+    finally:
+        client.close()
+    if len(http_clients) != 1:
+        return f"{len(http_clients)} HTTP clients were created"
+    if len(connections) != 1:
+        return f"{len(connections)} WebSocket connections were opened"
+    return ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=48)
+    parser.add_argument("--prompts", type=int, default=5, help="prompts per thread and round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--exec-time", type=float, default=0.001, help="seconds each fake prompt takes")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each prompt")
+    args = parser.parse_args()
+
+    failures = 0
+    with fake_server(exec_time=args.exec_time) as port:
+        for index in range(args.rounds):
+            started = time.perf_counter()
+            error = stress_round(port, args.threads, args.prompts, args.timeout)
+            rate = args.threads * args.prompts / (time.perf_counter() - started)
+            print(f"round {index + 1}: {error or 'ok'} ({rate:,.0f} prompts/s)")
+            failures += bool(error)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
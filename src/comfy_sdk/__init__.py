@@ -1,10 +1,112 @@
-from .client import AsyncComfyClient, ComfyClient
-from .resources import Images, Models, Prompt, Queue, System, Templates, Userdata, Users
+import importlib
+from typing import TYPE_CHECKING, Any, List, Optional
+
+if TYPE_CHECKING:
+    from .api import ComfyResponse, ComfyResult
+    from .cache import DiskCache, MemoryCache, MetadataCache, ResultCache, UploadCache
+    from .client import AsyncComfyClient, ComfyClient
+    from .events import ComfyExecutionError, ComfyInterruptedError, PreviewFrame
+    from .history import HistoryIndex, HistoryRecord
+    from .instrumentation import Instrumentation, MetricsCollector
+    from .journal import JobJournal, JournalEntry, Reattachment
+    from .pool import AsyncComfyPool, ComfyPool
+    from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+    from .resources import Images, Models, Prompt, Queue, System, Templates, Userdata, Users
+    from .scheduler import AffinityScheduler, AsyncAffinityScheduler
+    from .transport import TransportConfig
+    from .validation import ValidationIssue, WorkflowValidationError, WorkflowValidator
+    from .workflow import RenderedWorkflow, WorkflowTemplate
+
+# Public name -> defining submodule. Submodules (and httpx/websockets behind them) are
+# imported on first attribute access, so ``import comfy_sdk`` itself stays cheap.
+_LAZY = {
+    "ComfyResponse": ".api",
+    "ComfyResult": ".api",
+    "DiskCache": ".cache",
+    "MemoryCache": ".cache",
+    "MetadataCache": ".cache",
+    "ResultCache": ".cache",
+    "UploadCache": ".cache",
+    "AsyncComfyClient": ".client",
+    "ComfyClient": ".client",
+    "ComfyExecutionError": ".events",
+    "ComfyInterruptedError": ".events",
+    "PreviewFrame": ".events",
+    "HistoryIndex": ".history",
+    "HistoryRecord": ".history",
+    "Instrumentation": ".instrumentation",
+    "MetricsCollector": ".instrumentation",
+    "JobJournal": ".journal",
+    "JournalEntry": ".journal",
+    "Reattachment": ".journal",
+    "AsyncComfyPool": ".pool",
+    "ComfyPool": ".pool",
+    "CircuitBreaker": ".resilience",
+    "CircuitOpenError": ".resilience",
+    "RetryPolicy": ".resilience",
+    "Images": ".resources",
+    "Models": ".resources",
+    "Prompt": ".resources",
+    "Queue": ".resources",
+    "System": ".resources",
+    "Templates": ".resources",
+    "Userdata": ".resources",
+    "Users": ".resources",
+    "AffinityScheduler": ".scheduler",
+    "AsyncAffinityScheduler": ".scheduler",
+    "TransportConfig": ".transport",
+    "ValidationIssue": ".validation",
+    "WorkflowValidationError": ".validation",
+    "WorkflowValidator": ".validation",
+    "RenderedWorkflow": ".workflow",
+    "WorkflowTemplate": ".workflow",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | _LAZY.keys())
 
 
 class ComfyUI:
-    def __init__(self, host: str = "127.0.0.1", port: int = 8188):
-        self.client = ComfyClient(host=host, port=port)
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8188,
+        upload_cache: Optional["UploadCache"] = None,
+        result_cache: Optional["ResultCache"] = None,
+        metadata_cache: Optional["MetadataCache"] = None,
+        validate_prompts: bool = False,
+        retry: Optional["RetryPolicy"] = None,
+        breaker: Optional["CircuitBreaker"] = None,
+        transport_config: Optional["TransportConfig"] = None,
+        instrumentation: Optional["Instrumentation"] = None,
+        journal: Optional["JobJournal"] = None,
+    ):
+        from .client import ComfyClient
+        from .resources import Images, Models, Prompt, Queue, System, Templates, Userdata, Users
+
+        self.client = ComfyClient(
+            host=host,
+            port=port,
+            upload_cache=upload_cache,
+            result_cache=result_cache,
+            metadata_cache=metadata_cache,
+            validate_prompts=validate_prompts,
+            retry=retry,
+            breaker=breaker,
+            transport_config=transport_config,
+            instrumentation=instrumentation,
+            journal=journal,
+        )
         self.prompt = Prompt(self.client)
         self.images = Images(self.client)
         self.system = System(self.client)
@@ -15,4 +117,38 @@ class ComfyUI:
         self.userdata = Userdata(self.client)
 
 
-__all__ = ["ComfyUI", "ComfyClient", "AsyncComfyClient"]
+__all__ = [
+    "ComfyUI",
+    "ComfyClient",
+    "AsyncComfyClient",
+    "ComfyPool",
+    "AsyncComfyPool",
+    "AffinityScheduler",
+    "AsyncAffinityScheduler",
+    "UploadCache",
+    "MemoryCache",
+    "DiskCache",
+    "ResultCache",
+    "MetadataCache",
+    "HistoryIndex",
+    "HistoryRecord",
+    "ComfyResponse",
+    "ComfyResult",
+    "PreviewFrame",
+    "ComfyExecutionError",
+    "ComfyInterruptedError",
+    "WorkflowTemplate",
+    "RenderedWorkflow",
+    "WorkflowValidator",
+    "WorkflowValidationError",
+    "ValidationIssue",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "TransportConfig",
+    "Instrumentation",
+    "MetricsCollector",
+    "JobJournal",
+    "JournalEntry",
+    "Reattachment",
+]
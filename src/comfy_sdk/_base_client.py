@@ -1,20 +0,0 @@
-from websocket import WebSocket
-import websocket #NOTE: websocket-client (https://github.com/websocket-client/websocket-client)
-import uuid
-import json
-import urllib3
-import urllib.request
-import urllib.parse
-import pandas as pd
-import os
-from requests_toolbelt import MultipartEncoder
-from PIL import Image, ImageOps, ImageFile
-import io
-import requests
-import datetime
-from io import BytesIO
-import numpy as np
-import httpx
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import asyncio
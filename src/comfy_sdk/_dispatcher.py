@@ -0,0 +1,690 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .events import (
+    Event,
+    ExecutingEvent,
+    ExecutionStartEvent,
+    InterruptedEvent,
+    PreviewFrame,
+    StatusEvent,
+    is_terminal,
+    parse_event,
+    parse_preview,
+)
+from .instrumentation import PROMPT_RUNNING, Instrumentation, call_hook, prompt_state
+
+if TYPE_CHECKING:
+    import websocket
+    from websockets.asyncio.client import ClientConnection
+
+logger = logging.getLogger(__name__)
+
+_MAX_FINISHED = 4096
+_RECONNECT_DELAY = 0.1
+_MAX_RECONNECT_DELAY = 5.0
+
+
+def queued_prompt_ids(queue: Dict[str, Any]) -> Set[str]:
+    ids = set()
+    for key in ("queue_running", "queue_pending"):
+        for item in queue.get(key, []):
+            if len(item) > 1:
+                ids.add(item[1])
+    return ids
+
+
+def _history_event(history: Dict[str, Any], prompt_id: str) -> Optional[Event]:
+    """Terminal event recorded in a ``/history/{prompt_id}`` entry, so late waiters still see failures."""
+    entry = history.get(prompt_id) or {}
+    for message in reversed((entry.get("status") or {}).get("messages") or []):
+        event = parse_event({"type": message[0], "data": message[1]})
+        if event is not None and is_terminal(event):
+            return event
+    return None
+
+
+def _observe(hooks: Instrumentation, event: Event) -> None:
+    call_hook(hooks.on_event, event)
+    if isinstance(event, ExecutionStartEvent) and event.prompt_id is not None:
+        call_hook(hooks.on_prompt, event.prompt_id, PROMPT_RUNNING, event.received_at)
+
+
+def _report(hooks: Instrumentation, prompt_id: str, data: Any) -> None:
+    at = data.received_at if isinstance(data, Event) else time.monotonic()
+    call_hook(hooks.on_prompt, prompt_id, prompt_state(data), at)
+
+
+class _DispatcherState:
+    """Per-prompt bookkeeping shared by the sync and async dispatchers.
+
+    ``inflight`` holds prompts submitted through the owning client that have not
+    completed yet, so completions missed while the socket was down can be
+    reconciled against the ``/queue`` listing after (re)connecting. ``finished`` remembers
+    recent completions nobody was waiting for yet. ``queue_remaining`` mirrors
+    the server's ``exec_info.queue_remaining`` from ``status`` events and
+    ``version`` is bumped on every status update or completion. ``previews``
+    and ``streams`` map a prompt id (``None`` for every prompt) to its preview
+    and event subscriptions; ``running`` is the prompt and node that
+    unlabelled preview frames belong to.
+    """
+
+    def __init__(self, max_finished: int = _MAX_FINISHED):
+        self.inflight: Set[str] = set()
+        self.waiters: Dict[str, List[Any]] = {}
+        self.finished: "OrderedDict[str, Any]" = OrderedDict()
+        self.max_finished = max_finished
+        self.queue_remaining: Optional[int] = None
+        self.version = 0
+        self.previews: Dict[Optional[str], List[Any]] = {}
+        self.streams: Dict[Optional[str], List[Any]] = {}
+        self.running: Tuple[Optional[str], Optional[str]] = (None, None)
+
+    def track(self, prompt_id: str) -> None:
+        if prompt_id in self.finished:
+            return
+        self.inflight.add(prompt_id)
+        # Count our own submission until the server's next status event lands.
+        if self.queue_remaining is not None:
+            self.queue_remaining += 1
+
+    def update_status(self, event: StatusEvent) -> bool:
+        if event.queue_remaining is None:
+            return False
+        self.queue_remaining = event.queue_remaining
+        self.version += 1
+        return True
+
+    def complete(self, prompt_id: str, data: Any) -> Tuple[List[Any], List[Any]]:
+        # ``execution_success`` is followed by ``executing`` with no node; only the first counts.
+        if prompt_id in self.finished:
+            return [], []
+        self.version += 1
+        self.inflight.discard(prompt_id)
+        if self.running[0] == prompt_id:
+            self.running = (None, None)
+        self.finished[prompt_id] = data
+        self.finished.move_to_end(prompt_id)
+        while len(self.finished) > self.max_finished:
+            self.finished.popitem(last=False)
+        return self.waiters.pop(prompt_id, []), self.previews.pop(prompt_id, []) + self.streams.pop(prompt_id, [])
+
+    def subscribe(self, registry: Dict[Optional[str], List[Any]], subscription: Any) -> bool:
+        if subscription.prompt_id is not None and subscription.prompt_id in self.finished:
+            return False
+        registry.setdefault(subscription.prompt_id, []).append(subscription)
+        return True
+
+    def unsubscribe(self, registry: Dict[Optional[str], List[Any]], subscription: Any) -> None:
+        subscriptions = registry.get(subscription.prompt_id)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del registry[subscription.prompt_id]
+
+    def drain(self) -> Tuple[Dict[str, List[Any]], List[Any]]:
+        waiters = self.waiters
+        subscriptions = [sub for registry in (self.previews, self.streams) for subs in registry.values() for sub in subs]
+        self.waiters, self.previews, self.streams = {}, {}, {}
+        return waiters, subscriptions
+
+    def preview(self, frame: bytes) -> Tuple[Optional[PreviewFrame], List[Any]]:
+        parsed = parse_preview(frame, *self.running)
+        if parsed is None:
+            return None, []
+        return parsed, self.previews.get(parsed.prompt_id, []) + self.previews.get(None, [])
+
+    def event(self, event: Event) -> List[Any]:
+        """Record ``event`` and return the event streams it should be offered to."""
+        if isinstance(event, ExecutionStartEvent) or (isinstance(event, ExecutingEvent) and event.node is not None):
+            self.running = (event.prompt_id, getattr(event, "node", None))
+        subscribers = self.streams.get(None, [])
+        if event.prompt_id is not None:
+            subscribers = self.streams.get(event.prompt_id, []) + subscribers
+        return subscribers
+
+    def discard(self, prompt_id: str, future: Any) -> None:
+        futures = self.waiters.get(prompt_id)
+        if not futures:
+            return
+        try:
+            futures.remove(future)
+        except ValueError:
+            pass
+        if not futures:
+            del self.waiters[prompt_id]
+
+
+class EventDispatcher:
+    """Background thread that owns the client WebSocket.
+
+    The first terminal event of a prompt (``execution_success``,
+    ``execution_error``, ``execution_interrupted`` or ``executing`` with
+    ``node is None``) resolves the futures registered for it with that event,
+    so any number of threads can wait on their own prompts over a single
+    connection. Waiting on a prompt that is neither in flight nor among the
+    recent completions looks it up through ``on_connect`` (the queued ids) and
+    ``history``, so completions evicted from ``finished`` still resolve.
+    ``connect_timeout`` (seconds, ``None`` to wait indefinitely)
+    bounds the WebSocket handshake.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        on_connect: Optional[Callable[[], Set[str]]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        on_finish: Optional[Callable[[str, Any], None]] = None,
+        connect_timeout: Optional[float] = None,
+        history: Optional[Callable[[str], Dict[str, Any]]] = None,
+    ):
+        self.ws_url = ws_url
+        self.connect_timeout = connect_timeout
+        self._on_connect = on_connect
+        self._history = history
+        self.instrumentation = instrumentation
+        self._on_finish = on_finish
+        self._connected_at: Optional[float] = None
+        self._state = _DispatcherState()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # Serializes start(); kept apart from _lock so completions keep flowing during a handshake.
+        self._start_lock = threading.Lock()
+        self._ws: Optional["websocket.WebSocket"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def ws(self) -> Optional["websocket.WebSocket"]:
+        return self._ws
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    @property
+    def queue_remaining(self) -> Optional[int]:
+        return self._state.queue_remaining
+
+    def observe_queue(self, remaining: int) -> None:
+        with self._lock:
+            if self._state.queue_remaining is None:
+                self._state.queue_remaining = remaining
+
+    def wait_for_update(self, version: int, timeout: Optional[float] = None) -> bool:
+        """Block until ``version`` is stale, i.e. a status event or completion arrived."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._state.version != version, timeout)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.running:
+                return
+            self._stopped.clear()
+            ws = self._connect()
+            thread = threading.Thread(target=self._run, name="comfy-sdk-ws", daemon=True)
+            with self._lock:
+                if self._stopped.is_set():
+                    # stop() ran during the handshake.
+                    ws.shutdown()
+                    raise ConnectionError("WebSocket dispatcher stopped")
+                self._ws, self._thread = ws, thread
+            thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        ws, thread = self._ws, self._thread
+        if ws is not None:
+            ws.abort()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        with self._lock:
+            self._thread = None
+            self._ws = None
+            waiters, subscriptions = self._state.drain()
+        for subscription in subscriptions:
+            subscription.finish()
+        for futures in waiters.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ConnectionError("WebSocket dispatcher stopped"))
+
+    def track(self, prompt_id: str, submitted: Optional[float] = None) -> None:
+        """Follow a prompt this client queued; ``submitted`` is the ``time.monotonic()`` its POST started."""
+        with self._lock:
+            self._state.track(prompt_id)
+            missed = self._missed(submitted)
+        if missed:
+            self._reconcile([prompt_id])
+
+    def _missed(self, submitted: Optional[float]) -> bool:
+        # Posted before the current socket was up: it may have finished unseen, and another
+        # thread's connect-time reconciliation may already have run without it.
+        return submitted is not None and self._connected_at is not None and submitted < self._connected_at
+
+    def register(self, prompt_id: str) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if prompt_id in self._state.finished:
+                future.set_result(self._state.finished[prompt_id])
+                return future
+            self._state.waiters.setdefault(prompt_id, []).append(future)
+            unknown = prompt_id not in self._state.inflight
+        if unknown:
+            self._recover(prompt_id)
+        return future
+
+    def discard(self, prompt_id: str, future: Future) -> None:
+        with self._lock:
+            self._state.discard(prompt_id, future)
+
+    def subscribe(self, subscription: Any, events: bool = False) -> Any:
+        """Attach a preview (or, with ``events``, event) subscription; it is finished when its prompt completes."""
+        registry = self._state.streams if events else self._state.previews
+        with self._lock:
+            attached = self._state.subscribe(registry, subscription)
+        if attached:
+            subscription._detach = lambda: self._unsubscribe(registry, subscription)
+        else:
+            subscription.finish()
+        return subscription
+
+    def _unsubscribe(self, registry: Dict[Optional[str], List[Any]], subscription: Any) -> None:
+        with self._lock:
+            self._state.unsubscribe(registry, subscription)
+
+    def cancelled(self, prompt_id: str) -> None:
+        """Resolve a prompt removed from the queue as interrupted; it will never report back."""
+        self._resolve(prompt_id, InterruptedEvent(prompt_id, time.monotonic(), {}))
+
+    def _resolve(self, prompt_id: str, data: Any, report: bool = True) -> None:
+        with self._lock:
+            first = report and prompt_id not in self._state.finished
+            futures, subscriptions = self._state.complete(prompt_id, data)
+            self._changed.notify_all()
+        if first:
+            self._first_completion(prompt_id, data)
+        for future in futures:
+            if not future.done():
+                future.set_result(data)
+        for subscription in subscriptions:
+            subscription.finish()
+
+    def _first_completion(self, prompt_id: str, data: Any) -> None:
+        if self.instrumentation is not None:
+            _report(self.instrumentation, prompt_id, data)
+        if self._on_finish is not None:
+            call_hook(self._on_finish, prompt_id, data)
+
+    def _preview(self, frame: bytes) -> None:
+        with self._lock:
+            parsed, subscriptions = self._state.preview(frame)
+        for subscription in subscriptions:
+            try:
+                subscription.offer(parsed)
+            except Exception:
+                logger.exception("Preview subscriber failed")
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        event = parse_event(message)
+        if event is None:
+            return
+        if self.instrumentation is not None:
+            _observe(self.instrumentation, event)
+        with self._lock:
+            if isinstance(event, StatusEvent) and self._state.update_status(event):
+                self._changed.notify_all()
+            streams = self._state.event(event)
+        for stream in streams:
+            stream.offer(event)
+        if event.prompt_id is not None and is_terminal(event):
+            self._resolve(event.prompt_id, event)
+
+    def _connect(self) -> "websocket.WebSocket":
+        # The websocket libraries are imported on first connect so HTTP-only use never loads them.
+        import websocket
+
+        ws = websocket.WebSocket()
+        ws.connect(self.ws_url, timeout=self.connect_timeout)
+        # The handshake timeout would otherwise also apply to every recv() on an idle socket.
+        ws.settimeout(None)
+        self._connected_at = time.monotonic()
+        return ws
+
+    def _reconnect(self) -> Optional["websocket.WebSocket"]:
+        import websocket
+
+        delay = _RECONNECT_DELAY
+        while not self._stopped.is_set():
+            try:
+                return self._connect()
+            except (websocket.WebSocketException, OSError):
+                self._stopped.wait(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+        return None
+
+    def _sync_inflight(self) -> None:
+        with self._lock:
+            snapshot = list(self._state.inflight)
+        self._reconcile(snapshot)
+
+    def _reconcile(self, prompt_ids: List[str]) -> None:
+        """Resolve those of ``prompt_ids`` that are no longer on the server's queue."""
+        if not prompt_ids or self._on_connect is None:
+            return
+        try:
+            queued = self._on_connect()
+        except Exception:
+            logger.debug("Failed to reconcile in-flight prompts", exc_info=True)
+            return
+        for prompt_id in prompt_ids:
+            if prompt_id not in queued:
+                self._resolve(prompt_id, None)
+
+    def _recover(self, prompt_id: str) -> None:
+        """Resolve an untracked prompt that already left the queue from its ``/history`` entry."""
+        if self._on_connect is None or self._history is None:
+            return
+        try:
+            if prompt_id in self._on_connect():
+                return
+            history = self._history(prompt_id)
+        except Exception:
+            logger.debug("Failed to look up prompt %s", prompt_id, exc_info=True)
+            return
+        # Its first completion may have been reported already, before it was evicted.
+        self._resolve(prompt_id, _history_event(history, prompt_id), report=False)
+
+    def _run(self) -> None:
+        import websocket
+
+        ws = self._ws
+        self._sync_inflight()
+        while ws is not None and not self._stopped.is_set():
+            try:
+                out = ws.recv()
+            except (websocket.WebSocketException, OSError):
+                ws.shutdown()
+                if self._stopped.is_set():
+                    break
+                ws = self._reconnect()
+                self._ws = ws
+                self._sync_inflight()
+                continue
+            if isinstance(out, bytes):
+                self._preview(out)
+                continue
+            if not isinstance(out, str):
+                continue
+            try:
+                message = json.loads(out)
+            except json.JSONDecodeError:
+                continue
+            self._handle(message)
+        if ws is not None:
+            ws.shutdown()
+
+
+class AsyncEventDispatcher:
+    """Event-loop task that owns the client WebSocket; asyncio twin of `EventDispatcher`.
+
+    ``connect_timeout`` becomes the websockets ``open_timeout`` (``None`` waits indefinitely).
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        on_connect: Optional[Callable[[], Awaitable[Set[str]]]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        on_finish: Optional[Callable[[str, Any], None]] = None,
+        history: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+        connect_timeout: Optional[float] = None,
+    ):
+        self.ws_url = ws_url
+        self.connect_timeout = connect_timeout
+        self._on_connect = on_connect
+        self._history = history
+        self.instrumentation = instrumentation
+        self._on_finish = on_finish
+        self._connected_at: Optional[float] = None
+        self._state = _DispatcherState()
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self._ws: Optional["ClientConnection"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reconciling: Set[asyncio.Task] = set()
+        self._stopped = False
+
+    @property
+    def ws(self) -> Optional["ClientConnection"]:
+        return self._ws
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    @property
+    def queue_remaining(self) -> Optional[int]:
+        return self._state.queue_remaining
+
+    def observe_queue(self, remaining: int) -> None:
+        if self._state.queue_remaining is None:
+            self._state.queue_remaining = remaining
+
+    async def wait_for_update(self, version: int, timeout: Optional[float] = None) -> bool:
+        """Wait until ``version`` is stale, i.e. a status event or completion arrived."""
+        if self._state.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.running:
+                return
+            self._stopped = False
+            self._ws = await self._connect()
+            self._task = asyncio.create_task(self._run(), name="comfy-sdk-ws")
+
+    async def stop(self) -> None:
+        self._stopped = True
+        task, ws = self._task, self._ws
+        self._task = None
+        self._ws = None
+        if ws is not None:
+            await ws.close()
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._abandon("WebSocket dispatcher stopped")
+
+    def _abandon(self, reason: str) -> None:
+        waiters, subscriptions = self._state.drain()
+        for subscription in subscriptions:
+            subscription.finish()
+        for futures in waiters.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ConnectionError(reason))
+
+    def track(self, prompt_id: str, submitted: Optional[float] = None) -> None:
+        """Follow a prompt this client queued; ``submitted`` is the ``time.monotonic()`` its POST started."""
+        self._state.track(prompt_id)
+        if submitted is not None and self._connected_at is not None and submitted < self._connected_at:
+            # See `EventDispatcher._missed`; the check needs an await, so it runs as a task.
+            self._background(self._reconcile([prompt_id]))
+
+    def _background(self, coro: Awaitable[None]) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._reconciling.add(task)
+        task.add_done_callback(self._reconciling.discard)
+
+    def register(self, prompt_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if prompt_id in self._state.finished:
+            future.set_result(self._state.finished[prompt_id])
+            return future
+        self._state.waiters.setdefault(prompt_id, []).append(future)
+        if prompt_id not in self._state.inflight:
+            # See `EventDispatcher.register`.
+            self._background(self._recover(prompt_id))
+        return future
+
+    def discard(self, prompt_id: str, future: asyncio.Future) -> None:
+        self._state.discard(prompt_id, future)
+
+    def subscribe(self, subscription: Any, events: bool = False) -> Any:
+        """Attach a preview (or, with ``events``, event) subscription; it is finished when its prompt completes."""
+        registry = self._state.streams if events else self._state.previews
+        if self._state.subscribe(registry, subscription):
+            subscription._detach = lambda: self._state.unsubscribe(registry, subscription)
+        else:
+            subscription.finish()
+        return subscription
+
+    def cancelled(self, prompt_id: str) -> None:
+        """Resolve a prompt removed from the queue as interrupted; it will never report back."""
+        self._resolve(prompt_id, InterruptedEvent(prompt_id, time.monotonic(), {}))
+
+    def _resolve(self, prompt_id: str, data: Any, report: bool = True) -> None:
+        if report and prompt_id not in self._state.finished:
+            self._first_completion(prompt_id, data)
+        futures, subscriptions = self._state.complete(prompt_id, data)
+        for future in futures:
+            if not future.done():
+                future.set_result(data)
+        for subscription in subscriptions:
+            subscription.finish()
+        self._notify()
+
+    def _first_completion(self, prompt_id: str, data: Any) -> None:
+        if self.instrumentation is not None:
+            _report(self.instrumentation, prompt_id, data)
+        if self._on_finish is not None:
+            call_hook(self._on_finish, prompt_id, data)
+
+    def _preview(self, frame: bytes) -> None:
+        parsed, subscriptions = self._state.preview(frame)
+        for subscription in subscriptions:
+            try:
+                subscription.offer(parsed)
+            except Exception:
+                logger.exception("Preview subscriber failed")
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        event = parse_event(message)
+        if event is None:
+            return
+        if self.instrumentation is not None:
+            _observe(self.instrumentation, event)
+        if isinstance(event, StatusEvent) and self._state.update_status(event):
+            self._notify()
+        for stream in self._state.event(event):
+            stream.offer(event)
+        if event.prompt_id is not None and is_terminal(event):
+            self._resolve(event.prompt_id, event)
+
+    async def _connect(self) -> "ClientConnection":
+        from websockets.asyncio.client import connect as ws_connect
+
+        # Preview frames can exceed the default 1 MiB message limit.
+        ws = await ws_connect(self.ws_url, max_size=None, open_timeout=self.connect_timeout)
+        self._connected_at = time.monotonic()
+        return ws
+
+    async def _reconnect(self) -> Optional["ClientConnection"]:
+        from websockets.exceptions import WebSocketException
+
+        delay = _RECONNECT_DELAY
+        while not self._stopped:
+            try:
+                return await self._connect()
+            except (WebSocketException, OSError):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+        return None
+
+    async def _sync_inflight(self) -> None:
+        await self._reconcile(list(self._state.inflight))
+
+    async def _reconcile(self, prompt_ids: List[str]) -> None:
+        if not prompt_ids or self._on_connect is None:
+            return
+        try:
+            queued = await self._on_connect()
+        except Exception:
+            logger.debug("Failed to reconcile in-flight prompts", exc_info=True)
+            return
+        for prompt_id in prompt_ids:
+            if prompt_id not in queued:
+                self._resolve(prompt_id, None)
+
+    async def _recover(self, prompt_id: str) -> None:
+        if self._on_connect is None or self._history is None:
+            return
+        try:
+            if prompt_id in await self._on_connect():
+                return
+            history = await self._history(prompt_id)
+        except Exception:
+            logger.debug("Failed to look up prompt %s", prompt_id, exc_info=True)
+            return
+        self._resolve(prompt_id, _history_event(history, prompt_id), report=False)
+
+    async def _run(self) -> None:
+        try:
+            await self._receive()
+        except Exception:
+            logger.exception("WebSocket dispatcher failed")
+        finally:
+            if not self._stopped:
+                # Nothing will resolve these any more; fail them like stop() would.
+                self._abandon("WebSocket dispatcher died")
+
+    async def _receive(self) -> None:
+        from websockets.exceptions import ConnectionClosed
+
+        ws = self._ws
+        await self._sync_inflight()
+        while ws is not None and not self._stopped:
+            try:
+                out = await ws.recv()
+            except ConnectionClosed:
+                if self._stopped:
+                    break
+                ws = await self._reconnect()
+                self._ws = ws
+                await self._sync_inflight()
+                continue
+            if isinstance(out, bytes):
+                self._preview(out)
+                continue
+            try:
+                message = json.loads(out)
+            except json.JSONDecodeError:
+                continue
+            self._handle(message)
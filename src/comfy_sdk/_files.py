@@ -0,0 +1,95 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+from typing import IO, BinaryIO, Iterator, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+UploadData = Union[bytes, bytearray, memoryview, PathLike, BinaryIO]
+
+
+class _BufferReader:
+    """Seekable file-like view over a buffer that reads out zero-copy slices."""
+
+    def __init__(self, data: Union[bytearray, memoryview]):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def read(self, size: int = -1) -> memoryview:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end]
+        self._pos = end
+        return chunk
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: len(self._view)}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+@contextlib.contextmanager
+def upload_source(data: UploadData) -> Iterator[Union[bytes, IO[bytes], _BufferReader]]:
+    """Adapt upload input for httpx multipart, which streams file objects in chunks."""
+    if isinstance(data, bytes):
+        yield data
+    elif isinstance(data, (bytearray, memoryview)):
+        yield _BufferReader(data)
+    elif isinstance(data, (str, os.PathLike)):
+        with open(data, "rb") as file:
+            yield file
+    else:
+        yield data
+
+
+def content_digest(data: UploadData, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of what an upload of ``data`` sends.
+
+    httpx rewinds file objects before streaming them, so they are hashed from
+    the start too and then returned to their current position.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        digest.update(data)
+    elif isinstance(data, (str, os.PathLike)):
+        with open(data, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+    else:
+        start = data.tell()
+        data.seek(0)
+        for chunk in iter(lambda: data.read(chunk_size), b""):
+            digest.update(chunk)
+        data.seek(start)
+    return digest.hexdigest()
+
+
+def _default_mode() -> int:
+    """Permissions ``open`` would give a new file under the current umask."""
+    try:
+        with open("/proc/self/status") as status:
+            umask = next(int(line.split()[1], 8) for line in status if line.startswith("Umask:"))
+    except (OSError, StopIteration, ValueError):
+        # Reading the umask means setting it; racy with other threads but only the fallback.
+        umask = os.umask(0o022)
+        os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def atomic_writer(path: PathLike) -> Iterator[IO[bytes]]:
+    """Write to a temp file next to ``path`` and rename it into place on success."""
+    path = os.fspath(path)
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".part", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            yield file
+        # mkstemp creates the file 0600; give it the mode a plain open() would have.
+        os.chmod(tmp_path, _default_mode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
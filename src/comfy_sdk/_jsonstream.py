@@ -0,0 +1,116 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Tuple
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What a number cut at the chunk edge can end in: "1." of "1.5", "1e" or "1.5E+" of "1.5E+3".
+_NUMBER_TAIL = re.compile(r"(?:\.|[eE][-+]?)\Z")
+_decoder = json.JSONDecoder()
+
+_START, _FIRST_KEY, _KEY, _COLON, _VALUE, _NEXT, _DONE = range(7)
+
+
+class ObjectItemParser:
+    """Incrementally split a top-level JSON object into ``(key, value)`` pairs.
+
+    Only the member currently being parsed is buffered, so a multi-megabyte
+    ``/history`` or ``/object_info`` body can be scanned in bounded memory.
+    A value that straddles chunks is retried once the buffer has doubled,
+    which keeps re-parsing linear overall.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._pending: List[str] = []
+        self._pending_len = 0
+        self._state = _START
+        self._key = ""
+        self._need = 0
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Any]]:
+        text = self._text.decode(chunk)
+        self._pending.append(text)
+        self._pending_len += len(text)
+        # Joining is what costs; skip it until the pending value can possibly be complete.
+        if len(self._buf) - self._pos + self._pending_len < self._need:
+            return []
+        self._compact()
+        return self._parse(final=False)
+
+    def close(self) -> List[Tuple[str, Any]]:
+        self._pending.append(self._text.decode(b"", final=True))
+        self._compact()
+        items = self._parse(final=True)
+        if self._state != _DONE:
+            raise ValueError("Truncated JSON object")
+        return items
+
+    def _compact(self) -> None:
+        self._buf = "".join([self._buf[self._pos:], *self._pending])
+        self._pos = 0
+        self._pending.clear()
+        self._pending_len = 0
+
+    def _parse(self, final: bool) -> List[Tuple[str, Any]]:
+        items: List[Tuple[str, Any]] = []
+        buf = self._buf
+        while True:
+            pos = _WHITESPACE.match(buf, self._pos).end()
+            self._pos = pos
+            if pos >= len(buf):
+                return items
+            char = buf[pos]
+            state = self._state
+            if state == _START:
+                if char != "{":
+                    raise ValueError(f"Expected a JSON object, got {char!r}")
+                self._pos, self._state = pos + 1, _FIRST_KEY
+            elif state in (_FIRST_KEY, _NEXT) and char == "}":
+                self._pos, self._state = pos + 1, _DONE
+            elif state == _NEXT:
+                if char != ",":
+                    raise ValueError(f"Expected ',' or '}}' at offset {pos}, got {char!r}")
+                self._pos, self._state = pos + 1, _KEY
+            elif state in (_FIRST_KEY, _KEY):
+                if char != '"':
+                    raise ValueError(f"Expected an object key at offset {pos}, got {char!r}")
+                try:
+                    self._key, self._pos = json.decoder.scanstring(buf, pos + 1)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    return items
+                self._state = _COLON
+            elif state == _COLON:
+                if char != ":":
+                    raise ValueError(f"Expected ':' at offset {pos}, got {char!r}")
+                self._pos, self._state = pos + 1, _VALUE
+            elif state == _VALUE:
+                try:
+                    value, end = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    self._need = 2 * (len(buf) - pos)
+                    return items
+                # A scalar cut at the chunk edge ("12" of "1234") decodes fine; wait for its delimiter.
+                cut = end >= len(buf) or (
+                    isinstance(value, (int, float)) and not isinstance(value, bool) and _NUMBER_TAIL.match(buf, end)
+                )
+                if cut and not final:
+                    self._need = len(buf) - pos + 1
+                    return items
+                items.append((self._key, value))
+                self._pos, self._state, self._need = end, _NEXT, 0
+            else:
+                raise ValueError(f"Unexpected data after JSON object at offset {pos}")
+
+
+def iter_object_items(chunks: Iterable[bytes]) -> Iterator[Tuple[str, Any]]:
+    parser = ObjectItemParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -1,8 +1,20 @@
 from dataclasses import dataclass
-from typing import Optional, Dict
+from typing import Any, Dict, Optional
 
 @dataclass
 class ComfyResponse:
     prompt_id: str
     number: Optional[int] = None
     node_errors: Optional[Dict] = None
+
+
+@dataclass
+class ComfyResult:
+    prompt_id: str
+    history: Dict[str, Any]
+    images: Optional[Dict[str, bytes]] = None
+    cached: bool = False
+
+    @property
+    def outputs(self) -> Dict[str, Any]:
+        return self.history.get("outputs", {})
@@ -0,0 +1,429 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from ._files import PathLike, UploadData, atomic_writer, content_digest
+from .api import ComfyResult
+
+
+class CacheBackend(ABC):
+    """Byte-valued key/value store used by the client-side caches."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-memory LRU bounded by entry count and, optionally, total bytes."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._size > self.max_bytes)
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._size -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class DiskCache(CacheBackend):
+    """One file per key under ``directory``, evicting least recently used files past ``max_bytes``.
+
+    Reads bump the file's mtime, which is what eviction orders by, so the
+    cache survives restarts and can be shared by processes on one machine.
+    """
+
+    def __init__(self, directory: PathLike, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.is_file() and not entry.name.startswith(".")]
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._file(key)
+        try:
+            with open(path, "rb") as file:
+                value = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._file(key)
+        with self._lock:
+            try:
+                self._size -= os.path.getsize(path)
+            except OSError:
+                pass
+            with atomic_writer(path) as file:
+                file.write(value)
+            self._size += len(value)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        self._size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+
+    def delete(self, key: str) -> None:
+        path = self._file(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.unlink(path)
+            except FileNotFoundError:
+                return
+            self._size -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+            self._size = 0
+
+
+class UploadCache:
+    """Map image content hashes to the server-side file reference of an earlier upload.
+
+    Lookups hit the in-memory LRU first and fall back to ``persistent`` (for
+    example a `DiskCache`) when one is given. With ``verify=True`` the client
+    checks that a cached file still exists on the server before reusing it.
+    Entries are scoped per server, endpoint, target filename and ``overwrite``
+    flag and, for masks, original image and mask type.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        persistent: Optional[CacheBackend] = None,
+        verify: bool = False,
+    ):
+        self.memory = MemoryCache(max_entries=max_entries)
+        self.persistent = persistent
+        self.verify = verify
+
+    @staticmethod
+    def key(base_url: str, endpoint: str, data: UploadData, **extra: Any) -> str:
+        scope = json.dumps(extra, sort_keys=True, separators=(",", ":"))
+        return f"{base_url}{endpoint}:{scope}:{content_digest(data)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is None and self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, ref: Dict[str, Any]) -> None:
+        value = json.dumps(ref).encode()
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    def invalidate(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        # ``_meta`` only carries UI titles and never affects execution.
+        return {str(key): _normalize(item) for key, item in value.items() if key != "_meta"}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float) and math.isfinite(value) and value.is_integer():
+        return int(value)
+    return value
+
+
+def canonical_prompt_hash(prompt: Dict[str, Any]) -> str:
+    """Hash a workflow so graphs that differ only in key order, ``1`` vs ``1.0`` or node titles collide."""
+    payload = json.dumps(_normalize(prompt), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+_HEADER = struct.Struct(">I")
+
+
+class _OwnerGone(Exception):
+    """The caller running a shared execution was cancelled; a follower should take over."""
+
+
+class ResultCache:
+    """Cache finished executions by canonical workflow hash.
+
+    ``backend`` bounds size (a `MemoryCache` by default, or a `DiskCache`) and
+    ``ttl`` bounds age in seconds. With ``include_images=True`` the output
+    files are downloaded once and stored with the history. Entries are scoped
+    by ``namespace``, which defaults to the executing client's ``base_url``;
+    give several servers with identical models one explicit namespace to
+    share results between them. Concurrent misses for the same workflow share
+    one execution through `claim`/`release`.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        include_images: bool = False,
+        namespace: Optional[str] = None,
+    ):
+        self.backend = backend if backend is not None else MemoryCache(max_entries=1024)
+        self.ttl = ttl
+        self.include_images = include_images
+        self.namespace = namespace
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def key(self, prompt: Dict[str, Any], base_url: str = "") -> str:
+        namespace = base_url if self.namespace is None else self.namespace
+        return f"result:{namespace}:{canonical_prompt_hash(prompt)}"
+
+    def lookup(self, key: str) -> Optional[ComfyResult]:
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        (size,) = _HEADER.unpack_from(value)
+        header = json.loads(value[_HEADER.size:_HEADER.size + size])
+        if self.ttl is not None and time.time() - header["stored_at"] > self.ttl:
+            self.backend.delete(key)
+            return None
+        images = None
+        if header["images"] is not None:
+            images = {}
+            offset = _HEADER.size + size
+            for name, length in header["images"]:
+                images[name] = value[offset:offset + length]
+                offset += length
+        return ComfyResult(prompt_id=header["prompt_id"], history=header["history"], images=images, cached=True)
+
+    def store(self, key: str, result: ComfyResult) -> None:
+        images = result.images
+        header = json.dumps({
+            "stored_at": time.time(),
+            "prompt_id": result.prompt_id,
+            "history": result.history,
+            "images": None if images is None else [[name, len(data)] for name, data in images.items()],
+        }).encode()
+        self.backend.set(key, b"".join([_HEADER.pack(len(header)), header, *(images or {}).values()]))
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """Return the shared future for ``key`` and whether the caller must run the workflow."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def release(self, key: str, result: Optional[ComfyResult] = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is None:
+            return
+        if error is not None and not isinstance(error, Exception):
+            # Cancellation or shutdown of the owner says nothing about the workflow; let a follower run it.
+            future.set_exception(_OwnerGone())
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def invalidate(self, prompt: Dict[str, Any], base_url: str = "") -> None:
+        self.backend.delete(self.key(prompt, base_url))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+class MetadataCache:
+    """Per-endpoint TTL cache for slow-changing server metadata.
+
+    Covers ``object_info``, ``models``, ``embeddings``, ``workflow_templates``
+    and ``extensions``. Expired entries are revalidated with ``If-None-Match``
+    / ``If-Modified-Since`` when the server sent validators. With
+    ``snapshot_path`` the entries are written by `save_snapshot` (the owning
+    client calls it on ``close()``), and a cold start loads the snapshot so
+    entries still within their TTL skip the network. Returned values are
+    shared and must be treated as read-only.
+    """
+
+    DEFAULT_TTLS = {
+        "object_info": 600.0,
+        "models": 60.0,
+        "embeddings": 60.0,
+        "workflow_templates": 600.0,
+        "extensions": 600.0,
+    }
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        snapshot_path: Optional[PathLike] = None,
+    ):
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.snapshot_path = None if snapshot_path is None else os.fspath(snapshot_path)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.snapshot_path is not None:
+            self._load_snapshot()
+
+    def _load_snapshot(self) -> None:
+        try:
+            with open(self.snapshot_path, "rb") as file:
+                self._entries = json.load(file)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save_snapshot(self) -> None:
+        """Write the entries to ``snapshot_path`` if anything changed since the last save. Blocking."""
+        if self.snapshot_path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(self._entries, separators=(",", ":")).encode()
+            self._dirty = False
+        try:
+            with atomic_writer(self.snapshot_path) as file:
+                file.write(payload)
+        except BaseException:
+            self._dirty = True
+            raise
+
+    def close(self) -> None:
+        self.save_snapshot()
+
+    def entry(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        ttl = self.ttls.get(entry["endpoint"], 0.0)
+        return time.time() - entry["fetched_at"] < ttl
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, endpoint: str, key: str, value: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        headers = headers or {}
+        with self._lock:
+            self._entries[key] = {
+                "endpoint": endpoint,
+                "value": value,
+                "fetched_at": time.time(),
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+            }
+            self._dirty = True
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["fetched_at"] = time.time()
+                self._dirty = True
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry["endpoint"] != endpoint}
+            self._dirty = True
+
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCache",
+    "DiskCache",
+    "UploadCache",
+    "ResultCache",
+    "MetadataCache",
+    "canonical_prompt_hash",
+]
@@ -0,0 +1,30 @@
+import argparse
+import sys
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="comfy-sdk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Subcommand modules are imported here so ``comfy-sdk --help`` stays fast.
+    from . import loadtest
+
+    loadtest_parser = commands.add_parser(
+        "loadtest",
+        help="replay workflows at a fixed open-loop arrival rate",
+        description="Replay a directory of workflows against one or more hosts at a fixed "
+        "arrival rate and report submit latency, queue wait, execution time and end-to-end percentiles.",
+    )
+    loadtest.add_arguments(loadtest_parser)
+    loadtest_parser.set_defaults(run=loadtest.run_cli)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except (ValueError, OSError) as e:
+        parser.exit(2, f"comfy-sdk {args.command}: error: {e}\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,106 @@
 import asyncio
+import itertools
 import json
+import logging
+import threading
 import time
 import urllib.parse
 import uuid
-from typing import Any, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import as_completed as futures_as_completed
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import httpx
-import requests
-import websocket
 
-from .api import ComfyResponse
+from ._dispatcher import AsyncEventDispatcher, EventDispatcher, queued_prompt_ids
+from ._files import PathLike, UploadData, atomic_writer, upload_source
+from ._jsonstream import ObjectItemParser, iter_object_items
+from .api import ComfyResponse, ComfyResult
+from .cache import MetadataCache, ResultCache, UploadCache, _OwnerGone, canonical_prompt_hash
+from .events import (
+    AsyncEventStream,
+    AsyncPreviewStream,
+    EventStream,
+    PreviewCallback,
+    PreviewFrame,
+    PreviewStream,
+    raise_for_event,
+)
+from .history import HistoryIndex, HistoryRecord
+from .instrumentation import (
+    PROMPT_QUEUED,
+    PROMPT_UNKNOWN,
+    AsyncInstrumentedTransport,
+    Instrumentation,
+    InstrumentedTransport,
+    call_hook,
+    prompt_state,
+)
+from .journal import JOB_FAILED, JOB_LOST, JobJournal, JournalEntry, Reattachment, history_state
+from .resilience import (
+    AsyncRetryTransport,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    RetryTransport,
+    _SubmitAttempts,
+)
+from .transport import TransportConfig
+from .validation import ValidationIssue, WorkflowValidator
+from .workflow import RenderedWorkflow
+
+if TYPE_CHECKING:
+    import websocket
+    from websockets.asyncio.client import ClientConnection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class _ThreadedStream(httpx.AsyncByteStream):
+    """Async view of a sync request body whose chunks are produced (e.g. read from disk) in a worker thread."""
+
+    def __init__(self, stream: httpx.SyncByteStream):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        # A fresh iterator per pass, so a retried request sends the body again.
+        chunks, done = iter(self._stream), object()
+        while (chunk := await asyncio.to_thread(next, chunks, done)) is not done:
+            yield chunk
 
 
 class _ComfyClientBase:
-    def __init__(self, host: str = "127.0.0.1", port: int = 8188):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8188,
+        upload_cache: Optional[UploadCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        validate_prompts: bool = False,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        transport_config: Optional[TransportConfig] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        journal: Optional[JobJournal] = None,
+    ):
         self.host = host
         self.port = port
-        self.client_id = str(uuid.uuid4())
+        self.upload_cache = upload_cache
+        self.result_cache = result_cache
+        self.metadata_cache = metadata_cache
+        self.validate_prompts = validate_prompts
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker
+        self.transport_config = transport_config if transport_config is not None else TransportConfig()
+        self.instrumentation = instrumentation
+        self.journal = journal
+        self._validator: Optional[WorkflowValidator] = None
+        self._validator_source: Any = None
+        # A journal pins the client id so a restarted worker still receives its prompts' events.
+        self.client_id = journal.client_id if journal is not None else str(uuid.uuid4())
         self.base_url = f"http://{host}:{port}"
         encoded_client_id = urllib.parse.quote(self.client_id)
         self.ws_url = f"ws://{host}:{port}/ws?clientId={encoded_client_id}"
@@ -31,50 +115,324 @@ class _ComfyClientBase:
     def _path(self, path: str) -> str:
         return f"{self.base_url}{path}"
 
+    def _prompt_request(self, prompt: Union[Dict[str, Any], RenderedWorkflow], prompt_id: str) -> Dict[str, Any]:
+        # A client-chosen prompt_id lets a retried submit check whether the first attempt landed.
+        if isinstance(prompt, RenderedWorkflow):
+            # Splice the pre-serialized graph in instead of re-encoding it.
+            tail = json.dumps({"client_id": self.client_id, "prompt_id": prompt_id})[1:]
+            body = b'{"prompt":' + prompt.json + b"," + tail.encode()
+            return {"content": body, "headers": {"Content-Type": "application/json"}}
+        return {"json": {"prompt": prompt, "client_id": self.client_id, "prompt_id": prompt_id}}
+
+    def _queued(
+        self,
+        prompt_id: str,
+        prompt: Union[Dict[str, Any], RenderedWorkflow],
+        submitted: float,
+        submitted_as: Optional[str] = None,
+    ) -> None:
+        self._dispatcher.track(prompt_id, submitted)
+        if self.journal is not None:
+            self.journal.accepted(prompt_id, submitted_as)
+        if self.instrumentation is not None:
+            call_hook(self.instrumentation.on_prompt, prompt_id, PROMPT_QUEUED, submitted, prompt)
+
+    def _journal_submit(self, prompt_id: str, prompt: Union[Dict[str, Any], RenderedWorkflow]) -> None:
+        # Written before the POST, so a crash mid-submit leaves a row that reattach can resolve.
+        if self.journal is not None:
+            workflow = prompt.to_dict() if isinstance(prompt, RenderedWorkflow) else prompt
+            self.journal.record(prompt_id, self.base_url, canonical_prompt_hash(workflow))
+
+    def _journal_failed(self, prompt_id: str) -> None:
+        if self.journal is not None:
+            self.journal.finish(prompt_id, JOB_FAILED)
+
+    def _finished(self, prompt_id: str, data: Any) -> None:
+        state = prompt_state(data)
+        # ``None`` means the prompt left the queue while the socket was down; its outcome
+        # is only in /history, so the row stays pending and reattach() resolves it.
+        if state != PROMPT_UNKNOWN:
+            self.journal.finish(prompt_id, state)
+
+    def _require_journal(self) -> JobJournal:
+        if self.journal is None:
+            raise RuntimeError("reattach() needs a client created with a JobJournal")
+        return self.journal
+
+    def _reattach(
+        self, entries: List[JournalEntry], queued: Set[str], histories: Dict[str, Dict[str, Any]]
+    ) -> Reattachment:
+        result = Reattachment()
+        for entry in entries:
+            prompt_id = entry.prompt_id
+            if prompt_id in queued:
+                self._dispatcher.track(prompt_id)
+                self.journal.accepted(prompt_id)
+                result.pending.append(prompt_id)
+                continue
+            state = history_state(histories[prompt_id], prompt_id)
+            if state is None:
+                # Never reached the server, or it restarted and forgot the prompt; the caller decides.
+                self.journal.finish(prompt_id, JOB_LOST)
+                result.lost.append(entry)
+            else:
+                self.journal.finish(prompt_id, state)
+                result.finished[prompt_id] = histories[prompt_id]
+        return result
+
+    def _accepted(self, prompt_id: str, prompt: Union[Dict[str, Any], RenderedWorkflow], submitted: float) -> ComfyResponse:
+        self._queued(prompt_id, prompt, submitted)
+        return ComfyResponse(prompt_id=prompt_id, number=None, node_errors={})
+
+    def _validator_for(self, object_info: Dict[str, Any]) -> WorkflowValidator:
+        # Schemas are recompiled only when the metadata cache hands back a new object_info.
+        if object_info is not self._validator_source:
+            self._validator = WorkflowValidator(object_info)
+            self._validator_source = object_info
+        return self._validator
+
+    def _validator_current(self, refresh: bool) -> bool:
+        # Without a metadata cache every get_object_info() is a full fetch, so keep the first snapshot.
+        return self._validator is not None and not refresh and self.metadata_cache is None
+
+    @staticmethod
+    def _queue_state(queue: Dict[str, Any], prompt_id: str) -> Optional[str]:
+        for key, state in (("queue_running", "running"), ("queue_pending", "pending")):
+            if any(len(item) > 1 and item[1] == prompt_id for item in queue.get(key, [])):
+                return state
+        return None
+
+    @staticmethod
+    def _check_workflow(validator: WorkflowValidator, prompt: Union[Dict[str, Any], RenderedWorkflow]) -> None:
+        validator.check(prompt.to_dict() if isinstance(prompt, RenderedWorkflow) else prompt)
+
+    @staticmethod
+    def _history_params(max_items: Optional[int], offset: Optional[int]) -> Dict[str, int]:
+        params = {}
+        if max_items is not None:
+            params["max_items"] = max_items
+        if offset is not None:
+            params["offset"] = offset
+        return params
+
+    def _upload_cache_key(self, endpoint: str, image_data: UploadData, **extra: Any) -> Optional[str]:
+        if self.upload_cache is None:
+            return None
+        return self.upload_cache.key(self.base_url, endpoint, image_data, **extra)
+
+    @staticmethod
+    def _ref_params(ref: Dict[str, Any]) -> Tuple[str, str, str]:
+        return ref["name"], ref.get("subfolder", ""), ref.get("type", "input")
+
+    def _fresh_metadata(self, url: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return ``(entry, fresh)`` for a cached metadata URL."""
+        if self.metadata_cache is None:
+            return None, False
+        entry = self.metadata_cache.entry(url)
+        return entry, entry is not None and self.metadata_cache.is_fresh(entry)
+
+    def _store_metadata(self, endpoint: str, url: str, entry: Optional[Dict[str, Any]], response: httpx.Response) -> Any:
+        if response.status_code == 304 and entry is not None:
+            self.metadata_cache.touch(url)
+            return entry["value"]
+        response.raise_for_status()
+        value = response.json()
+        if self.metadata_cache is not None:
+            self.metadata_cache.store(endpoint, url, value, response.headers)
+        return value
+
+    def _object_info_from_full(self, node_class: str) -> Optional[Dict[str, Any]]:
+        entry, fresh = self._fresh_metadata(self._path("/object_info"))
+        if fresh and node_class in entry["value"]:
+            return {node_class: entry["value"][node_class]}
+        return None
+
+    @staticmethod
+    def _output_files(history: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        for output in history.get("outputs", {}).values():
+            for items in output.values():
+                if isinstance(items, list):
+                    for item in items:
+                        if isinstance(item, dict) and "filename" in item:
+                            yield item
+
+    @staticmethod
+    def _output_name(item: Dict[str, Any]) -> str:
+        subfolder = item.get("subfolder", "")
+        return f"{subfolder}/{item['filename']}" if subfolder else item["filename"]
+
+    @staticmethod
+    def _succeeded(history: Dict[str, Any]) -> bool:
+        status = history.get("status") or {}
+        return bool(history) and status.get("completed", True) and status.get("status_str", "success") == "success"
+
 
 class ComfyClient(_ComfyClientBase):
-    def __init__(self, host: str = "127.0.0.1", port: int = 8188):
-        super().__init__(host=host, port=port)
+    """Blocking ComfyUI client; one instance can be shared by any number of threads.
+
+    Every thread uses the same httpx connection pool, created on first use
+    under a lock. A single background thread owns the WebSocket and routes
+    each completion to whichever threads wait on that prompt, so worker pools
+    (Flask, Celery, ``ThreadPoolExecutor``) can each ``queue_prompt`` and
+    ``wait_for_completion`` concurrently over one ``client_id``. Prompts that
+    finish while the socket is still connecting are picked up from ``/queue``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8188,
+        upload_cache: Optional[UploadCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        validate_prompts: bool = False,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        transport_config: Optional[TransportConfig] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        journal: Optional[JobJournal] = None,
+    ):
+        super().__init__(
+            host=host,
+            port=port,
+            upload_cache=upload_cache,
+            result_cache=result_cache,
+            metadata_cache=metadata_cache,
+            validate_prompts=validate_prompts,
+            retry=retry,
+            breaker=breaker,
+            transport_config=transport_config,
+            instrumentation=instrumentation,
+            journal=journal,
+        )
         self.client: Optional[httpx.Client] = None
-        self.ws: Optional[websocket.WebSocket] = None
+        self._init_lock = threading.Lock()
+        self._dispatcher = EventDispatcher(
+            self.ws_url,
+            on_connect=self._queued_prompt_ids,
+            instrumentation=instrumentation,
+            on_finish=self._finished if journal is not None else None,
+            connect_timeout=self.transport_config.connect_timeout,
+            history=self.get_history,
+        )
+
+    @property
+    def ws(self) -> Optional["websocket.WebSocket"]:
+        return self._dispatcher.ws
 
     def connect(self, connect_websocket: bool = False) -> None:
         self._ensure_http_client()
         if connect_websocket:
-            self._ensure_ws()
+            self._ensure_dispatcher()
 
     def close(self) -> None:
-        if self.ws is not None:
-            self.ws.close()
-            self.ws = None
-        if self.client is not None:
-            self.client.close()
-            self.client = None
+        self._dispatcher.stop()
+        with self._init_lock:
+            client, self.client = self.client, None
+        if client is not None:
+            client.close()
+        if self.metadata_cache is not None:
+            self.metadata_cache.save_snapshot()
 
     def _ensure_http_client(self) -> httpx.Client:
-        if self.client is None:
-            self.client = httpx.Client(timeout=30.0)
-        return self.client
-
-    def _ensure_ws(self) -> websocket.WebSocket:
-        if self.ws is None:
-            self.ws = websocket.WebSocket()
-            self.ws.connect(self.ws_url)
-        return self.ws
-
-    def queue_prompt(self, prompt: Dict[str, Any]) -> ComfyResponse:
-        payload = {"prompt": prompt, "client_id": self.client_id}
-        response = self._ensure_http_client().post(self._path("/prompt"), json=payload)
+        client = self.client
+        if client is not None:
+            return client
+        with self._init_lock:
+            if self.client is None:
+                config = self.transport_config
+                transport, owned = config.build_transport()
+                transport = RetryTransport(transport, retry=self.retry, breaker=self.breaker, owns_transport=owned)
+                if self.instrumentation is not None:
+                    transport = InstrumentedTransport(transport, self.instrumentation)
+                self.client = httpx.Client(timeout=config.timeout, transport=transport)
+            return self.client
+
+    def _ensure_dispatcher(self) -> EventDispatcher:
+        self._dispatcher.start()
+        return self._dispatcher
+
+    def _queued_prompt_ids(self) -> Set[str]:
+        return queued_prompt_ids(self.get_queue_items())
+
+    def _queue_remaining(self) -> int:
+        return self.get_queue().get("exec_info", {}).get("queue_remaining", 0)
+
+    def get_validator(self, refresh: bool = False) -> WorkflowValidator:
+        """Return a `WorkflowValidator` for the server's ``object_info``, kept in step with ``metadata_cache``."""
+        if self._validator_current(refresh):
+            return self._validator
+        if refresh and self.metadata_cache is not None:
+            self.metadata_cache.invalidate("object_info")
+        return self._validator_for(self.get_object_info())
+
+    def validate_workflow(self, prompt: Union[Dict[str, Any], RenderedWorkflow]) -> List[ValidationIssue]:
+        """Check ``prompt`` offline against cached ``object_info`` and return the problems found."""
+        return self.get_validator().validate(prompt.to_dict() if isinstance(prompt, RenderedWorkflow) else prompt)
+
+    def queue_prompt(
+        self,
+        prompt: Union[Dict[str, Any], RenderedWorkflow],
+        validate: Optional[bool] = None,
+    ) -> ComfyResponse:
+        """Submit ``prompt``; with ``validate`` (default ``validate_prompts``) it is checked offline first."""
+        if self.validate_prompts if validate is None else validate:
+            self._check_workflow(self.get_validator(), prompt)
+        prompt_id = str(uuid.uuid4())
+        submitted = time.monotonic()
+        request = self._prompt_request(prompt, prompt_id)
+        client = self._ensure_http_client()
+        self._journal_submit(prompt_id, prompt)
+        attempts = _SubmitAttempts(self.retry)
+        while True:
+            if attempts.unsure:
+                try:
+                    if self._prompt_known(prompt_id):
+                        return self._accepted(prompt_id, prompt, submitted)
+                    attempts.unsure = False
+                except httpx.HTTPError:
+                    pass
+            if not attempts.unsure:
+                try:
+                    if attempts.posted(client.post(self._path("/prompt"), **request)):
+                        break
+                except CircuitOpenError:
+                    # The breaker already knows the node is down; backing off would only delay the error.
+                    raise
+                except httpx.TransportError as exc:
+                    attempts.failed(exc)
+            delay = attempts.backoff()
+            if delay is None:
+                break
+            time.sleep(delay)
+        if attempts.rejected:
+            self._journal_failed(prompt_id)
+        response = attempts.result()
         response.raise_for_status()
         result = response.json()
+        if result.get("prompt_id"):
+            self._queued(result["prompt_id"], prompt, submitted, submitted_as=prompt_id)
         return ComfyResponse(
             prompt_id=result.get("prompt_id"),
             number=result.get("number"),
             node_errors=result.get("node_errors"),
         )
 
+    def _prompt_known(self, prompt_id: str) -> bool:
+        return prompt_id in queued_prompt_ids(self.get_queue_items()) or bool(self.get_history(prompt_id))
+
     def get_queue(self) -> Dict[str, Any]:
-        response = self._ensure_http_client().get(self._path("/prompt"))
+        response = self._ensure_http_client().get(
+            self._path("/prompt"), timeout=self.transport_config.status_timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_queue_items(self) -> Dict[str, Any]:
+        """Return the running and pending queue entries (``/queue``)."""
+        response = self._ensure_http_client().get(
+            self._path("/queue"), timeout=self.transport_config.status_timeout,
+        )
         response.raise_for_status()
         return response.json()
 
@@ -83,11 +441,44 @@ class ComfyClient(_ComfyClientBase):
         response.raise_for_status()
         return response.json()
 
-    def get_all_history(self) -> Dict[str, Any]:
-        response = self._ensure_http_client().get(self._path("/history"))
+    def get_all_history(self, max_items: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
+        params = self._history_params(max_items, offset)
+        response = self._ensure_http_client().get(self._path("/history"), params=params)
         response.raise_for_status()
         return response.json()
 
+    def iter_history(
+        self,
+        max_items: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(prompt_id, entry)`` pairs parsed incrementally from the ``/history`` stream."""
+        return self._iter_object("/history", self._history_params(max_items, None), chunk_size)
+
+    def iter_object_info(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(node_class, info)`` pairs parsed incrementally from the ``/object_info`` stream."""
+        return self._iter_object("/object_info", None, chunk_size)
+
+    def _iter_object(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        chunk_size: int,
+    ) -> Iterator[Tuple[str, Any]]:
+        with self._ensure_http_client().stream(
+            "GET", self._path(path), params=params, timeout=self.transport_config.download_timeout
+        ) as response:
+            response.raise_for_status()
+            yield from iter_object_items(response.iter_bytes(chunk_size))
+
+    def sync_history(self, index: HistoryIndex, page_size: int = 64) -> List[HistoryRecord]:
+        """Pull only history entries ``index`` has not seen, newest page first, and return them."""
+        while True:
+            page = self.get_all_history(max_items=page_size)
+            if index.covers(page, page_size):
+                return index.ingest(page)
+            page_size *= 2
+
     def delete_history(self, prompt_id: str) -> Any:
         response = self._ensure_http_client().delete(self._path(f"/history/{prompt_id}"))
         response.raise_for_status()
@@ -100,10 +491,43 @@ class ComfyClient(_ComfyClientBase):
 
     def get_images(self, filename: str, subfolder: str = "", folder_type: str = "output") -> bytes:
         params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-        response = self._ensure_http_client().get(self._path("/view"), params=params)
+        response = self._ensure_http_client().get(
+            self._path("/view"), params=params, timeout=self.transport_config.download_timeout,
+        )
         response.raise_for_status()
         return response.content
 
+    def iter_image(
+        self,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Stream an output file in ``chunk_size`` pieces without buffering it whole."""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        with self._ensure_http_client().stream(
+            "GET", self._path("/view"), params=params, timeout=self.transport_config.download_timeout
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_bytes(chunk_size)
+
+    def download_to(
+        self,
+        path: PathLike,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> int:
+        """Stream an output file to ``path`` atomically and return the number of bytes written."""
+        written = 0
+        with atomic_writer(path) as file:
+            for chunk in self.iter_image(filename, subfolder, folder_type, chunk_size):
+                file.write(chunk)
+                written += len(chunk)
+        return written
+
     def get_view_metadata(
         self,
         filename: str,
@@ -115,21 +539,66 @@ class ComfyClient(_ComfyClientBase):
         response.raise_for_status()
         return response.json()
 
+    def image_exists(self, filename: str, subfolder: str = "", folder_type: str = "input") -> bool:
+        """Check a file is still served by ``/view`` without downloading its body."""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        with self._ensure_http_client().stream(
+            "GET", self._path("/view"), params=params, timeout=self.transport_config.status_timeout
+        ) as response:
+            return response.status_code == 200
+
     def get_system_stats(self) -> Dict[str, Any]:
-        response = self._ensure_http_client().get(self._path("/system_stats"))
+        response = self._ensure_http_client().get(
+            self._path("/system_stats"), timeout=self.transport_config.status_timeout,
+        )
         response.raise_for_status()
         return response.json()
 
+    def _get_metadata(self, endpoint: str, path: str) -> Any:
+        url = self._path(path)
+        entry, fresh = self._fresh_metadata(url)
+        if fresh:
+            return entry["value"]
+        headers = self.metadata_cache.validators(entry) if self.metadata_cache is not None else None
+        response = self._ensure_http_client().get(url, headers=headers)
+        return self._store_metadata(endpoint, url, entry, response)
+
     def get_extensions(self) -> Dict[str, Any]:
-        response = self._ensure_http_client().get(self._path("/extensions"))
-        response.raise_for_status()
-        return response.json()
+        return self._get_metadata("extensions", "/extensions")
 
-    def interrupt(self) -> Any:
-        response = self._ensure_http_client().post(self._path("/interrupt"))
+    def interrupt(self, prompt_id: Optional[str] = None) -> Any:
+        # Servers that know ``prompt_id`` only interrupt if that prompt is still the one running.
+        payload = {"prompt_id": prompt_id} if prompt_id is not None else None
+        response = self._ensure_http_client().post(self._path("/interrupt"), json=payload)
         response.raise_for_status()
         return self._parse_response(response)
 
+    def cancel(self, prompt_id: str) -> bool:
+        """Stop one prompt: drop it from the pending queue, or interrupt it if it is running.
+
+        Other clients' work is left alone. Returns ``False`` if the prompt was
+        no longer queued. ``/interrupt`` is only prompt-scoped on servers that
+        accept its ``prompt_id``; older ones stop whatever is running. The
+        queue is re-read right before interrupting, but on such servers a
+        prompt that finishes in that last moment can still cost the next one.
+        """
+        state = self._queue_state(self.get_queue_items(), prompt_id)
+        if state == "pending":
+            response = self._ensure_http_client().post(self._path("/queue"), json={"delete": [prompt_id]})
+            response.raise_for_status()
+            # It may have started between the snapshot and the delete; then only an interrupt stops it.
+            state = self._queue_state(self.get_queue_items(), prompt_id)
+            if state != "running":
+                # A deleted prompt never reaches the socket, so release its waiters here.
+                self._dispatcher.cancelled(prompt_id)
+                return True
+        elif state == "running":
+            state = self._queue_state(self.get_queue_items(), prompt_id)
+        if state != "running":
+            return False
+        self.interrupt(prompt_id)
+        return True
+
     def clear_queue(self) -> Any:
         response = self._ensure_http_client().delete(self._path("/queue"))
         response.raise_for_status()
@@ -142,15 +611,15 @@ class ComfyClient(_ComfyClientBase):
         return self._parse_response(response)
 
     def get_object_info(self, node_class: Optional[str] = None) -> Dict[str, Any]:
-        path = "/object_info" if node_class is None else f"/object_info/{node_class}"
-        response = self._ensure_http_client().get(self._path(path))
-        response.raise_for_status()
-        return response.json()
+        if node_class is None:
+            return self._get_metadata("object_info", "/object_info")
+        cached = self._object_info_from_full(node_class)
+        if cached is not None:
+            return cached
+        return self._get_metadata("object_info", f"/object_info/{node_class}")
 
     def get_embeddings(self) -> list[str]:
-        response = self._ensure_http_client().get(self._path("/embeddings"))
-        response.raise_for_status()
-        return response.json()
+        return self._get_metadata("embeddings", "/embeddings")
 
     def get_features(self) -> Dict[str, Any]:
         response = self._ensure_http_client().get(self._path("/features"))
@@ -159,14 +628,10 @@ class ComfyClient(_ComfyClientBase):
 
     def get_models(self, folder: Optional[str] = None) -> list[str]:
         path = "/models" if folder is None else f"/models/{folder}"
-        response = self._ensure_http_client().get(self._path(path))
-        response.raise_for_status()
-        return response.json()
+        return self._get_metadata("models", path)
 
     def get_workflow_templates(self) -> list[str]:
-        response = self._ensure_http_client().get(self._path("/workflow_templates"))
-        response.raise_for_status()
-        return response.json()
+        return self._get_metadata("workflow_templates", "/workflow_templates")
 
     def get_users(self) -> list[Dict[str, Any]]:
         response = self._ensure_http_client().get(self._path("/users"))
@@ -191,108 +656,404 @@ class ComfyClient(_ComfyClientBase):
         response.raise_for_status()
         return self._parse_response(response)
 
-    def upload_image(self, image_data: bytes, filename: str, overwrite: bool = False) -> Dict[str, Any]:
-        response = requests.post(
-            self._path("/upload/image"),
-            files={"image": (filename, image_data)},
-            data={"overwrite": "true" if overwrite else "false"},
-            timeout=30,
-        )
+    def _cached_upload(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        ref = self.upload_cache.get(cache_key)
+        if ref is not None and self.upload_cache.verify and not self.image_exists(*self._ref_params(ref)):
+            self.upload_cache.invalidate(cache_key)
+            return None
+        return ref
+
+    def upload_image(self, image_data: UploadData, filename: str, overwrite: bool = False) -> Dict[str, Any]:
+        cache_key = self._upload_cache_key("/upload/image", image_data, filename=filename, overwrite=overwrite)
+        cached = self._cached_upload(cache_key)
+        if cached is not None:
+            return cached
+        with upload_source(image_data) as source:
+            response = self._ensure_http_client().post(
+                self._path("/upload/image"),
+                files={"image": (filename, source)},
+                data={"overwrite": "true" if overwrite else "false"},
+            )
         response.raise_for_status()
-        return response.json()
+        result = response.json()
+        if cache_key is not None:
+            self.upload_cache.set(cache_key, result)
+        return result
 
     def upload_mask(
         self,
-        image_data: bytes,
+        image_data: UploadData,
         filename: str,
         original_ref: Dict[str, str],
         overwrite: bool = False,
         mask_type: str = "mask",
     ) -> Dict[str, Any]:
-        response = requests.post(
-            self._path("/upload/mask"),
-            files={"image": (filename, image_data)},
-            data={
-                "original_ref": json.dumps(original_ref),
-                "overwrite": "true" if overwrite else "false",
-                "type": mask_type,
-            },
-            timeout=30,
+        cache_key = self._upload_cache_key(
+            "/upload/mask", image_data, filename=filename, overwrite=overwrite, original_ref=original_ref, type=mask_type
         )
+        cached = self._cached_upload(cache_key)
+        if cached is not None:
+            return cached
+        with upload_source(image_data) as source:
+            response = self._ensure_http_client().post(
+                self._path("/upload/mask"),
+                files={"image": (filename, source)},
+                data={
+                    "original_ref": json.dumps(original_ref),
+                    "overwrite": "true" if overwrite else "false",
+                    "type": mask_type,
+                },
+            )
         response.raise_for_status()
-        return response.json()
+        result = response.json()
+        if cache_key is not None:
+            self.upload_cache.set(cache_key, result)
+        return result
+
+    def reattach(self) -> Reattachment:
+        """Resume this host's unfinished journal entries (e.g. after a crash) without resubmitting them.
+
+        Prompts that finished meanwhile come back with their history; those
+        still queued are tracked again, so ``wait_for_completion`` /
+        ``as_completed`` work on ``pending``. Prompts the server has no record
+        of are marked ``lost`` and returned for the caller to resubmit or drop.
+        """
+        entries = self._require_journal().pending(self.base_url)
+        if not entries:
+            return Reattachment()
+        # The socket goes up before the queue snapshot so nothing finishing in between is missed.
+        self._ensure_dispatcher()
+        queued = queued_prompt_ids(self.get_queue_items())
+        histories = {entry.prompt_id: self.get_history(entry.prompt_id) for entry in entries if entry.prompt_id not in queued}
+        return self._reattach(entries, queued, histories)
+
+    def wait_for_completion(self, prompt_id: str, timeout: int = 3600, auto_cancel: bool = False) -> Dict[str, Any]:
+        """Wait for ``prompt_id`` and return its history.
+
+        Raises `ComfyExecutionError` / `ComfyInterruptedError` as soon as the
+        server reports ``execution_error`` / ``execution_interrupted``. With
+        ``auto_cancel`` the prompt is cancelled on the server when the wait
+        times out.
+        """
+        dispatcher = self._ensure_dispatcher()
+        future = dispatcher.register(prompt_id)
+        try:
+            event = future.result(timeout=timeout)
+        except TimeoutError:
+            if auto_cancel:
+                self._cancel_abandoned(prompt_id)
+            raise TimeoutError("Timed out waiting for execution completion") from None
+        finally:
+            dispatcher.discard(prompt_id, future)
+        raise_for_event(event)
+        return self.get_history(prompt_id)
+
+    def _cancel_abandoned(self, prompt_id: str) -> None:
+        try:
+            self.cancel(prompt_id)
+        except httpx.HTTPError:
+            logger.debug("Failed to cancel abandoned prompt %s", prompt_id, exc_info=True)
 
-    def wait_for_completion(self, prompt_id: str, timeout: int = 3600) -> Dict[str, Any]:
-        ws = self._ensure_ws()
-        start_time = time.time()
+    def stream_events(self, prompt_id: Optional[str] = None, timeout: Optional[float] = None) -> EventStream:
+        """Iterate typed execution events of ``prompt_id`` (every event if ``None``) until its terminal event.
 
-        while True:
-            if time.time() - start_time > timeout:
-                raise TimeoutError("Timed out waiting for execution completion")
+        ``timeout`` bounds the wait for each event. Without a ``prompt_id`` the
+        stream only ends when it is closed or the client shuts down.
+        """
+        return self._ensure_dispatcher().subscribe(EventStream(prompt_id, timeout), events=True)
 
+    def previews(
+        self,
+        prompt_id: Optional[str] = None,
+        max_fps: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> PreviewStream:
+        """Iterate live preview frames of ``prompt_id`` (every prompt if ``None``) until it completes.
+
+        Only the newest unread frame is kept, so a slow consumer skips frames
+        instead of stalling the WebSocket reader; ``max_fps`` drops frames on
+        arrival. ``timeout`` bounds the wait for each frame. Without a
+        ``prompt_id`` the stream only ends when it is closed or the client shuts down.
+        """
+        return self._ensure_dispatcher().subscribe(PreviewStream(prompt_id, max_fps, timeout))
+
+    def on_preview(
+        self,
+        callback: Callable[[PreviewFrame], Any],
+        prompt_id: Optional[str] = None,
+        max_fps: Optional[float] = None,
+    ) -> PreviewCallback:
+        """Call ``callback`` from the WebSocket thread for each preview frame; ``close()`` the result to stop."""
+        return self._ensure_dispatcher().subscribe(PreviewCallback(callback, prompt_id, max_fps))
+
+    def as_completed(
+        self,
+        prompt_ids: Iterable[str],
+        timeout: int = 3600,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(prompt_id, history)`` pairs in completion order.
+
+        Like `wait_for_completion`, raises `ComfyExecutionError` /
+        `ComfyInterruptedError` as soon as one of the prompts fails.
+        """
+        dispatcher = self._ensure_dispatcher()
+        futures = {dispatcher.register(prompt_id): prompt_id for prompt_id in dict.fromkeys(prompt_ids)}
+        try:
+            for future in futures_as_completed(futures, timeout=timeout):
+                prompt_id = futures[future]
+                raise_for_event(future.result())
+                yield prompt_id, self.get_history(prompt_id)
+        except TimeoutError:
+            raise TimeoutError("Timed out waiting for execution completion") from None
+        finally:
+            for future, prompt_id in futures.items():
+                dispatcher.discard(prompt_id, future)
+
+    def wait_all(self, prompt_ids: Iterable[str], timeout: int = 3600) -> Dict[str, Dict[str, Any]]:
+        """Wait for every prompt and return their histories keyed by prompt id; a failed prompt raises."""
+        return dict(self.as_completed(prompt_ids, timeout=timeout))
+
+    def submit_many(
+        self,
+        workflows: Iterable[Union[Dict[str, Any], RenderedWorkflow]],
+        max_in_flight: int = 8,
+        queue_depth: Optional[int] = None,
+        timeout: int = 3600,
+    ) -> Iterator[Tuple[ComfyResponse, Dict[str, Any]]]:
+        """Queue ``workflows`` with backpressure, yielding ``(response, history)`` as they finish.
+
+        At most ``max_in_flight`` of this client's prompts are outstanding, and
+        nothing new is queued while the server queue (``exec_info.queue_remaining``,
+        all clients) holds ``queue_depth`` items or more. ``timeout`` bounds the
+        wait between two completions. A failed or interrupted prompt raises
+        `ComfyExecutionError` / `ComfyInterruptedError`.
+        """
+        depth = max_in_flight if queue_depth is None else queue_depth
+        dispatcher = self._ensure_dispatcher()
+        if dispatcher.queue_remaining is None:
+            dispatcher.observe_queue(self._queue_remaining())
+        source = iter(workflows)
+        exhausted = False
+        pending: Dict[Future, ComfyResponse] = {}
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                version = dispatcher.version
+                while not exhausted and len(pending) < max_in_flight and dispatcher.queue_remaining < depth:
+                    workflow = next(source, None)
+                    if workflow is None:
+                        exhausted = True
+                        break
+                    response = self.queue_prompt(workflow)
+                    pending[dispatcher.register(response.prompt_id)] = response
+                if exhausted and not pending:
+                    return
+                done = [future for future in pending if future.done()]
+                for future in done:
+                    response = pending.pop(future)
+                    raise_for_event(future.result())
+                    deadline = time.monotonic() + timeout
+                    yield response, self.get_history(response.prompt_id)
+                if not done and not dispatcher.wait_for_update(version, max(deadline - time.monotonic(), 0)):
+                    raise TimeoutError("Timed out waiting for execution completion")
+        finally:
+            for future, response in pending.items():
+                dispatcher.discard(response.prompt_id, future)
+
+    def _execute(self, prompt: Union[Dict[str, Any], RenderedWorkflow], timeout: int, include_images: bool) -> ComfyResult:
+        response = self.queue_prompt(prompt)
+        history = self.wait_for_completion(response.prompt_id, timeout=timeout).get(response.prompt_id, {})
+        images = None
+        if include_images:
+            images = {
+                self._output_name(item): self.get_images(item["filename"], item.get("subfolder", ""), item.get("type", "output"))
+                for item in self._output_files(history)
+            }
+        return ComfyResult(prompt_id=response.prompt_id, history=history, images=images)
+
+    def execute(self, prompt: Union[Dict[str, Any], RenderedWorkflow], timeout: int = 3600) -> ComfyResult:
+        """Queue ``prompt``, wait for it and return its history, served from ``result_cache`` when possible.
+
+        Identical concurrent calls share a single execution.
+        """
+        cache = self.result_cache
+        if cache is None:
+            return self._execute(prompt, timeout, include_images=False)
+        key = cache.key(prompt.to_dict() if isinstance(prompt, RenderedWorkflow) else prompt, self.base_url)
+        deadline = time.monotonic() + timeout
+        while True:
+            cached = cache.lookup(key)
+            if cached is not None:
+                return cached
+            future, owner = cache.claim(key)
+            if owner:
+                break
             try:
-                out = ws.recv()
-                if not isinstance(out, str):
-                    continue
-                message = json.loads(out)
-                if message.get("type") != "executing":
-                    continue
-                data = message.get("data", {})
-                if data.get("node") is None and data.get("prompt_id") == prompt_id:
-                    return self.get_history(prompt_id)
-            except websocket.WebSocketConnectionClosedException:
-                self.ws = None
-                ws = self._ensure_ws()
-            except json.JSONDecodeError:
-                continue
+                return future.result(timeout=max(deadline - time.monotonic(), 0))
+            except _OwnerGone:
+                continue  # The owner was cancelled; the first follower to claim again runs it.
+        try:
+            # The previous owner may have stored its result and released between our lookup and claim.
+            cached = cache.lookup(key)
+            result = cached if cached is not None else self._execute(prompt, timeout, include_images=cache.include_images)
+        except BaseException as exc:
+            cache.release(key, error=exc)
+            raise
+        if cached is None and self._succeeded(result.history):
+            cache.store(key, result)
+        cache.release(key, result=result)
+        return result
 
 
 class AsyncComfyClient(_ComfyClientBase):
-    def __init__(self, host: str = "127.0.0.1", port: int = 8188):
-        super().__init__(host=host, port=port)
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8188,
+        upload_cache: Optional[UploadCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        validate_prompts: bool = False,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        transport_config: Optional[TransportConfig] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        journal: Optional[JobJournal] = None,
+    ):
+        super().__init__(
+            host=host,
+            port=port,
+            upload_cache=upload_cache,
+            result_cache=result_cache,
+            metadata_cache=metadata_cache,
+            validate_prompts=validate_prompts,
+            retry=retry,
+            breaker=breaker,
+            transport_config=transport_config,
+            instrumentation=instrumentation,
+            journal=journal,
+        )
         self.client: Optional[httpx.AsyncClient] = None
-        self.ws: Optional[websocket.WebSocket] = None
+        self._dispatcher = AsyncEventDispatcher(
+            self.ws_url,
+            on_connect=self._queued_prompt_ids,
+            instrumentation=instrumentation,
+            on_finish=self._finished if journal is not None else None,
+            history=self.get_history,
+            connect_timeout=self.transport_config.connect_timeout,
+        )
+
+    @property
+    def ws(self) -> Optional["ClientConnection"]:
+        return self._dispatcher.ws
 
     async def connect(self, connect_websocket: bool = False) -> None:
         await self._ensure_http_client()
         if connect_websocket:
-            await self._ensure_ws()
+            await self._ensure_dispatcher()
 
     async def close(self) -> None:
-        if self.ws is not None:
-            await asyncio.to_thread(self.ws.close)
-            self.ws = None
+        await self._dispatcher.stop()
         if self.client is not None:
             await self.client.aclose()
             self.client = None
+        if self.metadata_cache is not None:
+            await asyncio.to_thread(self.metadata_cache.save_snapshot)
 
     async def _ensure_http_client(self) -> httpx.AsyncClient:
         if self.client is None:
-            self.client = httpx.AsyncClient(timeout=30.0)
+            config = self.transport_config
+            transport, owned = config.build_async_transport()
+            transport = AsyncRetryTransport(transport, retry=self.retry, breaker=self.breaker, owns_transport=owned)
+            if self.instrumentation is not None:
+                transport = AsyncInstrumentedTransport(transport, self.instrumentation)
+            self.client = httpx.AsyncClient(timeout=config.timeout, transport=transport)
         return self.client
 
-    async def _ensure_ws(self) -> websocket.WebSocket:
-        if self.ws is None:
-            ws = websocket.WebSocket()
-            await asyncio.to_thread(ws.connect, self.ws_url)
-            self.ws = ws
-        return self.ws
+    async def _ensure_dispatcher(self) -> AsyncEventDispatcher:
+        await self._dispatcher.start()
+        return self._dispatcher
+
+    async def _queued_prompt_ids(self) -> Set[str]:
+        return queued_prompt_ids(await self.get_queue_items())
+
+    async def _queue_remaining(self) -> int:
+        return (await self.get_queue()).get("exec_info", {}).get("queue_remaining", 0)
 
-    async def queue_prompt(self, prompt: Dict[str, Any]) -> ComfyResponse:
-        payload = {"prompt": prompt, "client_id": self.client_id}
+    async def get_validator(self, refresh: bool = False) -> WorkflowValidator:
+        """Return a `WorkflowValidator` for the server's ``object_info``; see `ComfyClient.get_validator`."""
+        if self._validator_current(refresh):
+            return self._validator
+        if refresh and self.metadata_cache is not None:
+            self.metadata_cache.invalidate("object_info")
+        return self._validator_for(await self.get_object_info())
+
+    async def validate_workflow(self, prompt: Union[Dict[str, Any], RenderedWorkflow]) -> List[ValidationIssue]:
+        validator = await self.get_validator()
+        return validator.validate(prompt.to_dict() if isinstance(prompt, RenderedWorkflow) else prompt)
+
+    async def queue_prompt(
+        self,
+        prompt: Union[Dict[str, Any], RenderedWorkflow],
+        validate: Optional[bool] = None,
+    ) -> ComfyResponse:
+        if self.validate_prompts if validate is None else validate:
+            self._check_workflow(await self.get_validator(), prompt)
+        prompt_id = str(uuid.uuid4())
+        submitted = time.monotonic()
+        request = self._prompt_request(prompt, prompt_id)
         client = await self._ensure_http_client()
-        response = await client.post(self._path("/prompt"), json=payload)
+        self._journal_submit(prompt_id, prompt)
+        attempts = _SubmitAttempts(self.retry)
+        while True:
+            if attempts.unsure:
+                try:
+                    if await self._prompt_known(prompt_id):
+                        return self._accepted(prompt_id, prompt, submitted)
+                    attempts.unsure = False
+                except httpx.HTTPError:
+                    pass
+            if not attempts.unsure:
+                try:
+                    if attempts.posted(await client.post(self._path("/prompt"), **request)):
+                        break
+                except CircuitOpenError:
+                    # The breaker already knows the node is down; backing off would only delay the error.
+                    raise
+                except httpx.TransportError as exc:
+                    attempts.failed(exc)
+            delay = attempts.backoff()
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        if attempts.rejected:
+            self._journal_failed(prompt_id)
+        response = attempts.result()
         response.raise_for_status()
         result = response.json()
+        if result.get("prompt_id"):
+            self._queued(result["prompt_id"], prompt, submitted, submitted_as=prompt_id)
         return ComfyResponse(
             prompt_id=result.get("prompt_id"),
             number=result.get("number"),
             node_errors=result.get("node_errors"),
         )
 
+    async def _prompt_known(self, prompt_id: str) -> bool:
+        return prompt_id in queued_prompt_ids(await self.get_queue_items()) or bool(await self.get_history(prompt_id))
+
     async def get_queue(self) -> Dict[str, Any]:
         client = await self._ensure_http_client()
-        response = await client.get(self._path("/prompt"))
+        response = await client.get(self._path("/prompt"), timeout=self.transport_config.status_timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_queue_items(self) -> Dict[str, Any]:
+        """Return the running and pending queue entries (``/queue``)."""
+        client = await self._ensure_http_client()
+        response = await client.get(self._path("/queue"), timeout=self.transport_config.status_timeout)
         response.raise_for_status()
         return response.json()
 
@@ -302,12 +1063,51 @@ class AsyncComfyClient(_ComfyClientBase):
         response.raise_for_status()
         return response.json()
 
-    async def get_all_history(self) -> Dict[str, Any]:
+    async def get_all_history(self, max_items: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
+        params = self._history_params(max_items, offset)
         client = await self._ensure_http_client()
-        response = await client.get(self._path("/history"))
+        response = await client.get(self._path("/history"), params=params)
         response.raise_for_status()
         return response.json()
 
+    def iter_history(
+        self,
+        max_items: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(prompt_id, entry)`` pairs parsed incrementally from the ``/history`` stream."""
+        return self._iter_object("/history", self._history_params(max_items, None), chunk_size)
+
+    def iter_object_info(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(node_class, info)`` pairs parsed incrementally from the ``/object_info`` stream."""
+        return self._iter_object("/object_info", None, chunk_size)
+
+    async def _iter_object(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        chunk_size: int,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        parser = ObjectItemParser()
+        client = await self._ensure_http_client()
+        async with client.stream(
+            "GET", self._path(path), params=params, timeout=self.transport_config.download_timeout
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                for item in parser.feed(chunk):
+                    yield item
+        for item in parser.close():
+            yield item
+
+    async def sync_history(self, index: HistoryIndex, page_size: int = 64) -> List[HistoryRecord]:
+        """Pull only history entries ``index`` has not seen, newest page first, and return them."""
+        while True:
+            page = await self.get_all_history(max_items=page_size)
+            if index.covers(page, page_size):
+                return index.ingest(page)
+            page_size *= 2
+
     async def delete_history(self, prompt_id: str) -> Any:
         client = await self._ensure_http_client()
         response = await client.delete(self._path(f"/history/{prompt_id}"))
@@ -323,10 +1123,56 @@ class AsyncComfyClient(_ComfyClientBase):
     async def get_images(self, filename: str, subfolder: str = "", folder_type: str = "output") -> bytes:
         params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
         client = await self._ensure_http_client()
-        response = await client.get(self._path("/view"), params=params)
+        response = await client.get(
+            self._path("/view"), params=params, timeout=self.transport_config.download_timeout,
+        )
         response.raise_for_status()
         return response.content
 
+    async def iter_image(
+        self,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Stream an output file in ``chunk_size`` pieces without buffering it whole."""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        client = await self._ensure_http_client()
+        async with client.stream(
+            "GET", self._path("/view"), params=params, timeout=self.transport_config.download_timeout
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def download_to(
+        self,
+        path: PathLike,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> int:
+        """Stream an output file to ``path`` atomically and return the number of bytes written."""
+        loop = asyncio.get_running_loop()
+        written = 0
+        # Disk I/O runs on one worker thread so writes stay ordered and never stall the loop.
+        with ThreadPoolExecutor(1, thread_name_prefix="comfy-sdk-download") as executor:
+            writer = atomic_writer(path)
+            file = await loop.run_in_executor(executor, writer.__enter__)
+            try:
+                async for chunk in self.iter_image(filename, subfolder, folder_type, chunk_size):
+                    await loop.run_in_executor(executor, file.write, chunk)
+                    written += len(chunk)
+            except BaseException as exc:
+                await asyncio.shield(
+                    loop.run_in_executor(executor, writer.__exit__, type(exc), exc, exc.__traceback__)
+                )
+                raise
+            await loop.run_in_executor(executor, writer.__exit__, None, None, None)
+        return written
+
     async def get_view_metadata(
         self,
         filename: str,
@@ -339,24 +1185,59 @@ class AsyncComfyClient(_ComfyClientBase):
         response.raise_for_status()
         return response.json()
 
+    async def image_exists(self, filename: str, subfolder: str = "", folder_type: str = "input") -> bool:
+        """Check a file is still served by ``/view`` without downloading its body."""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        client = await self._ensure_http_client()
+        async with client.stream(
+            "GET", self._path("/view"), params=params, timeout=self.transport_config.status_timeout
+        ) as response:
+            return response.status_code == 200
+
     async def get_system_stats(self) -> Dict[str, Any]:
         client = await self._ensure_http_client()
-        response = await client.get(self._path("/system_stats"))
+        response = await client.get(self._path("/system_stats"), timeout=self.transport_config.status_timeout)
         response.raise_for_status()
         return response.json()
 
-    async def get_extensions(self) -> Dict[str, Any]:
+    async def _get_metadata(self, endpoint: str, path: str) -> Any:
+        url = self._path(path)
+        entry, fresh = self._fresh_metadata(url)
+        if fresh:
+            return entry["value"]
+        headers = self.metadata_cache.validators(entry) if self.metadata_cache is not None else None
         client = await self._ensure_http_client()
-        response = await client.get(self._path("/extensions"))
-        response.raise_for_status()
-        return response.json()
+        response = await client.get(url, headers=headers)
+        return self._store_metadata(endpoint, url, entry, response)
+
+    async def get_extensions(self) -> Dict[str, Any]:
+        return await self._get_metadata("extensions", "/extensions")
 
-    async def interrupt(self) -> Any:
+    async def interrupt(self, prompt_id: Optional[str] = None) -> Any:
+        payload = {"prompt_id": prompt_id} if prompt_id is not None else None
         client = await self._ensure_http_client()
-        response = await client.post(self._path("/interrupt"))
+        response = await client.post(self._path("/interrupt"), json=payload)
         response.raise_for_status()
         return self._parse_response(response)
 
+    async def cancel(self, prompt_id: str) -> bool:
+        """Stop one prompt; see `ComfyClient.cancel`."""
+        state = self._queue_state(await self.get_queue_items(), prompt_id)
+        if state == "pending":
+            client = await self._ensure_http_client()
+            response = await client.post(self._path("/queue"), json={"delete": [prompt_id]})
+            response.raise_for_status()
+            state = self._queue_state(await self.get_queue_items(), prompt_id)
+            if state != "running":
+                self._dispatcher.cancelled(prompt_id)
+                return True
+        elif state == "running":
+            state = self._queue_state(await self.get_queue_items(), prompt_id)
+        if state != "running":
+            return False
+        await self.interrupt(prompt_id)
+        return True
+
     async def clear_queue(self) -> Any:
         client = await self._ensure_http_client()
         response = await client.delete(self._path("/queue"))
@@ -371,17 +1252,15 @@ class AsyncComfyClient(_ComfyClientBase):
         return self._parse_response(response)
 
     async def get_object_info(self, node_class: Optional[str] = None) -> Dict[str, Any]:
-        path = "/object_info" if node_class is None else f"/object_info/{node_class}"
-        client = await self._ensure_http_client()
-        response = await client.get(self._path(path))
-        response.raise_for_status()
-        return response.json()
+        if node_class is None:
+            return await self._get_metadata("object_info", "/object_info")
+        cached = self._object_info_from_full(node_class)
+        if cached is not None:
+            return cached
+        return await self._get_metadata("object_info", f"/object_info/{node_class}")
 
     async def get_embeddings(self) -> list[str]:
-        client = await self._ensure_http_client()
-        response = await client.get(self._path("/embeddings"))
-        response.raise_for_status()
-        return response.json()
+        return await self._get_metadata("embeddings", "/embeddings")
 
     async def get_features(self) -> Dict[str, Any]:
         client = await self._ensure_http_client()
@@ -391,16 +1270,10 @@ class AsyncComfyClient(_ComfyClientBase):
 
     async def get_models(self, folder: Optional[str] = None) -> list[str]:
         path = "/models" if folder is None else f"/models/{folder}"
-        client = await self._ensure_http_client()
-        response = await client.get(self._path(path))
-        response.raise_for_status()
-        return response.json()
+        return await self._get_metadata("models", path)
 
     async def get_workflow_templates(self) -> list[str]:
-        client = await self._ensure_http_client()
-        response = await client.get(self._path("/workflow_templates"))
-        response.raise_for_status()
-        return response.json()
+        return await self._get_metadata("workflow_templates", "/workflow_templates")
 
     async def get_users(self) -> list[Dict[str, Any]]:
         client = await self._ensure_http_client()
@@ -429,66 +1302,274 @@ class AsyncComfyClient(_ComfyClientBase):
         response.raise_for_status()
         return self._parse_response(response)
 
-    async def upload_image(self, image_data: bytes, filename: str, overwrite: bool = False) -> Dict[str, Any]:
-        def _upload() -> Dict[str, Any]:
-            response = requests.post(
-                self._path("/upload/image"),
-                files={"image": (filename, image_data)},
-                data={"overwrite": "true" if overwrite else "false"},
-                timeout=30,
-            )
-            response.raise_for_status()
-            return response.json()
-
-        return await asyncio.to_thread(_upload)
+    async def _upload_cache_key(self, endpoint: str, image_data: UploadData, **extra: Any) -> Optional[str]:
+        if self.upload_cache is None:
+            return None
+        # Hashing reads the whole upload; keep it off the event loop.
+        return await asyncio.to_thread(self.upload_cache.key, self.base_url, endpoint, image_data, **extra)
+
+    async def _cached_upload(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        ref = self.upload_cache.get(cache_key)
+        if ref is not None and self.upload_cache.verify and not await self.image_exists(*self._ref_params(ref)):
+            self.upload_cache.invalidate(cache_key)
+            return None
+        return ref
+
+    async def _post_upload(
+        self, endpoint: str, filename: str, image_data: UploadData, data: Dict[str, str]
+    ) -> httpx.Response:
+        client = await self._ensure_http_client()
+        with upload_source(image_data) as source:
+            request = client.build_request("POST", self._path(endpoint), files={"image": (filename, source)}, data=data)
+            if not isinstance(image_data, (bytes, bytearray, memoryview)):
+                # httpx reads files synchronously while streaming multipart; keep paths and file objects off the loop.
+                request = httpx.Request(
+                    "POST",
+                    request.url,
+                    headers=request.headers,
+                    content=_ThreadedStream(request.stream),
+                    extensions=request.extensions,
+                )
+            return await client.send(request)
+
+    async def upload_image(self, image_data: UploadData, filename: str, overwrite: bool = False) -> Dict[str, Any]:
+        cache_key = await self._upload_cache_key("/upload/image", image_data, filename=filename, overwrite=overwrite)
+        cached = await self._cached_upload(cache_key)
+        if cached is not None:
+            return cached
+        response = await self._post_upload(
+            "/upload/image", filename, image_data, {"overwrite": "true" if overwrite else "false"}
+        )
+        response.raise_for_status()
+        result = response.json()
+        if cache_key is not None:
+            self.upload_cache.set(cache_key, result)
+        return result
 
     async def upload_mask(
         self,
-        image_data: bytes,
+        image_data: UploadData,
         filename: str,
         original_ref: Dict[str, str],
         overwrite: bool = False,
         mask_type: str = "mask",
     ) -> Dict[str, Any]:
-        def _upload() -> Dict[str, Any]:
-            response = requests.post(
-                self._path("/upload/mask"),
-                files={"image": (filename, image_data)},
-                data={
-                    "original_ref": json.dumps(original_ref),
-                    "overwrite": "true" if overwrite else "false",
-                    "type": mask_type,
-                },
-                timeout=30,
-            )
-            response.raise_for_status()
-            return response.json()
-
-        return await asyncio.to_thread(_upload)
+        cache_key = await self._upload_cache_key(
+            "/upload/mask", image_data, filename=filename, overwrite=overwrite, original_ref=original_ref, type=mask_type
+        )
+        cached = await self._cached_upload(cache_key)
+        if cached is not None:
+            return cached
+        response = await self._post_upload(
+            "/upload/mask",
+            filename,
+            image_data,
+            {
+                "original_ref": json.dumps(original_ref),
+                "overwrite": "true" if overwrite else "false",
+                "type": mask_type,
+            },
+        )
+        response.raise_for_status()
+        result = response.json()
+        if cache_key is not None:
+            self.upload_cache.set(cache_key, result)
+        return result
+
+    async def reattach(self) -> Reattachment:
+        """Resume this host's unfinished journal entries (e.g. after a crash) without resubmitting them.
+
+        Prompts that finished meanwhile come back with their history; those
+        still queued are tracked again, so ``wait_for_completion`` /
+        ``as_completed`` work on ``pending``. Prompts the server has no record
+        of are marked ``lost`` and returned for the caller to resubmit or drop.
+        """
+        entries = self._require_journal().pending(self.base_url)
+        if not entries:
+            return Reattachment()
+        await self._ensure_dispatcher()
+        queued = queued_prompt_ids(await self.get_queue_items())
+        finished = [entry.prompt_id for entry in entries if entry.prompt_id not in queued]
+        histories = await asyncio.gather(*(self.get_history(prompt_id) for prompt_id in finished))
+        return self._reattach(entries, queued, dict(zip(finished, histories)))
+
+    async def wait_for_completion(self, prompt_id: str, timeout: int = 3600, auto_cancel: bool = False) -> Dict[str, Any]:
+        """Wait for ``prompt_id`` and return its history; raises on ``execution_error`` / ``execution_interrupted``.
+
+        With ``auto_cancel`` the prompt is cancelled on the server if the wait
+        times out or the awaiting task is cancelled.
+        """
+        dispatcher = await self._ensure_dispatcher()
+        future = dispatcher.register(prompt_id)
+        try:
+            event = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except TimeoutError:
+            if auto_cancel:
+                await self._cancel_abandoned(prompt_id)
+            raise TimeoutError("Timed out waiting for execution completion") from None
+        except asyncio.CancelledError:
+            if auto_cancel:
+                await asyncio.shield(self._cancel_abandoned(prompt_id))
+            raise
+        finally:
+            dispatcher.discard(prompt_id, future)
+        raise_for_event(event)
+        return await self.get_history(prompt_id)
+
+    async def _cancel_abandoned(self, prompt_id: str) -> None:
+        try:
+            await self.cancel(prompt_id)
+        except httpx.HTTPError:
+            logger.debug("Failed to cancel abandoned prompt %s", prompt_id, exc_info=True)
 
-    async def wait_for_completion(self, prompt_id: str, timeout: int = 3600) -> Dict[str, Any]:
-        ws = await self._ensure_ws()
-        start_time = time.time()
+    async def stream_events(self, prompt_id: Optional[str] = None, timeout: Optional[float] = None) -> AsyncEventStream:
+        """Async iterator of typed execution events; see `ComfyClient.stream_events`."""
+        dispatcher = await self._ensure_dispatcher()
+        return dispatcher.subscribe(AsyncEventStream(prompt_id, timeout), events=True)
 
+    async def previews(
+        self,
+        prompt_id: Optional[str] = None,
+        max_fps: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncPreviewStream:
+        """Async iterator of live preview frames; see `ComfyClient.previews`."""
+        dispatcher = await self._ensure_dispatcher()
+        return dispatcher.subscribe(AsyncPreviewStream(prompt_id, max_fps, timeout))
+
+    async def on_preview(
+        self,
+        callback: Callable[[PreviewFrame], Any],
+        prompt_id: Optional[str] = None,
+        max_fps: Optional[float] = None,
+    ) -> PreviewCallback:
+        """Call ``callback`` from the dispatcher task for each preview frame; ``close()`` the result to stop."""
+        dispatcher = await self._ensure_dispatcher()
+        return dispatcher.subscribe(PreviewCallback(callback, prompt_id, max_fps))
+
+    async def as_completed(
+        self,
+        prompt_ids: Iterable[str],
+        timeout: int = 3600,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(prompt_id, history)`` pairs in completion order; see `ComfyClient.as_completed`."""
+        dispatcher = await self._ensure_dispatcher()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        futures = {dispatcher.register(prompt_id): prompt_id for prompt_id in dict.fromkeys(prompt_ids)}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(deadline - loop.time(), 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise TimeoutError("Timed out waiting for execution completion")
+                for future in done:
+                    raise_for_event(future.result())
+                    prompt_id = futures[future]
+                    yield prompt_id, await self.get_history(prompt_id)
+        finally:
+            for future, prompt_id in futures.items():
+                dispatcher.discard(prompt_id, future)
+
+    async def wait_all(self, prompt_ids: Iterable[str], timeout: int = 3600) -> Dict[str, Dict[str, Any]]:
+        """Wait for every prompt and return their histories keyed by prompt id; a failed prompt raises."""
+        return {prompt_id: history async for prompt_id, history in self.as_completed(prompt_ids, timeout=timeout)}
+
+    async def submit_many(
+        self,
+        workflows: Iterable[Union[Dict[str, Any], RenderedWorkflow]],
+        max_in_flight: int = 8,
+        queue_depth: Optional[int] = None,
+        timeout: int = 3600,
+    ) -> AsyncIterator[Tuple[ComfyResponse, Dict[str, Any]]]:
+        """Queue ``workflows`` with backpressure, yielding ``(response, history)`` as they finish.
+
+        Same limits as `ComfyClient.submit_many`; each refill batch is POSTed
+        concurrently over the pooled connection.
+        """
+        depth = max_in_flight if queue_depth is None else queue_depth
+        dispatcher = await self._ensure_dispatcher()
+        if dispatcher.queue_remaining is None:
+            dispatcher.observe_queue(await self._queue_remaining())
+        source = iter(workflows)
+        exhausted = False
+        pending: Dict[asyncio.Future, ComfyResponse] = {}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                version = dispatcher.version
+                slots = min(max_in_flight - len(pending), depth - dispatcher.queue_remaining)
+                if not exhausted and slots > 0:
+                    batch = list(itertools.islice(source, slots))
+                    exhausted = len(batch) < slots
+                    for response in await asyncio.gather(*(self.queue_prompt(workflow) for workflow in batch)):
+                        pending[dispatcher.register(response.prompt_id)] = response
+                if exhausted and not pending:
+                    return
+                done = [future for future in pending if future.done()]
+                for future in done:
+                    response = pending.pop(future)
+                    raise_for_event(future.result())
+                    deadline = loop.time() + timeout
+                    yield response, await self.get_history(response.prompt_id)
+                if not done and not await dispatcher.wait_for_update(version, max(deadline - loop.time(), 0)):
+                    raise TimeoutError("Timed out waiting for execution completion")
+        finally:
+            for future, response in pending.items():
+                dispatcher.discard(response.prompt_id, future)
+
+    async def _execute(self, prompt: Union[Dict[str, Any], RenderedWorkflow], timeout: int, include_images: bool) -> ComfyResult:
+        response = await self.queue_prompt(prompt)
+        history = (await self.wait_for_completion(response.prompt_id, timeout=timeout)).get(response.prompt_id, {})
+        images = None
+        if include_images:
+            items = list(self._output_files(history))
+            contents = await asyncio.gather(
+                *(self.get_images(item["filename"], item.get("subfolder", ""), item.get("type", "output")) for item in items)
+            )
+            images = {self._output_name(item): content for item, content in zip(items, contents)}
+        return ComfyResult(prompt_id=response.prompt_id, history=history, images=images)
+
+    async def execute(self, prompt: Union[Dict[str, Any], RenderedWorkflow], timeout: int = 3600) -> ComfyResult:
+        """Queue ``prompt``, wait for it and return its history, served from ``result_cache`` when possible.
+
+        Identical concurrent calls, from any thread or event loop, share a single execution.
+        """
+        cache = self.result_cache
+        if cache is None:
+            return await self._execute(prompt, timeout, include_images=False)
+        key = cache.key(prompt.to_dict() if isinstance(prompt, RenderedWorkflow) else prompt, self.base_url)
+        deadline = time.monotonic() + timeout
         while True:
-            elapsed = time.time() - start_time
-            if elapsed > timeout:
-                raise TimeoutError("Timed out waiting for execution completion")
-
+            cached = cache.lookup(key)
+            if cached is not None:
+                return cached
+            future, owner = cache.claim(key)
+            if owner:
+                break
             try:
-                out = await asyncio.to_thread(ws.recv)
-                if not isinstance(out, str):
-                    continue
-                message = json.loads(out)
-                if message.get("type") != "executing":
-                    continue
-                data = message.get("data", {})
-                if data.get("node") is None and data.get("prompt_id") == prompt_id:
-                    return await self.get_history(prompt_id)
-            except websocket.WebSocketConnectionClosedException:
-                self.ws = None
-                ws = await self._ensure_ws()
-            except json.JSONDecodeError:
+                waiter = asyncio.shield(asyncio.wrap_future(future))
+                return await asyncio.wait_for(waiter, max(deadline - time.monotonic(), 0))
+            except _OwnerGone:
                 continue
+        try:
+            # The previous owner may have stored its result and released between our lookup and claim.
+            cached = cache.lookup(key)
+            result = cached if cached is not None else await self._execute(prompt, timeout, include_images=cache.include_images)
+        except BaseException as exc:
+            cache.release(key, error=exc)
+            raise
+        if cached is None and self._succeeded(result.history):
+            cache.store(key, result)
+        cache.release(key, result=result)
+        return result
+
 
 __all__ = ["ComfyClient", "AsyncComfyClient"]
@@ -0,0 +1,442 @@
+import asyncio
+import json
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, Iterator, Optional
+
+PREVIEW_IMAGE = 1
+UNENCODED_PREVIEW_IMAGE = 2
+TEXT = 3
+PREVIEW_IMAGE_WITH_METADATA = 4
+
+_IMAGE_FORMATS = {1: "jpeg", 2: "png"}
+_U32 = struct.Struct(">I")
+_U32_PAIR = struct.Struct(">II")
+
+
+class PreviewFrame:
+    """A binary latent preview; ``data`` is a zero-copy view into the received WebSocket frame."""
+
+    __slots__ = ("prompt_id", "node_id", "image_format", "data")
+
+    def __init__(self, prompt_id: Optional[str], node_id: Optional[str], image_format: str, data: memoryview):
+        self.prompt_id = prompt_id
+        self.node_id = node_id
+        self.image_format = image_format
+        self.data = data
+
+    def __repr__(self) -> str:
+        return (
+            f"PreviewFrame(prompt_id={self.prompt_id!r}, node_id={self.node_id!r}, "
+            f"image_format={self.image_format!r}, size={len(self.data)})"
+        )
+
+
+def parse_preview(frame: bytes, prompt_id: Optional[str] = None, node_id: Optional[str] = None) -> Optional[PreviewFrame]:
+    """Parse a ComfyUI binary WebSocket frame, or return ``None`` if it is not an image preview.
+
+    Plain ``PREVIEW_IMAGE`` frames carry no prompt id, so the caller passes the
+    prompt and node currently executing.
+    """
+    view = memoryview(frame)
+    if len(view) < 8:
+        return None
+    event_type, second = _U32_PAIR.unpack_from(view)
+    if event_type == PREVIEW_IMAGE:
+        return PreviewFrame(prompt_id, node_id, _IMAGE_FORMATS.get(second, "unknown"), view[8:])
+    if event_type == PREVIEW_IMAGE_WITH_METADATA:
+        end = 8 + second
+        try:
+            metadata = json.loads(bytes(view[8:end]))
+        except ValueError:
+            return None
+        image_type = metadata.get("image_type", "")
+        return PreviewFrame(
+            metadata.get("prompt_id", prompt_id),
+            metadata.get("node_id", node_id),
+            image_type.rpartition("/")[2] or "unknown",
+            view[end:],
+        )
+    return None
+
+
+class Event:
+    """Base of the typed WebSocket events; ``received_at`` is a ``time.monotonic()`` stamp."""
+
+    __slots__ = ("prompt_id", "received_at")
+    type = ""
+
+    def __init__(self, prompt_id: Optional[str], received_at: float):
+        self.prompt_id = prompt_id
+        self.received_at = received_at
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def _fields(cls) -> Iterator[str]:
+        for klass in reversed(cls.__mro__):
+            yield from (name for name in klass.__dict__.get("__slots__", ()) if name != "received_at")
+
+
+class StatusEvent(Event):
+    __slots__ = ("queue_remaining",)
+    type = "status"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.queue_remaining = ((data.get("status") or {}).get("exec_info") or {}).get("queue_remaining")
+
+
+class ExecutionStartEvent(Event):
+    __slots__ = ()
+    type = "execution_start"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+
+
+class ExecutingEvent(Event):
+    """A node started running; ``node`` is ``None`` once the whole prompt is done."""
+
+    __slots__ = ("node",)
+    type = "executing"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.node = data.get("node")
+
+
+class ProgressEvent(Event):
+    __slots__ = ("node", "value", "max")
+    type = "progress"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.node = data.get("node")
+        self.value = data.get("value", 0)
+        self.max = data.get("max", 0)
+
+
+class ExecutedEvent(Event):
+    __slots__ = ("node", "output")
+    type = "executed"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.node = data.get("node")
+        self.output = data.get("output") or {}
+
+
+class CachedEvent(Event):
+    __slots__ = ("nodes",)
+    type = "execution_cached"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.nodes = data.get("nodes") or []
+
+
+class ExecutionSuccessEvent(Event):
+    __slots__ = ()
+    type = "execution_success"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+
+
+class ExecutionErrorEvent(Event):
+    __slots__ = ("node", "node_type", "exception_type", "exception_message", "traceback")
+    type = "execution_error"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.node = data.get("node_id")
+        self.node_type = data.get("node_type")
+        self.exception_type = data.get("exception_type", "")
+        self.exception_message = data.get("exception_message", "")
+        self.traceback = data.get("traceback") or []
+
+
+class InterruptedEvent(Event):
+    __slots__ = ("node", "node_type")
+    type = "execution_interrupted"
+
+    def __init__(self, prompt_id, received_at, data):
+        super().__init__(prompt_id, received_at)
+        self.node = data.get("node_id")
+        self.node_type = data.get("node_type")
+
+
+_EVENT_TYPES = {
+    cls.type: cls
+    for cls in (
+        StatusEvent,
+        ExecutionStartEvent,
+        ExecutingEvent,
+        ProgressEvent,
+        ExecutedEvent,
+        CachedEvent,
+        ExecutionSuccessEvent,
+        ExecutionErrorEvent,
+        InterruptedEvent,
+    )
+}
+TERMINAL_EVENTS = (ExecutionSuccessEvent, ExecutionErrorEvent, InterruptedEvent)
+
+
+def parse_event(message: Dict[str, Any], received_at: Optional[float] = None) -> Optional[Event]:
+    """Build the typed event for a decoded JSON message, or ``None`` for unknown types."""
+    cls = _EVENT_TYPES.get(message.get("type"))
+    if cls is None:
+        return None
+    data = message.get("data") or {}
+    return cls(data.get("prompt_id"), time.monotonic() if received_at is None else received_at, data)
+
+
+def is_terminal(event: Event) -> bool:
+    """Whether ``event`` ends its prompt (``executing`` with no node counts, for older servers)."""
+    return isinstance(event, TERMINAL_EVENTS) or (isinstance(event, ExecutingEvent) and event.node is None)
+
+
+def node_timings(events: Iterable[Event]) -> Dict[str, float]:
+    """Seconds spent per node, measured between consecutive ``executing`` events of one prompt."""
+    timings: Dict[str, float] = {}
+    node, started = None, 0.0
+    for event in events:
+        if isinstance(event, (ExecutingEvent, *TERMINAL_EVENTS)):
+            if node is not None:
+                timings[node] = timings.get(node, 0.0) + event.received_at - started
+            node = event.node if isinstance(event, ExecutingEvent) else None
+            started = event.received_at
+    return timings
+
+
+class ComfyExecutionError(RuntimeError):
+    """The server reported ``execution_error`` for a prompt; ``event`` has the details."""
+
+    def __init__(self, event: Event):
+        if isinstance(event, ExecutionErrorEvent):
+            message = f"Prompt {event.prompt_id} failed in node {event.node} ({event.node_type}): {event.exception_type}: {event.exception_message}"
+        else:
+            message = f"Prompt {event.prompt_id} failed"
+        super().__init__(message)
+        self.event = event
+
+
+class ComfyInterruptedError(ComfyExecutionError):
+    """The prompt was interrupted before it finished."""
+
+    def __init__(self, event: Event):
+        RuntimeError.__init__(self, f"Prompt {event.prompt_id} was interrupted")
+        self.event = event
+
+
+def raise_for_event(event: Any) -> None:
+    if isinstance(event, ExecutionErrorEvent):
+        raise ComfyExecutionError(event)
+    if isinstance(event, InterruptedEvent):
+        raise ComfyInterruptedError(event)
+
+
+class _Subscription:
+    def __init__(self, prompt_id: Optional[str], max_fps: Optional[float]):
+        self.prompt_id = prompt_id
+        self.min_interval = 0.0 if not max_fps else 1.0 / max_fps
+        self.closed = False
+        self._last = float("-inf")
+        self._detach: Optional[Callable[[], None]] = None
+
+    def offer(self, frame: PreviewFrame) -> None:
+        # Runs on the socket reader: decimate and hand off without ever blocking.
+        now = time.monotonic()
+        if now - self._last < self.min_interval:
+            return
+        self._last = now
+        self._deliver(frame)
+
+    def _deliver(self, frame: PreviewFrame) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        self.closed = True
+
+    def close(self) -> None:
+        if self._detach is not None:
+            self._detach()
+            self._detach = None
+        self.finish()
+
+
+class PreviewCallback(_Subscription):
+    """Invoke ``callback(frame)`` on the socket reader for each accepted frame; keep it short."""
+
+    def __init__(self, callback: Callable[[PreviewFrame], Any], prompt_id: Optional[str], max_fps: Optional[float]):
+        super().__init__(prompt_id, max_fps)
+        self.callback = callback
+
+    def _deliver(self, frame: PreviewFrame) -> None:
+        self.callback(frame)
+
+
+class PreviewStream(_Subscription):
+    """Blocking iterator over preview frames that keeps only the newest undelivered frame."""
+
+    def __init__(self, prompt_id: Optional[str], max_fps: Optional[float], timeout: Optional[float] = None):
+        super().__init__(prompt_id, max_fps)
+        self.timeout = timeout
+        self._frame: Optional[PreviewFrame] = None
+        self._cond = threading.Condition()
+
+    def _deliver(self, frame: PreviewFrame) -> None:
+        with self._cond:
+            self._frame = frame
+            self._cond.notify()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def __iter__(self) -> Iterator[PreviewFrame]:
+        try:
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(lambda: self._frame is not None or self.closed, self.timeout):
+                        raise TimeoutError("Timed out waiting for a preview frame")
+                    frame, self._frame = self._frame, None
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.close()
+
+
+class AsyncPreviewStream(_Subscription):
+    """asyncio twin of `PreviewStream`; frames are offered from the dispatcher task."""
+
+    def __init__(self, prompt_id: Optional[str], max_fps: Optional[float], timeout: Optional[float] = None):
+        super().__init__(prompt_id, max_fps)
+        self.timeout = timeout
+        self._frame: Optional[PreviewFrame] = None
+        self._ready = asyncio.Event()
+
+    def _deliver(self, frame: PreviewFrame) -> None:
+        self._frame = frame
+        self._ready.set()
+
+    def finish(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def __aiter__(self) -> AsyncIterator[PreviewFrame]:
+        try:
+            while True:
+                if self._frame is None and not self.closed:
+                    self._ready.clear()
+                    try:
+                        await asyncio.wait_for(self._ready.wait(), self.timeout)
+                    except TimeoutError:
+                        raise TimeoutError("Timed out waiting for a preview frame") from None
+                frame, self._frame = self._frame, None
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.close()
+
+
+class EventStream(_Subscription):
+    """Blocking iterator over every event of a prompt, ending after its terminal event."""
+
+    def __init__(self, prompt_id: Optional[str], timeout: Optional[float] = None):
+        super().__init__(prompt_id, None)
+        self.timeout = timeout
+        self._events: Deque[Event] = deque()
+        self._cond = threading.Condition()
+
+    def offer(self, event: Event) -> None:
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def __iter__(self) -> Iterator[Event]:
+        try:
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(lambda: self._events or self.closed, self.timeout):
+                        raise TimeoutError("Timed out waiting for an execution event")
+                    if not self._events:
+                        return
+                    event = self._events.popleft()
+                yield event
+        finally:
+            self.close()
+
+
+class AsyncEventStream(_Subscription):
+    """asyncio twin of `EventStream`."""
+
+    def __init__(self, prompt_id: Optional[str], timeout: Optional[float] = None):
+        super().__init__(prompt_id, None)
+        self.timeout = timeout
+        self._events: Deque[Event] = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, event: Event) -> None:
+        self._events.append(event)
+        self._ready.set()
+
+    def finish(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def __aiter__(self) -> AsyncIterator[Event]:
+        try:
+            while True:
+                if not self._events and not self.closed:
+                    self._ready.clear()
+                    try:
+                        await asyncio.wait_for(self._ready.wait(), self.timeout)
+                    except TimeoutError:
+                        raise TimeoutError("Timed out waiting for an execution event") from None
+                if not self._events:
+                    return
+                yield self._events.popleft()
+        finally:
+            self.close()
+
+
+__all__ = [
+    "Event",
+    "StatusEvent",
+    "ExecutionStartEvent",
+    "ExecutingEvent",
+    "ProgressEvent",
+    "ExecutedEvent",
+    "CachedEvent",
+    "ExecutionSuccessEvent",
+    "ExecutionErrorEvent",
+    "InterruptedEvent",
+    "ComfyExecutionError",
+    "ComfyInterruptedError",
+    "EventStream",
+    "AsyncEventStream",
+    "parse_event",
+    "node_timings",
+    "PreviewFrame",
+    "PreviewCallback",
+    "PreviewStream",
+    "AsyncPreviewStream",
+    "parse_preview",
+    "PREVIEW_IMAGE",
+    "PREVIEW_IMAGE_WITH_METADATA",
+]
@@ -0,0 +1,116 @@
+import bisect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_FINAL_MESSAGES = ("execution_success", "execution_error", "execution_interrupted")
+
+
+@dataclass(slots=True)
+class HistoryRecord:
+    prompt_id: str
+    status: str
+    completed_at: float
+    outputs: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _completed_at(status: Dict[str, Any]) -> Optional[float]:
+    for name, data in reversed(status.get("messages") or []):
+        if name in _FINAL_MESSAGES and isinstance(data, dict) and "timestamp" in data:
+            return data["timestamp"] / 1000.0
+    return None
+
+
+def _record(prompt_id: str, entry: Dict[str, Any], now: float) -> HistoryRecord:
+    status = entry.get("status") or {}
+    outputs = []
+    for node_output in (entry.get("outputs") or {}).values():
+        for items in node_output.values():
+            if isinstance(items, list):
+                outputs.extend(item for item in items if isinstance(item, dict) and "filename" in item)
+    completed_at = _completed_at(status)
+    return HistoryRecord(
+        prompt_id=prompt_id,
+        status=status.get("status_str", "unknown"),
+        completed_at=now if completed_at is None else completed_at,
+        outputs=outputs,
+    )
+
+
+class HistoryIndex:
+    """Local index of server history, filled incrementally by ``sync_history``.
+
+    Only compact records are kept: status, completion time (from the
+    ``execution_*`` status message timestamps) and output file references,
+    indexed by prompt id, completion time and output filename.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, HistoryRecord] = {}
+        self._by_time: List[Tuple[float, str]] = []
+        self._by_output: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, prompt_id: object) -> bool:
+        return prompt_id in self._records
+
+    def __iter__(self) -> Iterator[HistoryRecord]:
+        return (self._records[prompt_id] for _, prompt_id in self._by_time)
+
+    def get(self, prompt_id: str) -> Optional[HistoryRecord]:
+        return self._records.get(prompt_id)
+
+    def add(self, prompt_id: str, entry: Dict[str, Any]) -> HistoryRecord:
+        record = _record(prompt_id, entry, time.time())
+        self.discard(prompt_id)
+        self._records[prompt_id] = record
+        bisect.insort(self._by_time, (record.completed_at, prompt_id))
+        for output in record.outputs:
+            self._by_output[output["filename"]] = prompt_id
+        return record
+
+    def discard(self, prompt_id: str) -> None:
+        record = self._records.pop(prompt_id, None)
+        if record is None:
+            return
+        index = bisect.bisect_left(self._by_time, (record.completed_at, prompt_id))
+        if index < len(self._by_time) and self._by_time[index] == (record.completed_at, prompt_id):
+            del self._by_time[index]
+        for output in record.outputs:
+            if self._by_output.get(output["filename"]) == prompt_id:
+                del self._by_output[output["filename"]]
+
+    def covers(self, page: Dict[str, Any], requested: Optional[int]) -> bool:
+        """Whether a newest-last history page holds every entry missing from the index.
+
+        True when the page reaches an already indexed prompt, or when its size
+        differs from the request (end of history, or a server that ignores
+        ``max_items``).
+        """
+        if requested is None or len(page) != requested:
+            return True
+        return any(prompt_id in self._records for prompt_id in page)
+
+    def ingest(self, page: Dict[str, Any]) -> List[HistoryRecord]:
+        """Add the entries of ``page`` that are not indexed yet and return their records."""
+        return [self.add(prompt_id, entry) for prompt_id, entry in page.items() if prompt_id not in self._records]
+
+    def since(self, timestamp: float, status: Optional[str] = None) -> List[HistoryRecord]:
+        start = bisect.bisect_left(self._by_time, (timestamp, ""))
+        records = (self._records[prompt_id] for _, prompt_id in self._by_time[start:])
+        return [record for record in records if status is None or record.status == status]
+
+    def outputs_since(self, timestamp: float) -> List[Dict[str, Any]]:
+        return [output for record in self.since(timestamp) for output in record.outputs]
+
+    def by_status(self, status: str) -> List[HistoryRecord]:
+        return [record for record in self if record.status == status]
+
+    def find_output(self, filename: str) -> Optional[HistoryRecord]:
+        prompt_id = self._by_output.get(filename)
+        return None if prompt_id is None else self._records.get(prompt_id)
+
+
+__all__ = ["HistoryIndex", "HistoryRecord"]
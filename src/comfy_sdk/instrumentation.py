@@ -0,0 +1,446 @@
+import bisect
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from .events import TERMINAL_EVENTS, Event, ExecutingEvent, ExecutionErrorEvent, InterruptedEvent
+from .workflow import RenderedWorkflow
+
+logger = logging.getLogger(__name__)
+
+PROMPT_QUEUED = "queued"
+PROMPT_RUNNING = "running"
+PROMPT_SUCCESS = "success"
+PROMPT_ERROR = "error"
+PROMPT_INTERRUPTED = "interrupted"
+PROMPT_UNKNOWN = "unknown"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+_MAX_TRACKED = 4096
+
+
+def call_hook(hook: Callable[..., None], *args: Any) -> None:
+    try:
+        hook(*args)
+    except Exception:
+        logger.exception("Instrumentation hook %s failed", getattr(hook, "__name__", hook))
+
+
+def prompt_state(result: Any) -> str:
+    """Lifecycle state for what a prompt resolved with: a terminal event, or ``None`` if it vanished."""
+    if isinstance(result, ExecutionErrorEvent):
+        return PROMPT_ERROR
+    if isinstance(result, InterruptedEvent):
+        return PROMPT_INTERRUPTED
+    if isinstance(result, Event):
+        return PROMPT_SUCCESS
+    return PROMPT_UNKNOWN
+
+
+def endpoint_label(url: httpx.URL) -> str:
+    """Low-cardinality endpoint name for metrics: ``/history/<id>`` becomes ``/history/*``."""
+    head, _, rest = url.path.lstrip("/").partition("/")
+    return f"/{head}/*" if rest else f"/{head}"
+
+
+class Instrumentation:
+    """Client hooks; every method is a no-op, so subclasses override only what they need.
+
+    HTTP hooks run where the request is made. ``on_request_end`` fires once the
+    response body has been read or closed, so ``elapsed`` (seconds) covers
+    downloads. ``on_event`` and ``on_prompt`` run on the WebSocket dispatcher and
+    should return quickly. Exceptions raised by hooks are logged and swallowed.
+    """
+
+    def on_request_start(self, request: httpx.Request) -> None:
+        pass
+
+    def on_request_end(
+        self,
+        request: httpx.Request,
+        response: Optional[httpx.Response],
+        elapsed: float,
+        error: Optional[BaseException],
+    ) -> None:
+        """``response`` is ``None`` when ``error`` was raised before one arrived."""
+
+    def on_event(self, event: Event) -> None:
+        """Every typed WebSocket event, before it reaches streams and waiters."""
+
+    def on_prompt(
+        self,
+        prompt_id: str,
+        state: str,
+        at: float,
+        workflow: Union[Dict[str, Any], RenderedWorkflow, None] = None,
+    ) -> None:
+        """A lifecycle transition (``PROMPT_*``) at ``time.monotonic()`` stamp ``at``.
+
+        ``queued`` is reported once the server accepted the prompt, stamped with
+        the submission start and carrying the submitted ``workflow``.
+        """
+
+
+class _TimedStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, finish: Callable[[Optional[BaseException]], None]):
+        self._stream = stream
+        self._finish: Optional[Callable[[Optional[BaseException]], None]] = finish
+        self._error: Optional[BaseException] = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield from self._stream
+        except Exception as exc:
+            self._error = exc
+            raise
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            finish, self._finish = self._finish, None
+            if finish is not None:
+                finish(self._error)
+
+
+class _AsyncTimedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, finish: Callable[[Optional[BaseException]], None]):
+        self._stream = stream
+        self._finish: Optional[Callable[[Optional[BaseException]], None]] = finish
+        self._error: Optional[BaseException] = None
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as exc:
+            self._error = exc
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            finish, self._finish = self._finish, None
+            if finish is not None:
+                finish(self._error)
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Report each request to ``hooks``; it is only installed when a client has instrumentation."""
+
+    def __init__(self, transport: httpx.BaseTransport, hooks: Instrumentation):
+        self.transport = transport
+        self.hooks = hooks
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        hooks = self.hooks
+        call_hook(hooks.on_request_start, request)
+        started = time.perf_counter()
+        try:
+            response = self.transport.handle_request(request)
+        except Exception as exc:
+            call_hook(hooks.on_request_end, request, None, time.perf_counter() - started, exc)
+            raise
+
+        def finish(error: Optional[BaseException]) -> None:
+            call_hook(hooks.on_request_end, request, response, time.perf_counter() - started, error)
+
+        if response.is_closed:
+            finish(None)  # Already buffered, e.g. by a mock transport.
+        else:
+            response.stream = _TimedStream(response.stream, finish)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    """asyncio twin of `InstrumentedTransport`."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, hooks: Instrumentation):
+        self.transport = transport
+        self.hooks = hooks
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        hooks = self.hooks
+        call_hook(hooks.on_request_start, request)
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as exc:
+            call_hook(hooks.on_request_end, request, None, time.perf_counter() - started, exc)
+            raise
+
+        def finish(error: Optional[BaseException]) -> None:
+            call_hook(hooks.on_request_end, request, response, time.perf_counter() - started, error)
+
+        if response.is_closed:
+            finish(None)  # Already buffered, e.g. by a mock transport.
+        else:
+            response.stream = _AsyncTimedStream(response.stream, finish)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``counts[i]`` counts observations ``<= buckets[i]``, the last slot the rest."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total, result = 0, []
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class _PromptTrack:
+    __slots__ = ("queued_at", "started_at", "finished", "node", "node_started", "nodes", "class_types")
+
+    def __init__(self) -> None:
+        self.queued_at: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.finished = False
+        self.node: Optional[str] = None
+        self.node_started = 0.0
+        self.nodes: List[Tuple[str, float]] = []
+        self.class_types: Optional[Dict[str, str]] = None
+
+
+# name -> (type, help, label names)
+_METRICS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "comfy_http_requests_total": ("counter", "HTTP requests by response status.", ("host", "method", "endpoint", "status")),
+    "comfy_http_request_duration_seconds": (
+        "histogram",
+        "HTTP request latency, including reading the response body.",
+        ("host", "method", "endpoint"),
+    ),
+    "comfy_http_response_bytes_total": ("counter", "HTTP response body bytes read.", ("host", "method", "endpoint")),
+    "comfy_http_requests_in_flight": ("gauge", "HTTP requests currently open.", ("host",)),
+    "comfy_ws_events_total": ("counter", "WebSocket events received.", ("type",)),
+    "comfy_prompts_total": ("counter", "Prompt lifecycle transitions.", ("state",)),
+    "comfy_prompt_queue_wait_seconds": ("histogram", "Time from submission to execution start.", ()),
+    "comfy_prompt_execution_seconds": ("histogram", "Time from execution start to completion.", ("state",)),
+    "comfy_node_execution_seconds": ("histogram", "Time spent executing one node.", ("node_type",)),
+}
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _body_size(response: httpx.Response) -> int:
+    if response.num_bytes_downloaded:
+        return response.num_bytes_downloaded
+    try:
+        return len(response.content)  # Buffered before the client saw it.
+    except httpx.ResponseNotRead:
+        return 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsCollector(Instrumentation):
+    """In-process metrics: per-endpoint HTTP latency and counters, WebSocket event counts,
+    queue wait versus execution time per prompt and per-node execution time.
+
+    Updates are a dict lookup plus a bucket bisect under one lock. Export with
+    `to_dict` or `to_prometheus` (text exposition format 0.0.4). One collector
+    can be shared by several clients, e.g. every client of a pool.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, max_tracked: int = _MAX_TRACKED):
+        self.buckets = tuple(sorted(buckets))
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._series: Dict[str, Dict[Tuple[str, ...], Any]] = {name: {} for name in _METRICS}
+        self._prompts: "OrderedDict[str, _PromptTrack]" = OrderedDict()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series = {name: {} for name in _METRICS}
+            self._prompts.clear()
+
+    def _add(self, name: str, labels: Tuple[str, ...], amount: float = 1) -> None:
+        series = self._series[name]
+        series[labels] = series.get(labels, 0) + amount
+
+    def _observe(self, name: str, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def _track(self, prompt_id: str) -> _PromptTrack:
+        track = self._prompts.get(prompt_id)
+        if track is None:
+            track = self._prompts[prompt_id] = _PromptTrack()
+            while len(self._prompts) > self.max_tracked:
+                _, evicted = self._prompts.popitem(last=False)
+                self._flush_nodes(evicted)
+        return track
+
+    def _flush_nodes(self, track: _PromptTrack) -> None:
+        class_types = track.class_types or {}
+        for node, seconds in track.nodes:
+            self._observe("comfy_node_execution_seconds", (class_types.get(node, "unknown"),), seconds)
+        track.nodes = []
+
+    def on_request_start(self, request: httpx.Request) -> None:
+        with self._lock:
+            self._add("comfy_http_requests_in_flight", (request.url.netloc.decode("ascii"),))
+
+    def on_request_end(
+        self,
+        request: httpx.Request,
+        response: Optional[httpx.Response],
+        elapsed: float,
+        error: Optional[BaseException],
+    ) -> None:
+        host = request.url.netloc.decode("ascii")
+        labels = (host, request.method, endpoint_label(request.url))
+        status = "error" if response is None or error is not None else str(response.status_code)
+        with self._lock:
+            self._add("comfy_http_requests_in_flight", (host,), -1)
+            self._add("comfy_http_requests_total", (*labels, status))
+            self._observe("comfy_http_request_duration_seconds", labels, elapsed)
+            if response is not None:
+                self._add("comfy_http_response_bytes_total", labels, _body_size(response))
+
+    def on_event(self, event: Event) -> None:
+        with self._lock:
+            self._add("comfy_ws_events_total", (event.type,))
+            if event.prompt_id is None or not isinstance(event, (ExecutingEvent, *TERMINAL_EVENTS)):
+                return
+            track = self._prompts.get(event.prompt_id)
+            if track is None:
+                if not isinstance(event, ExecutingEvent) or event.node is None:
+                    return  # e.g. the trailing ``executing`` after the prompt was already finalized
+                track = self._track(event.prompt_id)
+            if track.node is not None:
+                track.nodes.append((track.node, event.received_at - track.node_started))
+            track.node = event.node if isinstance(event, ExecutingEvent) else None
+            track.node_started = event.received_at
+
+    def on_prompt(
+        self,
+        prompt_id: str,
+        state: str,
+        at: float,
+        workflow: Union[Dict[str, Any], RenderedWorkflow, None] = None,
+    ) -> None:
+        class_types = None
+        if workflow is not None:
+            graph = workflow.to_dict() if isinstance(workflow, RenderedWorkflow) else workflow
+            class_types = {
+                str(node_id): node.get("class_type", "unknown") for node_id, node in graph.items() if isinstance(node, dict)
+            }
+        with self._lock:
+            self._add("comfy_prompts_total", (state,))
+            track = self._track(prompt_id)
+            if state == PROMPT_QUEUED:
+                track.queued_at = at
+                track.class_types = class_types
+                if track.started_at is not None:
+                    self._observe("comfy_prompt_queue_wait_seconds", (), max(track.started_at - at, 0.0))
+            elif state == PROMPT_RUNNING:
+                track.started_at = at
+                if track.queued_at is not None:
+                    self._observe("comfy_prompt_queue_wait_seconds", (), max(at - track.queued_at, 0.0))
+            else:
+                track.finished = True
+                if track.started_at is not None:
+                    self._observe("comfy_prompt_execution_seconds", (state,), at - track.started_at)
+            # WebSocket events can overtake the /prompt response; node types are known once it is in.
+            if track.finished and track.queued_at is not None:
+                self._flush_nodes(track)
+                del self._prompts[prompt_id]
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Every series as ``{"labels": ..., "value": ...}``, histograms as ``count``/``sum``/cumulative ``buckets``."""
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for name, (kind, _, label_names) in _METRICS.items():
+                entries = []
+                for labels, value in self._series[name].items():
+                    entry: Dict[str, Any] = {"labels": dict(zip(label_names, labels))}
+                    if kind == "histogram":
+                        entry["count"] = value.count
+                        entry["sum"] = value.sum
+                        entry["buckets"] = {_format_value(bound): count for bound, count in value.cumulative()}
+                    else:
+                        entry["value"] = value
+                    entries.append(entry)
+                result[name] = entries
+        return result
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text, label_names) in _METRICS.items():
+                series = self._series[name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in series.items():
+                    if kind != "histogram":
+                        lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+                        continue
+                    for bound, count in value.cumulative():
+                        le = f'le="{_format_value(bound)}"'
+                        lines.append(f"{name}_bucket{_format_labels(label_names, labels, le)} {count}")
+                    lines.append(f"{name}_sum{_format_labels(label_names, labels)} {_format_value(value.sum)}")
+                    lines.append(f"{name}_count{_format_labels(label_names, labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "Instrumentation",
+    "MetricsCollector",
+    "Histogram",
+    "InstrumentedTransport",
+    "AsyncInstrumentedTransport",
+    "endpoint_label",
+    "prompt_state",
+    "DEFAULT_BUCKETS",
+    "PROMPT_QUEUED",
+    "PROMPT_RUNNING",
+    "PROMPT_SUCCESS",
+    "PROMPT_ERROR",
+    "PROMPT_INTERRUPTED",
+    "PROMPT_UNKNOWN",
+]
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from ._files import PathLike
+from .instrumentation import PROMPT_ERROR, PROMPT_INTERRUPTED, PROMPT_SUCCESS
+
+JOB_SUBMITTING = "submitting"
+JOB_QUEUED = "queued"
+JOB_FAILED = "failed"
+JOB_LOST = "lost"
+PENDING_STATES = (JOB_SUBMITTING, JOB_QUEUED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS jobs (
+    prompt_id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    workflow_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, host);
+"""
+_COLUMNS = "prompt_id, host, workflow_hash, status, submitted_at, updated_at"
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    prompt_id: str
+    host: str
+    workflow_hash: str
+    status: str
+    submitted_at: float
+    updated_at: float
+
+
+@dataclass
+class Reattachment:
+    """What ``reattach`` found: histories of prompts that finished while nobody
+    was listening, ids still queued (now tracked again, so they can be waited
+    on), and entries the server has no record of."""
+
+    finished: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    pending: List[str] = field(default_factory=list)
+    lost: List[JournalEntry] = field(default_factory=list)
+
+
+def history_state(history: Dict[str, Any], prompt_id: str) -> Optional[str]:
+    """Terminal state recorded in a ``/history/{prompt_id}`` response, or ``None`` if it has no entry yet."""
+    entry = history.get(prompt_id)
+    if not entry:
+        return None
+    status = entry.get("status") or {}
+    if any(message[0] == "execution_interrupted" for message in status.get("messages") or []):
+        return PROMPT_INTERRUPTED
+    return PROMPT_SUCCESS if status.get("status_str", "success") == "success" else PROMPT_ERROR
+
+
+class JobJournal:
+    """SQLite record of submitted prompts, so a restarted worker can reattach instead of resubmitting.
+
+    A row is written as ``submitting`` before ``POST /prompt`` goes out, becomes
+    ``queued`` once the server accepts it and takes the terminal state
+    (``success``, ``error`` or ``interrupted``) when the client sees it finish.
+    A prompt that left the queue while the socket was down stays ``queued``
+    until ``reattach`` reads its outcome from ``/history``. Definite rejections
+    are ``failed``. The journal also keeps a stable
+    ``client_id``: ComfyUI only sends execution events to the client id that
+    submitted a prompt, so clients built with a journal reuse it across
+    restarts. Give each worker process its own journal file.
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # WAL with synchronous=NORMAL survives a killed process; only power loss can drop the last commits.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('client_id', ?)", (str(uuid.uuid4()),))
+        (self.client_id,) = self._db.execute("SELECT value FROM meta WHERE key = 'client_id'").fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def record(self, prompt_id: str, host: str, workflow_hash: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                (prompt_id, host, workflow_hash, JOB_SUBMITTING, now, now),
+            )
+
+    def accepted(self, prompt_id: str, submitted_as: Optional[str] = None) -> None:
+        """Mark a submission queued; ``submitted_as`` is the id it was recorded under if the server assigned another."""
+        with self._lock:
+            if submitted_as is not None and submitted_as != prompt_id:
+                self._db.execute("UPDATE jobs SET prompt_id = ? WHERE prompt_id = ?", (prompt_id, submitted_as))
+            # Completion events can overtake the /prompt response; never downgrade a finished row.
+            self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE prompt_id = ? AND status = ?",
+                (JOB_QUEUED, time.time(), prompt_id, JOB_SUBMITTING),
+            )
+
+    def finish(self, prompt_id: str, status: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE prompt_id = ?", (status, time.time(), prompt_id)
+            )
+
+    def get(self, prompt_id: str) -> Optional[JournalEntry]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE prompt_id = ?", (prompt_id,)).fetchone()
+        return None if row is None else JournalEntry(*row)
+
+    def entries(self, statuses: Optional[Iterable[str]] = None, host: Optional[str] = None) -> List[JournalEntry]:
+        """Rows in submission order, optionally filtered by status and host (a client's ``base_url``)."""
+        query, params = f"SELECT {_COLUMNS} FROM jobs WHERE 1", []
+        if statuses is not None:
+            statuses = list(statuses)
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params += statuses
+        if host is not None:
+            query += " AND host = ?"
+            params.append(host)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY submitted_at", params).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def pending(self, host: Optional[str] = None) -> List[JournalEntry]:
+        """Submissions whose outcome this journal has not seen yet."""
+        return self.entries(PENDING_STATES, host)
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished rows last updated more than ``older_than`` seconds ago; return how many went."""
+        placeholders = ", ".join("?" * len(PENDING_STATES))
+        with self._lock:
+            cursor = self._db.execute(
+                f"DELETE FROM jobs WHERE status NOT IN ({placeholders}) AND updated_at < ?",
+                (*PENDING_STATES, time.time() - older_than),
+            )
+        return cursor.rowcount
+
+
+__all__ = [
+    "JobJournal",
+    "JournalEntry",
+    "Reattachment",
+    "history_state",
+    "JOB_SUBMITTING",
+    "JOB_QUEUED",
+    "JOB_FAILED",
+    "JOB_LOST",
+    "PENDING_STATES",
+]
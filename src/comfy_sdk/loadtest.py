@@ -0,0 +1,365 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .client import AsyncComfyClient
+from .events import ComfyExecutionError, ComfyInterruptedError
+from .instrumentation import PROMPT_QUEUED, PROMPT_RUNNING, Instrumentation
+from .pool import HostSpec, _parse_host
+
+SEED_INPUTS = ("seed", "noise_seed")
+PERCENTILES = (50, 95, 99)
+
+STATUS_SUCCESS = "success"
+STATUS_ERROR = "error"
+STATUS_INTERRUPTED = "interrupted"
+STATUS_TIMEOUT = "timeout"
+STATUS_SUBMIT_FAILED = "submit_failed"
+
+
+@dataclass
+class PromptSample:
+    """Timings for one submitted prompt, in seconds.
+
+    ``scheduled`` is the arrival offset from the start of the run and ``lag``
+    how late the submission actually went out. ``submit_latency`` is the
+    ``POST /prompt`` round trip, ``queue_wait`` runs from its response to
+    ``execution_start``, ``execution_time`` from there to completion, and
+    ``end_to_end`` from submission start to completion. For a prompt that
+    timed out ``end_to_end`` is how long it was waited on, a lower bound.
+    """
+
+    index: int
+    workflow: str
+    host: str
+    scheduled: float
+    lag: float = 0.0
+    prompt_id: Optional[str] = None
+    status: Optional[str] = None
+    submit_latency: Optional[float] = None
+    queue_wait: Optional[float] = None
+    execution_time: Optional[float] = None
+    end_to_end: Optional[float] = None
+    error: Optional[str] = None
+
+
+class _Recorder(Instrumentation):
+    """Collects ``execution_start`` and completion stamps per prompt from the dispatcher."""
+
+    def __init__(self):
+        self.started: Dict[str, float] = {}
+        self.finished: Dict[str, float] = {}
+
+    def on_prompt(self, prompt_id: str, state: str, at: float, workflow: Any = None) -> None:
+        if state == PROMPT_RUNNING:
+            self.started.setdefault(prompt_id, at)
+        elif state != PROMPT_QUEUED:
+            self.finished.setdefault(prompt_id, at)
+
+
+def load_workflows(directory: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Read every ``*.json`` API-format workflow in ``directory``, sorted by file name."""
+    workflows = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            workflow = json.load(f)
+        if not isinstance(workflow, dict) or not all(
+            isinstance(node, dict) and "class_type" in node for node in workflow.values()
+        ):
+            raise ValueError(f"{name} is not an API-format workflow (export it with 'Save (API Format)')")
+        workflows.append((name, workflow))
+    if not workflows:
+        raise ValueError(f"No *.json workflows found in {directory}")
+    return workflows
+
+
+def arrival_offsets(
+    rate: float,
+    process: str = "poisson",
+    duration: Optional[float] = None,
+    count: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+) -> Iterator[float]:
+    """Yield arrival times (seconds from start) at ``rate`` per second until ``duration`` or ``count`` is reached.
+
+    ``poisson`` draws exponential inter-arrival gaps; ``constant`` spaces them evenly.
+    """
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    if process not in ("poisson", "constant"):
+        raise ValueError(f"Unknown arrival process {process!r}")
+    if duration is None and count is None:
+        raise ValueError("Give a duration or a count")
+    rng = rng if rng is not None else random.Random()
+    offset = 0.0 if process == "constant" else rng.expovariate(rate)
+    emitted = 0
+    while (count is None or emitted < count) and (duration is None or offset < duration):
+        yield offset
+        emitted += 1
+        offset += rng.expovariate(rate) if process == "poisson" else 1.0 / rate
+
+
+def reseed(workflow: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Copy of ``workflow`` with fresh integer seeds, so the server's execution cache cannot short-circuit it."""
+    reseeded = {}
+    for node_id, node in workflow.items():
+        inputs = node.get("inputs") if isinstance(node, dict) else None
+        if inputs and any(isinstance(inputs.get(name), int) for name in SEED_INPUTS):
+            inputs = dict(inputs)
+            for name in SEED_INPUTS:
+                if isinstance(inputs.get(name), int):
+                    inputs[name] = rng.randrange(2**50)
+            node = dict(node, inputs=inputs)
+        reseeded[node_id] = node
+    return reseeded
+
+
+async def run_loadtest(
+    hosts: Sequence[HostSpec],
+    workflows: Sequence[Tuple[str, Dict[str, Any]]],
+    rate: float,
+    process: str = "poisson",
+    duration: Optional[float] = None,
+    count: Optional[int] = None,
+    timeout: float = 600.0,
+    randomize_seeds: bool = True,
+    seed: Optional[int] = None,
+) -> List[PromptSample]:
+    """Submit ``workflows`` round-robin to ``hosts`` on an open-loop arrival schedule.
+
+    Arrivals never wait for earlier prompts, so when the fleet saturates the
+    backlog grows in the server queues and shows up as ``queue_wait``. Each
+    prompt is waited on for up to ``timeout`` seconds after submission.
+    """
+    rng = random.Random(seed)
+    recorder = _Recorder()
+    clients = [AsyncComfyClient(host=host, port=port, instrumentation=recorder) for host, port in map(_parse_host, hosts)]
+    if not clients:
+        raise ValueError("run_loadtest needs at least one host")
+    samples: List[PromptSample] = []
+    tasks: List[asyncio.Task] = []
+    try:
+        # Sockets must be up before the first submit, or fast completions would go unseen.
+        await asyncio.gather(*(client.connect(connect_websocket=True) for client in clients))
+        start = time.monotonic()
+        for index, offset in enumerate(arrival_offsets(rate, process, duration, count, rng)):
+            delay = start + offset - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name, workflow = workflows[index % len(workflows)]
+            client = clients[index % len(clients)]
+            sample = PromptSample(index=index, workflow=name, host=f"{client.host}:{client.port}", scheduled=offset)
+            sample.lag = max(time.monotonic() - start - offset, 0.0)
+            samples.append(sample)
+            prompt = reseed(workflow, rng) if randomize_seeds else workflow
+            tasks.append(asyncio.create_task(_submit(client, prompt, sample, recorder, timeout)))
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*(client.close() for client in clients))
+    return samples
+
+
+async def _submit(
+    client: AsyncComfyClient,
+    prompt: Dict[str, Any],
+    sample: PromptSample,
+    recorder: _Recorder,
+    timeout: float,
+) -> None:
+    submitted = time.monotonic()
+    try:
+        response = await client.queue_prompt(prompt)
+    except Exception as e:
+        sample.status = STATUS_SUBMIT_FAILED
+        sample.error = f"{type(e).__name__}: {e}"
+        return
+    accepted = time.monotonic()
+    sample.prompt_id = response.prompt_id
+    sample.submit_latency = accepted - submitted
+    try:
+        await client.wait_for_completion(response.prompt_id, timeout=timeout)
+        sample.status = STATUS_SUCCESS
+    except ComfyInterruptedError as e:
+        sample.status, sample.error = STATUS_INTERRUPTED, str(e)
+    except ComfyExecutionError as e:
+        sample.status, sample.error = STATUS_ERROR, str(e)
+    except TimeoutError:
+        sample.status = STATUS_TIMEOUT
+        sample.end_to_end = time.monotonic() - submitted
+        return
+    except Exception as e:
+        sample.status, sample.error = STATUS_ERROR, f"{type(e).__name__}: {e}"
+        return
+    # The dispatcher's completion stamp excludes the follow-up /history fetch.
+    finished = recorder.finished.pop(response.prompt_id, time.monotonic())
+    started = recorder.started.pop(response.prompt_id, None)
+    sample.end_to_end = finished - submitted
+    if started is not None:
+        # execution_start can overtake the /prompt response.
+        sample.queue_wait = max(started - accepted, 0.0)
+        sample.execution_time = finished - max(started, accepted)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """The ``q``-th percentile of ``values`` by linear interpolation, or ``None`` if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: Sequence[PromptSample], wall_time: Optional[float] = None) -> Dict[str, Any]:
+    """Aggregate ``samples`` into status counts, rates and per-metric p50/p95/p99, mean and max.
+
+    ``metrics`` covers successful prompts only. ``all_end_to_end`` covers every
+    accepted prompt: failures with their real latency and timeouts with the
+    time waited, so under overload the tail is not hidden by dropping the
+    slowest prompts. Its ``lower_bound`` lists the stats that include a
+    timeout and are therefore at least, not exactly, that value.
+    """
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[sample.status or "pending"] = statuses.get(sample.status or "pending", 0) + 1
+    completed = [sample for sample in samples if sample.status == STATUS_SUCCESS]
+    summary: Dict[str, Any] = {"prompts": len(samples), "statuses": statuses}
+    if samples:
+        span = samples[-1].scheduled
+        summary["offered_rate"] = (len(samples) - 1) / span if span > 0 else None
+        summary["max_lag"] = max(sample.lag for sample in samples)
+    if wall_time:
+        summary["wall_time"] = wall_time
+        summary["throughput"] = len(completed) / wall_time
+    metrics = {}
+    for metric in ("submit_latency", "queue_wait", "execution_time", "end_to_end"):
+        values = [getattr(sample, metric) for sample in completed if getattr(sample, metric) is not None]
+        if not values:
+            continue
+        stats = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+        stats.update(mean=sum(values) / len(values), max=max(values), count=len(values))
+        metrics[metric] = stats
+    summary["metrics"] = metrics
+    accepted = [sample for sample in samples if sample.end_to_end is not None]
+    if accepted:
+        values = [sample.end_to_end for sample in accepted]
+        censored = [sample.end_to_end for sample in accepted if sample.status == STATUS_TIMEOUT]
+        stats = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+        stats.update(mean=sum(values) / len(values), max=max(values), count=len(values), timeouts=len(censored))
+        floor = min(censored, default=math.inf)
+        stats["lower_bound"] = [key for key in ("p50", "p95", "p99", "max") if stats[key] >= floor]
+        if censored:
+            stats["lower_bound"].append("mean")
+        summary["all_end_to_end"] = stats
+    return summary
+
+
+def write_json(path: str, summary: Dict[str, Any], samples: Sequence[PromptSample], config: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "summary": summary, "prompts": [asdict(s) for s in samples]}, f, indent=2)
+
+
+def write_csv(path: str, samples: Sequence[PromptSample]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[field.name for field in fields(PromptSample)])
+        writer.writeheader()
+        writer.writerows(asdict(sample) for sample in samples)
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [f"prompts: {summary['prompts']}  " + "  ".join(f"{k}: {v}" for k, v in sorted(summary["statuses"].items()))]
+    if summary.get("offered_rate") is not None:
+        lines.append(f"offered: {summary['offered_rate']:.2f}/s  max lag: {summary['max_lag'] * 1000:.1f} ms")
+    if summary.get("throughput") is not None:
+        lines.append(f"throughput: {summary['throughput']:.2f}/s over {summary['wall_time']:.1f} s")
+    lines.append(f"{'seconds':<16}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}{'max':>10}")
+    for metric, stats in summary["metrics"].items():
+        row = "".join(f"{stats[key]:>10.3f}" for key in ("p50", "p95", "p99", "mean", "max"))
+        lines.append(f"{metric:<16}{row}")
+    stats = summary.get("all_end_to_end")
+    if stats is not None:
+        # Stats that include a timeout only bound the real latency from below.
+        row = "".join(
+            f"{('>=' if key in stats['lower_bound'] else '') + format(stats[key], '.3f'):>10}"
+            for key in ("p50", "p95", "p99", "mean", "max")
+        )
+        lines.append(f"{'all end_to_end':<16}{row}")
+    return "\n".join(lines)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("workflows", help="directory of API-format workflow *.json files, replayed in name order")
+    parser.add_argument("--host", action="append", dest="hosts", metavar="HOST[:PORT]",
+                        help="ComfyUI host; repeat for several (prompts go round-robin). Default 127.0.0.1:8188")
+    parser.add_argument("--rate", type=float, required=True, help="arrivals per second")
+    parser.add_argument("--arrival", choices=("poisson", "constant"), default="poisson")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--duration", type=float, help="seconds to keep submitting (default 60)")
+    limit.add_argument("--count", type=int, help="number of prompts to submit")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for each prompt")
+    parser.add_argument("--keep-seeds", action="store_true", help="submit workflows unchanged instead of reseeding them")
+    parser.add_argument("--seed", type=int, help="random seed for arrivals and reseeding")
+    parser.add_argument("--json", metavar="PATH", help="write the summary and every prompt's timings as JSON")
+    parser.add_argument("--csv", metavar="PATH", help="write every prompt's timings as CSV")
+
+
+def run_cli(args: argparse.Namespace) -> int:
+    workflows = load_workflows(args.workflows)
+    hosts = args.hosts or ["127.0.0.1:8188"]
+    duration = args.duration if args.duration is not None or args.count is not None else 60.0
+    started = time.monotonic()
+    samples = asyncio.run(
+        run_loadtest(
+            hosts,
+            workflows,
+            rate=args.rate,
+            process=args.arrival,
+            duration=duration,
+            count=args.count,
+            timeout=args.timeout,
+            randomize_seeds=not args.keep_seeds,
+            seed=args.seed,
+        )
+    )
+    summary = summarize(samples, time.monotonic() - started)
+    print(format_summary(summary))
+    config = {
+        "hosts": hosts,
+        "workflows": [name for name, _ in workflows],
+        "rate": args.rate,
+        "arrival": args.arrival,
+        "duration": duration,
+        "count": args.count,
+        "timeout": args.timeout,
+        "randomize_seeds": not args.keep_seeds,
+        "seed": args.seed,
+    }
+    if args.json:
+        write_json(args.json, summary, samples, config)
+    if args.csv:
+        write_csv(args.csv, samples)
+    return 0
+
+
+__all__ = [
+    "PromptSample",
+    "load_workflows",
+    "arrival_offsets",
+    "reseed",
+    "run_loadtest",
+    "percentile",
+    "summarize",
+    "write_json",
+    "write_csv",
+]
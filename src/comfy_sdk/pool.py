@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .api import ComfyResponse
+from .client import AsyncComfyClient, ComfyClient
+from .instrumentation import Instrumentation
+from .journal import JobJournal, Reattachment
+from .resilience import CircuitBreaker
+from .transport import TransportConfig
+
+HostSpec = Union[str, Tuple[str, int]]
+
+logger = logging.getLogger(__name__)
+
+_MAX_OWNERS = 65536
+
+
+def _parse_host(spec: HostSpec) -> Tuple[str, int]:
+    if isinstance(spec, tuple):
+        return spec[0], int(spec[1])
+    host, _, port = spec.rpartition(":")
+    if not host:
+        return spec, 8188
+    return host, int(port)
+
+
+def _vram_free(stats: Dict[str, Any]) -> int:
+    return sum(device.get("vram_free", 0) for device in stats.get("devices", []))
+
+
+def _remember(owners: "OrderedDict[str, Any]", prompt_id: str, client: Any, limit: int) -> None:
+    # Least recently used first; prompts older than the newest ``limit`` are forgotten.
+    owners[prompt_id] = client
+    owners.move_to_end(prompt_id)
+    while len(owners) > limit:
+        owners.popitem(last=False)
+
+
+def _merge_reattachments(
+    owners: "OrderedDict[str, Any]", parts: List[Tuple[Any, Reattachment]], limit: int
+) -> Reattachment:
+    merged = Reattachment()
+    for client, part in parts:
+        for prompt_id in [*part.finished, *part.pending]:
+            _remember(owners, prompt_id, client, limit)
+        merged.finished.update(part.finished)
+        merged.pending.extend(part.pending)
+        merged.lost.extend(part.lost)
+    return merged
+
+
+class _NodeLoad:
+    def __init__(self):
+        self.vram_free = 0
+        self.stats_at = float("-inf")
+        # The background WebSocket connect: a thread for ComfyPool, a task for AsyncComfyPool.
+        self.connecting: Union[threading.Thread, "asyncio.Task[None]", None] = None
+
+
+class ComfyPool:
+    """Fan prompts out across several ComfyUI hosts.
+
+    Each ``queue_prompt`` goes to the node with the shortest queue, preferring
+    the one with the most free VRAM on ties. The pool remembers which node owns
+    each prompt (the most recent ``max_owners``) so follow-up calls reach the
+    right host. With
+    ``circuit_breaker`` every node gets its own `CircuitBreaker`, and nodes
+    whose breaker is open are skipped without a request. A ``transport_config``
+    with ``share_pool`` lets all nodes share one connection pool (it belongs
+    to the config: `close` leaves it open, so close the config once every
+    client using it is done), and one
+    ``instrumentation`` (e.g. a `MetricsCollector`) observes every node. A
+    ``journal`` records submissions on every node so `reattach` can recover
+    them after a restart.
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[HostSpec],
+        stats_ttl: float = 5.0,
+        circuit_breaker: bool = True,
+        transport_config: Optional[TransportConfig] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        journal: Optional[JobJournal] = None,
+        max_owners: int = _MAX_OWNERS,
+    ):
+        self.clients: List[ComfyClient] = [
+            ComfyClient(
+                host=host,
+                port=port,
+                breaker=CircuitBreaker() if circuit_breaker else None,
+                transport_config=transport_config,
+                instrumentation=instrumentation,
+                journal=journal,
+            )
+            for host, port in map(_parse_host, hosts)
+        ]
+        if not self.clients:
+            raise ValueError("ComfyPool needs at least one host")
+        self.stats_ttl = stats_ttl
+        self._load = {client: _NodeLoad() for client in self.clients}
+        self.max_owners = max_owners
+        self._owners: "OrderedDict[str, ComfyClient]" = OrderedDict()
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.close()
+
+    def client_for(self, prompt_id: str) -> ComfyClient:
+        try:
+            client = self._owners[prompt_id]
+        except KeyError:
+            raise KeyError(f"Unknown prompt_id {prompt_id!r}; it was not queued through this pool") from None
+        self._owners.move_to_end(prompt_id)
+        return client
+
+    def _queue_depth(self, client: ComfyClient) -> int:
+        # Kept live by the node's WebSocket status events once the dispatcher runs. Until then
+        # poll /prompt (short status timeout) and connect in the background, so one slow or
+        # dead node never stalls selection on a blocking WebSocket handshake.
+        dispatcher = client._dispatcher
+        if not dispatcher.running:
+            self._connect_later(client)
+            return client._queue_remaining()
+        if dispatcher.queue_remaining is None:
+            dispatcher.observe_queue(client._queue_remaining())
+        return dispatcher.queue_remaining
+
+    def _connect_later(self, client: ComfyClient) -> None:
+        load = self._load[client]
+        if load.connecting is None or not load.connecting.is_alive():
+            load.connecting = threading.Thread(
+                target=self._connect, args=(client,), name="comfy-sdk-pool-connect", daemon=True
+            )
+            load.connecting.start()
+
+    @staticmethod
+    def _connect(client: ComfyClient) -> None:
+        try:
+            client._ensure_dispatcher()
+        except Exception:
+            logger.debug("WebSocket connect to %s failed", client.base_url, exc_info=True)
+
+    def _vram(self, client: ComfyClient) -> int:
+        load = self._load[client]
+        now = time.monotonic()
+        if now - load.stats_at >= self.stats_ttl:
+            load.vram_free = _vram_free(client.get_system_stats())
+            load.stats_at = now
+        return load.vram_free
+
+    def _score(self, client: ComfyClient) -> Tuple[int, int]:
+        return self._queue_depth(client), -self._vram(client)
+
+    def select(self) -> ComfyClient:
+        """Return the least-loaded node; nodes that fail to answer are skipped."""
+        best: Optional[Tuple[Tuple[int, int], int]] = None
+        for index, client in enumerate(self.clients):
+            if client.breaker is not None and client.breaker.is_open:
+                continue
+            try:
+                score = self._score(client)
+            except Exception:
+                continue
+            if best is None or score < best[0]:
+                best = (score, index)
+        if best is None:
+            raise ConnectionError("No ComfyUI host in the pool is reachable")
+        return self.clients[best[1]]
+
+    def queue_prompt(self, prompt: Dict[str, Any]) -> ComfyResponse:
+        client = self.select()
+        response = client.queue_prompt(prompt)
+        _remember(self._owners, response.prompt_id, client, self.max_owners)
+        return response
+
+    def reattach(self) -> Reattachment:
+        """Reattach every node to the journal; returned prompt ids are routed back to their node."""
+        parts = [(client, client.reattach()) for client in self.clients]
+        return _merge_reattachments(self._owners, parts, self.max_owners)
+
+    def wait_for_completion(self, prompt_id: str, timeout: int = 3600) -> Dict[str, Any]:
+        return self.client_for(prompt_id).wait_for_completion(prompt_id, timeout=timeout)
+
+    def wait_all(self, prompt_ids: Iterable[str], timeout: int = 3600) -> Dict[str, Dict[str, Any]]:
+        groups: Dict[ComfyClient, List[str]] = {}
+        for prompt_id in dict.fromkeys(prompt_ids):
+            groups.setdefault(self.client_for(prompt_id), []).append(prompt_id)
+        results: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=max(len(groups), 1)) as executor:
+            futures = [executor.submit(client.wait_all, ids, timeout) for client, ids in groups.items()]
+            for future in futures:
+                results.update(future.result())
+        return results
+
+    def cancel(self, prompt_id: str) -> bool:
+        return self.client_for(prompt_id).cancel(prompt_id)
+
+    def get_history(self, prompt_id: str) -> Dict[str, Any]:
+        return self.client_for(prompt_id).get_history(prompt_id)
+
+    def get_images(
+        self,
+        prompt_id: str,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+    ) -> bytes:
+        return self.client_for(prompt_id).get_images(filename, subfolder, folder_type)
+
+
+class AsyncComfyPool:
+    """asyncio twin of `ComfyPool` built on `AsyncComfyClient`."""
+
+    def __init__(
+        self,
+        hosts: Iterable[HostSpec],
+        stats_ttl: float = 5.0,
+        circuit_breaker: bool = True,
+        transport_config: Optional[TransportConfig] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        journal: Optional[JobJournal] = None,
+        max_owners: int = _MAX_OWNERS,
+    ):
+        self.clients: List[AsyncComfyClient] = [
+            AsyncComfyClient(
+                host=host,
+                port=port,
+                breaker=CircuitBreaker() if circuit_breaker else None,
+                transport_config=transport_config,
+                instrumentation=instrumentation,
+                journal=journal,
+            )
+            for host, port in map(_parse_host, hosts)
+        ]
+        if not self.clients:
+            raise ValueError("AsyncComfyPool needs at least one host")
+        self.stats_ttl = stats_ttl
+        self._load = {client: _NodeLoad() for client in self.clients}
+        self.max_owners = max_owners
+        self._owners: "OrderedDict[str, AsyncComfyClient]" = OrderedDict()
+
+    async def close(self) -> None:
+        for load in self._load.values():
+            if load.connecting is not None:
+                load.connecting.cancel()
+        await asyncio.gather(*(client.close() for client in self.clients))
+
+    def client_for(self, prompt_id: str) -> AsyncComfyClient:
+        try:
+            client = self._owners[prompt_id]
+        except KeyError:
+            raise KeyError(f"Unknown prompt_id {prompt_id!r}; it was not queued through this pool") from None
+        self._owners.move_to_end(prompt_id)
+        return client
+
+    async def _queue_depth(self, client: AsyncComfyClient) -> int:
+        # See `ComfyPool._queue_depth`.
+        dispatcher = client._dispatcher
+        if not dispatcher.running:
+            self._connect_later(client)
+            return await client._queue_remaining()
+        if dispatcher.queue_remaining is None:
+            dispatcher.observe_queue(await client._queue_remaining())
+        return dispatcher.queue_remaining
+
+    def _connect_later(self, client: AsyncComfyClient) -> None:
+        load = self._load[client]
+        if load.connecting is None or load.connecting.done():
+            load.connecting = asyncio.create_task(self._connect(client), name="comfy-sdk-pool-connect")
+
+    @staticmethod
+    async def _connect(client: AsyncComfyClient) -> None:
+        try:
+            await client._ensure_dispatcher()
+        except Exception:
+            logger.debug("WebSocket connect to %s failed", client.base_url, exc_info=True)
+
+    async def _vram(self, client: AsyncComfyClient) -> int:
+        load = self._load[client]
+        now = time.monotonic()
+        if now - load.stats_at >= self.stats_ttl:
+            load.vram_free = _vram_free(await client.get_system_stats())
+            load.stats_at = now
+        return load.vram_free
+
+    async def _score(self, client: AsyncComfyClient) -> Tuple[int, int]:
+        depth, vram = await asyncio.gather(self._queue_depth(client), self._vram(client))
+        return depth, -vram
+
+    async def select(self) -> AsyncComfyClient:
+        """Return the least-loaded node; nodes that fail to answer are skipped."""
+        healthy = [index for index, client in enumerate(self.clients) if client.breaker is None or not client.breaker.is_open]
+        scores = await asyncio.gather(*(self._score(self.clients[index]) for index in healthy), return_exceptions=True)
+        ranked = [(score, index) for index, score in zip(healthy, scores) if not isinstance(score, BaseException)]
+        if not ranked:
+            raise ConnectionError("No ComfyUI host in the pool is reachable")
+        return self.clients[min(ranked)[1]]
+
+    async def queue_prompt(self, prompt: Dict[str, Any]) -> ComfyResponse:
+        client = await self.select()
+        response = await client.queue_prompt(prompt)
+        _remember(self._owners, response.prompt_id, client, self.max_owners)
+        return response
+
+    async def reattach(self) -> Reattachment:
+        """Reattach every node to the journal; returned prompt ids are routed back to their node."""
+        parts = await asyncio.gather(*(client.reattach() for client in self.clients))
+        return _merge_reattachments(self._owners, list(zip(self.clients, parts)), self.max_owners)
+
+    async def wait_for_completion(self, prompt_id: str, timeout: int = 3600) -> Dict[str, Any]:
+        return await self.client_for(prompt_id).wait_for_completion(prompt_id, timeout=timeout)
+
+    async def wait_all(self, prompt_ids: Iterable[str], timeout: int = 3600) -> Dict[str, Dict[str, Any]]:
+        groups: Dict[AsyncComfyClient, List[str]] = {}
+        for prompt_id in dict.fromkeys(prompt_ids):
+            groups.setdefault(self.client_for(prompt_id), []).append(prompt_id)
+        results: Dict[str, Dict[str, Any]] = {}
+        for partial in await asyncio.gather(*(client.wait_all(ids, timeout) for client, ids in groups.items())):
+            results.update(partial)
+        return results
+
+    async def cancel(self, prompt_id: str) -> bool:
+        return await self.client_for(prompt_id).cancel(prompt_id)
+
+    async def get_history(self, prompt_id: str) -> Dict[str, Any]:
+        return await self.client_for(prompt_id).get_history(prompt_id)
+
+    async def get_images(
+        self,
+        prompt_id: str,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+    ) -> bytes:
+        return await self.client_for(prompt_id).get_images(filename, subfolder, folder_type)
+
+
+__all__ = ["ComfyPool", "AsyncComfyPool"]
@@ -0,0 +1,288 @@
+import asyncio
+import random
+import threading
+import time
+from typing import FrozenSet, Iterable, Optional
+
+import httpx
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class CircuitOpenError(httpx.ConnectError):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Jittered exponential backoff: attempt ``n`` sleeps ``uniform(0, min(max_backoff, backoff * 2**n))``.
+
+    Only ``methods`` are retried by the transport, on transport errors and
+    ``statuses``; ``/prompt`` submissions get their own duplicate-safe retry.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.2,
+        max_backoff: float = 5.0,
+        statuses: Iterable[int] = RETRY_STATUSES,
+        methods: Iterable[str] = IDEMPOTENT_METHODS,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses: FrozenSet[int] = frozenset(statuses)
+        self.methods: FrozenSet[str] = frozenset(method.upper() for method in methods)
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def retryable(self, request: httpx.Request) -> bool:
+        return request.method in self.methods
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after ``failure_threshold`` consecutive failures.
+
+    While open every request fails fast with `CircuitOpenError`. After
+    ``reset_timeout`` seconds a single trial request is let through; its
+    outcome closes the breaker or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests would currently be rejected (open, or a trial request is in flight)."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            return self._trial or time.monotonic() - self._opened_at < self.reset_timeout
+
+    def before_request(self, url: httpx.URL) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit open for {url.host}:{url.port}; failing fast")
+            self._trial = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def record_abandoned(self) -> None:
+        """A request ended without an outcome (cancelled, local pool exhausted, or failed outside the transport).
+
+        It says nothing about the host, so only a trial request counts it: the
+        breaker re-opens rather than staying half-open forever.
+        """
+        with self._lock:
+            if self._trial:
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class _SubmitAttempts:
+    """Retry bookkeeping for a duplicate-safe ``POST /prompt``; the clients do the I/O.
+
+    After a retryable status, or a transport error other than a refused
+    connection, the server may have queued the prompt, so the attempt is
+    ``unsure`` and the client checks for the prompt id before posting again.
+    """
+
+    def __init__(self, retry: RetryPolicy):
+        self.retry = retry
+        self.attempt = 0
+        self.unsure = False
+        self.error: Optional[httpx.TransportError] = None
+        self.response: Optional[httpx.Response] = None
+
+    def posted(self, response: httpx.Response) -> bool:
+        """Record a response; ``True`` when it is final."""
+        self.response, self.error = response, None
+        if response.status_code not in self.retry.statuses:
+            return True
+        self.unsure = True
+        return False
+
+    def failed(self, error: httpx.TransportError) -> None:
+        # A refused connection never reached the server; anything later might have.
+        self.error, self.unsure = error, not isinstance(error, httpx.ConnectError)
+
+    def backoff(self) -> Optional[float]:
+        """Delay before the next attempt, or ``None`` once retries are used up."""
+        if self.attempt >= self.retry.retries:
+            return None
+        delay = self.retry.delay(self.attempt)
+        self.attempt += 1
+        return delay
+
+    @property
+    def rejected(self) -> bool:
+        """Whether the prompt definitely did not get queued."""
+        if self.unsure:
+            return False
+        return self.error is not None or self.response is None or self.response.is_error
+
+    def result(self) -> httpx.Response:
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Wrap a transport with `RetryPolicy` retries and `CircuitBreaker` accounting.
+
+    A shared or caller-provided ``transport`` is left open unless ``owns_transport``.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.BaseTransport] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        owns_transport: bool = True,
+    ):
+        self.transport = transport if transport is not None else httpx.HTTPTransport()
+        self.retry = retry
+        self.breaker = breaker
+        self.owns_transport = owns_transport
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        if self.breaker is None:
+            return self.transport.handle_request(request)
+        self.breaker.before_request(request.url)
+        try:
+            response = self.transport.handle_request(request)
+        except httpx.PoolTimeout:
+            # Our own connection pool ran dry; the host was never reached.
+            self.breaker.record_abandoned()
+            raise
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+        if response.status_code in (self.retry.statuses if self.retry is not None else RETRY_STATUSES):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        retry = self.retry
+        if retry is None or not retry.retryable(request):
+            return self._send(request)
+        attempt = 0
+        while True:
+            try:
+                response = self._send(request)
+            except CircuitOpenError:
+                raise
+            except httpx.TransportError:
+                if attempt >= retry.retries:
+                    raise
+                time.sleep(retry.delay(attempt))
+            else:
+                if response.status_code not in retry.statuses or attempt >= retry.retries:
+                    return response
+                response.close()
+                time.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    def close(self) -> None:
+        if self.owns_transport:
+            self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """asyncio twin of `RetryTransport`."""
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        owns_transport: bool = True,
+    ):
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+        self.retry = retry
+        self.breaker = breaker
+        self.owns_transport = owns_transport
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        if self.breaker is None:
+            return await self.transport.handle_async_request(request)
+        self.breaker.before_request(request.url)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.PoolTimeout:
+            # See `RetryTransport._send`.
+            self.breaker.record_abandoned()
+            raise
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+        if response.status_code in (self.retry.statuses if self.retry is not None else RETRY_STATUSES):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retry = self.retry
+        if retry is None or not retry.retryable(request):
+            return await self._send(request)
+        attempt = 0
+        while True:
+            try:
+                response = await self._send(request)
+            except CircuitOpenError:
+                raise
+            except httpx.TransportError:
+                if attempt >= retry.retries:
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+            else:
+                if response.status_code not in retry.statuses or attempt >= retry.retries:
+                    return response
+                await response.aclose()
+                await asyncio.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        if self.owns_transport:
+            await self.transport.aclose()
+
+
+__all__ = [
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RetryTransport",
+    "AsyncRetryTransport",
+]
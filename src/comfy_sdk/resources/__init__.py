@@ -1,9 +1,29 @@
-from .prompt import Prompt
-from .images import Images
-from .system import System
-from .queue import Queue
-from .models import Models
-from .templates import Templates
-from .user import Users, Userdata
+import importlib
+from typing import Any, List
+
+_LAZY = {
+    "Prompt": ".prompt",
+    "Images": ".images",
+    "System": ".system",
+    "Queue": ".queue",
+    "Models": ".models",
+    "Templates": ".templates",
+    "Users": ".user",
+    "Userdata": ".user",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | _LAZY.keys())
+
 
 __all__ = ["Prompt", "Images", "System", "Queue", "Models", "Templates", "Users", "Userdata"]
@@ -1,17 +1,37 @@
-from ..client import ComfyClient
+from ..client import DEFAULT_CHUNK_SIZE, ComfyClient
 
 class Images:
     def __init__(self, client: ComfyClient):
         self._client = client
 
-    def upload(self, data: bytes, name: str, overwrite: bool = False):
+    def upload(self, data, name: str, overwrite: bool = False):
+        """Upload an image from bytes, a memoryview, a file path or a binary file object."""
         return self._client.upload_image(data, name, overwrite)
 
     def download(self, filename: str, subfolder: str = "", folder_type: str = "output"):
         return self._client.get_images(filename, subfolder, folder_type)
 
-    def upload_mask(self, data: bytes, name: str, original_ref: dict, overwrite: bool = False, mask_type: str = "mask"):
+    def iter(self, filename: str, subfolder: str = "", folder_type: str = "output", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Stream an output file chunk by chunk."""
+        return self._client.iter_image(filename, subfolder, folder_type, chunk_size)
+
+    def download_to(
+        self,
+        path,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> int:
+        """Stream an output file straight to disk (temp file, then rename)."""
+        return self._client.download_to(path, filename, subfolder, folder_type, chunk_size)
+
+    def upload_mask(self, data, name: str, original_ref: dict, overwrite: bool = False, mask_type: str = "mask"):
         return self._client.upload_mask(data, name, original_ref, overwrite, mask_type)
 
     def metadata(self, filename: str, subfolder: str = "", folder_type: str = "output"):
         return self._client.get_view_metadata(filename, subfolder, folder_type)
+
+    def previews(self, prompt_id=None, max_fps=None, timeout=None):
+        """Iterate live preview frames until the prompt completes."""
+        return self._client.previews(prompt_id, max_fps, timeout)
@@ -7,16 +7,44 @@ class Prompt:
     def send(self, workflow: dict):
         return self._client.queue_prompt(workflow)
 
+    def validate(self, workflow: dict):
+        """Check a workflow against cached object_info without submitting it."""
+        return self._client.validate_workflow(workflow)
+
+    def send_many(self, workflows, max_in_flight: int = 8, queue_depth: int = None):
+        """Submit workflows with queue-depth backpressure, yielding results as they finish."""
+        return self._client.submit_many(workflows, max_in_flight=max_in_flight, queue_depth=queue_depth)
+
+    def run(self, workflow: dict):
+        """Queue a workflow and wait for its result, reusing the client's result cache."""
+        return self._client.execute(workflow)
+
     def retrieve(self, prompt_id: str):
         return self._client.get_history(prompt_id)
     
     def wait(self, prompt_id: str):
         return self._client.wait_for_completion(prompt_id)
 
+    def events(self, prompt_id: str = None, timeout: float = None):
+        """Iterate typed execution events (progress, executed, errors, ...) of a prompt."""
+        return self._client.stream_events(prompt_id, timeout)
+
+    def wait_all(self, prompt_ids: list[str]) -> dict:
+        """Wait for several prompts over the shared WebSocket."""
+        return self._client.wait_all(prompt_ids)
+
+    def as_completed(self, prompt_ids: list[str]):
+        """Iterate ``(prompt_id, history)`` pairs as prompts finish."""
+        return self._client.as_completed(prompt_ids)
+
     def history(self) -> dict:
         """Get all history."""
         return self._client.get_all_history()
 
+    def sync(self, index):
+        """Add history entries not yet in ``index`` (a `HistoryIndex`) and return the new records."""
+        return self._client.sync_history(index)
+
     def delete(self, prompt_id: str):
         """Delete history for a prompt."""
         return self._client.delete_history(prompt_id)
@@ -8,6 +8,10 @@ class Queue:
         """Interrupt current execution."""
         return self._client.interrupt()
 
+    def cancel(self, prompt_id: str) -> bool:
+        """Cancel one prompt without touching anyone else's work."""
+        return self._client.cancel(prompt_id)
+
     def clear(self):
         """Clear the execution queue."""
         return self._client.clear_queue()
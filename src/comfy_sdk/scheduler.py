@@ -0,0 +1,341 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Hashable, Iterable, Mapping, Optional, Tuple, Union
+
+from .client import AsyncComfyClient, ComfyClient
+from .workflow import RenderedWorkflow
+
+Workflow = Union[Dict[str, Any], RenderedWorkflow]
+ModelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_LOADERS: Dict[str, Tuple[str, ...]] = {
+    "CheckpointLoaderSimple": ("ckpt_name",),
+    "CheckpointLoader": ("config_name", "ckpt_name"),
+    "ImageOnlyCheckpointLoader": ("ckpt_name",),
+    "unCLIPCheckpointLoader": ("ckpt_name",),
+    "LoraLoader": ("lora_name",),
+    "LoraLoaderModelOnly": ("lora_name",),
+    "UNETLoader": ("unet_name",),
+    "VAELoader": ("vae_name",),
+    "CLIPLoader": ("clip_name",),
+    "DualCLIPLoader": ("clip_name1", "clip_name2"),
+    "TripleCLIPLoader": ("clip_name1", "clip_name2", "clip_name3"),
+    "CLIPVisionLoader": ("clip_name",),
+    "ControlNetLoader": ("control_net_name",),
+    "UpscaleModelLoader": ("model_name",),
+}
+
+
+def model_key(workflow: Workflow, loaders: Optional[Mapping[str, Iterable[str]]] = None) -> ModelKey:
+    """The set of model files a workflow loads, as a sorted tuple of ``(class_type, filename)``.
+
+    Known loader nodes use ``loaders`` (`DEFAULT_LOADERS` by default); any
+    other ``*Loader*`` class contributes its string ``*_name`` inputs.
+    """
+    if isinstance(workflow, RenderedWorkflow):
+        workflow = workflow.to_dict()
+    loaders = DEFAULT_LOADERS if loaders is None else loaders
+    models = set()
+    for node in workflow.values():
+        if not isinstance(node, dict):
+            continue
+        class_type = node.get("class_type", "")
+        inputs = node.get("inputs") or {}
+        names = loaders.get(class_type)
+        if names is None:
+            if "Loader" not in class_type:
+                continue
+            names = [name for name in inputs if name.endswith("_name")]
+        for name in names:
+            value = inputs.get(name)
+            if isinstance(value, str):
+                models.add((class_type, value))
+    return tuple(sorted(models))
+
+
+class _AffinityQueue:
+    """Pending workflows grouped by model key, oldest group first."""
+
+    def __init__(self, max_delay: float, min_batch: int = 1):
+        self.max_delay = max_delay
+        self.min_batch = min_batch
+        self.groups: "OrderedDict[Hashable, Deque[Tuple[float, Workflow, Any]]]" = OrderedDict()
+        self._last: Optional[Hashable] = None
+        self._served = 0
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.groups.values())
+
+    def push(self, key: Hashable, workflow: Workflow, future: Any) -> None:
+        self.groups.setdefault(key, deque()).append((time.monotonic(), workflow, future))
+
+    def select(self, current: Optional[Hashable]) -> Hashable:
+        # Stay on the loaded models unless another group's oldest item has waited too long.
+        # A group just switched to keeps at least ``min_batch`` pops, so a backlog of
+        # overdue groups is served in batches instead of alternating on every prompt.
+        if current in self.groups and current == self._last and self._served < self.min_batch:
+            return current
+        overdue = time.monotonic() - self.max_delay
+        oldest = min(self.groups, key=lambda key: self.groups[key][0][0])
+        if current in self.groups and self.groups[oldest][0][0] > overdue:
+            return current
+        return oldest
+
+    def pop(self, key: Hashable) -> Tuple[Workflow, Any]:
+        items = self.groups[key]
+        _, workflow, future = items.popleft()
+        if not items:
+            del self.groups[key]
+        self._served = self._served + 1 if key == self._last else 1
+        self._last = key
+        return workflow, future
+
+    def next_deadline(self, current: Optional[Hashable]) -> Optional[float]:
+        heads = [items[0][0] for key, items in self.groups.items() if key != current]
+        return min(heads) + self.max_delay if heads else None
+
+    def drain(self) -> Iterable[Any]:
+        futures = [future for items in self.groups.values() for _, _, future in items]
+        self.groups.clear()
+        return futures
+
+
+class AffinityScheduler:
+    """Reorder submissions so prompts sharing checkpoints/LoRAs run back to back.
+
+    Work is held client-side and released to the server at most
+    ``max_in_flight`` prompts at a time, continuing with the currently loaded
+    model set while it has work. Another group is served once its oldest item
+    has waited ``max_delay`` seconds, or when the current group runs dry; after
+    a switch the new group keeps the server for at least ``min_batch`` prompts
+    (while it has them), so an overloaded scheduler does not reload models on
+    every prompt. Before a switch the scheduler lets the old group drain to its
+    last running prompt and, with ``free_on_switch``, asks the server to unload
+    models.
+    """
+
+    def __init__(
+        self,
+        client: ComfyClient,
+        max_in_flight: int = 2,
+        max_delay: float = 30.0,
+        free_on_switch: bool = True,
+        loaders: Optional[Mapping[str, Iterable[str]]] = None,
+        min_batch: int = 4,
+    ):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.free_on_switch = free_on_switch
+        self.loaders = loaders
+        self._queue = _AffinityQueue(max_delay, min_batch)
+        self._current: Optional[Hashable] = None
+        self._inflight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "AffinityScheduler":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def submit(self, workflow: Workflow) -> Future:
+        """Schedule ``workflow``; the future resolves to its `ComfyResponse` once it is queued."""
+        future: Future = Future()
+        key = model_key(workflow, self.loaders)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AffinityScheduler is closed")
+            self._queue.push(key, workflow, future)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="comfy-sdk-affinity", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting work; with ``wait`` release everything pending first, otherwise cancel it."""
+        with self._cond:
+            self._closed = True
+            if not wait:
+                for future in self._queue.drain():
+                    future.cancel()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and wait:
+            thread.join()
+
+    def _finished(self, _future: Any) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    def _next(self) -> Optional[Tuple[Hashable, Workflow, Future, bool]]:
+        with self._cond:
+            while True:
+                if not len(self._queue):
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                    continue
+                key = self._queue.select(self._current)
+                switching = self._current is not None and key != self._current
+                # Before a switch only the old group's running prompt may remain; /free is applied after it.
+                limit = min(2, self.max_in_flight) if switching else self.max_in_flight
+                if self._inflight < limit:
+                    workflow, future = self._queue.pop(key)
+                    self._current = key
+                    self._inflight += 1
+                    return key, workflow, future, switching
+                deadline = self._queue.next_deadline(self._current)
+                self._cond.wait(None if deadline is None else max(deadline - time.monotonic(), 0.01))
+
+    def _fail(self, exc: BaseException) -> None:
+        # Without a dispatcher nothing can be tracked; fail what is waiting and let the next submit retry.
+        with self._cond:
+            futures = self._queue.drain()
+            self._thread = None
+        for future in futures:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(exc)
+
+    def _run(self) -> None:
+        try:
+            dispatcher = self.client._ensure_dispatcher()
+        except Exception as exc:
+            self._fail(exc)
+            return
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            _, workflow, future, switching = item
+            if not future.set_running_or_notify_cancel():
+                self._finished(None)
+                continue
+            try:
+                if switching and self.free_on_switch:
+                    self.client.free(unload_models=True)
+                response = self.client.queue_prompt(workflow)
+            except Exception as exc:
+                self._finished(None)
+                future.set_exception(exc)
+                continue
+            dispatcher.register(response.prompt_id).add_done_callback(self._finished)
+            future.set_result(response)
+
+
+class AsyncAffinityScheduler:
+    """asyncio twin of `AffinityScheduler`; ``submit`` returns an awaitable future."""
+
+    def __init__(
+        self,
+        client: AsyncComfyClient,
+        max_in_flight: int = 2,
+        max_delay: float = 30.0,
+        free_on_switch: bool = True,
+        loaders: Optional[Mapping[str, Iterable[str]]] = None,
+        min_batch: int = 4,
+    ):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.free_on_switch = free_on_switch
+        self.loaders = loaders
+        self._queue = _AffinityQueue(max_delay, min_batch)
+        self._current: Optional[Hashable] = None
+        self._inflight = 0
+        self._closed = False
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "AsyncAffinityScheduler":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def submit(self, workflow: Workflow) -> asyncio.Future:
+        if self._closed:
+            raise RuntimeError("AsyncAffinityScheduler is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.push(model_key(workflow, self.loaders), workflow, future)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="comfy-sdk-affinity")
+        self._changed.set()
+        return future
+
+    async def close(self, wait: bool = True) -> None:
+        self._closed = True
+        if not wait:
+            for future in self._queue.drain():
+                future.cancel()
+        self._changed.set()
+        if self._task is not None and wait:
+            await self._task
+
+    def _finished(self, future: Optional[asyncio.Future]) -> None:
+        if future is not None and not future.cancelled():
+            future.exception()  # Completion only matters as a signal; don't warn about dispatcher shutdown.
+        self._inflight -= 1
+        self._changed.set()
+
+    async def _next(self) -> Optional[Tuple[Hashable, Workflow, asyncio.Future, bool]]:
+        while True:
+            self._changed.clear()
+            if len(self._queue):
+                key = self._queue.select(self._current)
+                switching = self._current is not None and key != self._current
+                if self._inflight < (min(2, self.max_in_flight) if switching else self.max_in_flight):
+                    workflow, future = self._queue.pop(key)
+                    self._current = key
+                    self._inflight += 1
+                    return key, workflow, future, switching
+                deadline = self._queue.next_deadline(self._current)
+            elif self._closed:
+                return None
+            else:
+                deadline = None
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.01)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except TimeoutError:
+                pass
+
+    def _fail(self, exc: BaseException) -> None:
+        futures = self._queue.drain()
+        self._task = None
+        for future in futures:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _run(self) -> None:
+        try:
+            dispatcher = await self.client._ensure_dispatcher()
+        except Exception as exc:
+            self._fail(exc)
+            return
+        while True:
+            item = await self._next()
+            if item is None:
+                return
+            _, workflow, future, switching = item
+            if future.cancelled():
+                self._finished(None)
+                continue
+            try:
+                if switching and self.free_on_switch:
+                    await self.client.free(unload_models=True)
+                response = await self.client.queue_prompt(workflow)
+            except Exception as exc:
+                self._finished(None)
+                future.set_exception(exc)
+                continue
+            dispatcher.register(response.prompt_id).add_done_callback(self._finished)
+            future.set_result(response)
+
+
+__all__ = ["AffinityScheduler", "AsyncAffinityScheduler", "model_key", "DEFAULT_LOADERS"]
@@ -0,0 +1,582 @@
+import argparse
+import asyncio
+import json
+import re
+import struct
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import h11
+from websockets.protocol import State
+from websockets.server import ServerProtocol
+
+_READ_SIZE = 256 * 1024
+_MAX_HISTORY = 10000
+_UPLOAD_NAME = re.compile(rb'name="image"; filename="([^"]*)"')
+
+QueueItem = Tuple[int, str, Dict[str, Any], str]
+
+_BASE_OBJECT_INFO: Dict[str, Any] = {
+    "CheckpointLoaderSimple": {
+        "input": {"required": {"ckpt_name": [["model.safetensors"]]}},
+        "output": ["MODEL", "CLIP", "VAE"],
+    },
+    "CLIPTextEncode": {
+        "input": {"required": {"text": ["STRING", {"multiline": True}], "clip": ["CLIP"]}},
+        "output": ["CONDITIONING"],
+    },
+    "EmptyLatentImage": {
+        "input": {
+            "required": {
+                "width": ["INT", {"default": 512, "min": 16, "max": 16384}],
+                "height": ["INT", {"default": 512, "min": 16, "max": 16384}],
+                "batch_size": ["INT", {"default": 1, "min": 1, "max": 4096}],
+            }
+        },
+        "output": ["LATENT"],
+    },
+    "KSampler": {
+        "input": {
+            "required": {
+                "model": ["MODEL"],
+                "seed": ["INT", {"default": 0, "min": 0, "max": 0xFFFFFFFFFFFFFFFF}],
+                "steps": ["INT", {"default": 20, "min": 1, "max": 10000}],
+                "cfg": ["FLOAT", {"default": 8.0, "min": 0.0, "max": 100.0}],
+                "sampler_name": [["euler", "euler_ancestral", "dpmpp_2m"]],
+                "scheduler": [["normal", "karras"]],
+                "positive": ["CONDITIONING"],
+                "negative": ["CONDITIONING"],
+                "latent_image": ["LATENT"],
+                "denoise": ["FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0}],
+            }
+        },
+        "output": ["LATENT"],
+    },
+    "VAEDecode": {"input": {"required": {"samples": ["LATENT"], "vae": ["VAE"]}}, "output": ["IMAGE"]},
+    "SaveImage": {
+        "input": {"required": {"images": ["IMAGE"], "filename_prefix": ["STRING", {"default": "ComfyUI"}]}},
+        "output": [],
+        "output_node": True,
+    },
+    "LoadImage": {"input": {"required": {"image": [[]]}}, "output": ["IMAGE", "MASK"]},
+}
+
+
+def _pattern(size: int) -> bytes:
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+class _Socket:
+    __slots__ = ("protocol", "writer")
+
+    def __init__(self, protocol: ServerProtocol, writer: asyncio.StreamWriter):
+        self.protocol = protocol
+        self.writer = writer
+
+    def flush(self) -> None:
+        for chunk in self.protocol.data_to_send():
+            if chunk:
+                self.writer.write(chunk)
+
+
+class FakeComfyServer:
+    """A stand-in ComfyUI server for tests and benchmarks; no GPU or ComfyUI install needed.
+
+    Serves ``/prompt``, ``/queue``, ``/history``, ``/view``, ``/upload/image``,
+    ``/object_info``, ``/system_stats``, ``/interrupt``, ``/free`` and ``/ws``
+    on one port. Prompts run one at a time: every node gets an ``executing``
+    event, ``progress_steps`` ``progress`` events, ``previews`` binary preview
+    frames of ``preview_size`` bytes and an ``executed`` event, spending
+    ``exec_time`` seconds per prompt in total. The last node outputs
+    ``images_per_prompt`` images of ``image_size`` bytes. ``latency`` delays
+    every HTTP response and ``object_info_nodes`` pads ``/object_info`` with
+    synthetic classes. While ``paused`` the queue only fills up.
+
+    `start` (or ``with``) runs the server on a background event-loop thread,
+    ``async with`` on the current loop; ``port=0`` picks a free port, read it
+    back from ``port``. ``python -m comfy_sdk.testing`` starts a standalone one.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        exec_time: float = 0.0,
+        progress_steps: int = 1,
+        previews: int = 0,
+        preview_size: int = 16 * 1024,
+        images_per_prompt: int = 1,
+        image_size: int = 64 * 1024,
+        object_info_nodes: int = 0,
+        paused: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.exec_time = exec_time
+        self.progress_steps = progress_steps
+        self.previews = previews
+        self.images_per_prompt = images_per_prompt
+        self.paused = paused
+        self.queue: Deque[QueueItem] = deque()
+        self.running: Optional[QueueItem] = None
+        self.history: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.uploads: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "prompts": 0,
+            "completed": 0,
+            "ws_messages": 0,
+            "bytes_uploaded": 0,
+            "bytes_downloaded": 0,
+        }
+        self._image = _pattern(image_size)
+        self._preview = struct.pack(">II", 1, 2) + _pattern(preview_size)
+        object_info = dict(_BASE_OBJECT_INFO)
+        for index in range(object_info_nodes):
+            object_info[f"FakeNode{index}"] = {
+                "input": {"required": {f"value_{slot}": ["INT", {"default": 0, "min": 0, "max": 100}] for slot in range(8)}},
+                "output": ["INT"],
+                "category": "fake",
+                "description": "Synthetic node class that pads /object_info.",
+            }
+        self._object_info = object_info
+        self._object_info_json = json.dumps(object_info).encode()
+        self._number = 0
+        self._interrupt: Optional[str] = None
+        self._sockets: Dict[str, Set[_Socket]] = {}
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "FakeComfyServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    async def __aenter__(self) -> "FakeComfyServer":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def open(self) -> None:
+        """Bind and start executing prompts on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._worker = asyncio.create_task(self._execute_loop(), name="comfy-fake-worker")
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start(self) -> "FakeComfyServer":
+        """Run the server on a daemon thread with its own event loop; returns once it accepts connections."""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.open())
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.aclose())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="comfy-fake-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # -- HTTP ----------------------------------------------------------------
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        conn = h11.Connection(h11.SERVER)
+        try:
+            while True:
+                request, body = await self._read_request(conn, reader)
+                if request is None:
+                    return
+                self.stats["requests"] += 1
+                path, _, query = request.target.decode().partition("?")
+                if path == "/ws":
+                    await self._websocket(request, urllib.parse.parse_qs(query), reader, writer)
+                    return
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                method = request.method.decode()
+                status, payload, content_type = self._route(method, path, urllib.parse.parse_qs(query), body)
+                headers = [("Content-Type", content_type), ("Content-Length", str(len(payload)))]
+                writer.write(conn.send(h11.Response(status_code=status, headers=headers)))
+                if method != "HEAD":
+                    writer.writelines(conn.send_with_data_passthrough(h11.Data(data=payload)))
+                writer.write(conn.send(h11.EndOfMessage()))
+                await writer.drain()
+                if conn.our_state is h11.MUST_CLOSE:
+                    return
+                conn.start_next_cycle()
+        except (ConnectionError, h11.ProtocolError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_request(conn: h11.Connection, reader: asyncio.StreamReader) -> Tuple[Optional[h11.Request], bytes]:
+        request, body = None, bytearray()
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                conn.receive_data(await reader.read(_READ_SIZE))
+            elif isinstance(event, h11.Request):
+                request = event
+            elif isinstance(event, h11.Data):
+                body += event.data
+            elif isinstance(event, h11.EndOfMessage):
+                return request, bytes(body)
+            else:
+                return None, b""
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Tuple[int, bytes, str]:
+        if path == "/view":
+            return self._view(query)
+        if path == "/upload/image" and method == "POST":
+            return self._upload(body)
+        if path == "/object_info":
+            return 200, self._object_info_json, "application/json"
+        try:
+            data = json.loads(body) if body and method != "GET" else {}
+        except ValueError:
+            return 400, b"", "text/plain"
+        if path == "/prompt":
+            status, result = self._submit(data) if method == "POST" else (200, {"exec_info": self._exec_info()})
+        elif path.startswith("/object_info/"):
+            name = urllib.parse.unquote(path[len("/object_info/"):])
+            status, result = 200, {name: self._object_info[name]} if name in self._object_info else {}
+        elif path == "/queue":
+            status, result = self._queue(method, data)
+        elif path == "/history" or path.startswith("/history/"):
+            status, result = self._history(method, path[len("/history/"):], query, data)
+        elif path == "/interrupt" and method == "POST":
+            running = self.running[1] if self.running is not None else None
+            if running is not None and data.get("prompt_id") in (None, running):
+                self._interrupt = running
+            status, result = 200, {}
+        elif path == "/free" and method == "POST":
+            status, result = 200, {}
+        elif path == "/system_stats":
+            status, result = 200, self._system_stats()
+        else:
+            status, result = 404, {"error": f"{method} {path} is not served by the fake server"}
+        return status, json.dumps(result).encode(), "application/json"
+
+    def _exec_info(self) -> Dict[str, int]:
+        return {"queue_remaining": len(self.queue) + (self.running is not None)}
+
+    def _submit(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        prompt = data.get("prompt")
+        if not isinstance(prompt, dict) or not prompt:
+            error = {"type": "prompt_no_outputs", "message": "Prompt has no outputs", "details": "", "extra_info": {}}
+            return 400, {"error": error, "node_errors": {}}
+        prompt_id = data.get("prompt_id") or str(uuid.uuid4())
+        self._number += 1
+        self.queue.append((self._number, prompt_id, prompt, data.get("client_id") or ""))
+        self.stats["prompts"] += 1
+        self._wake.set()
+        self._broadcast_status()
+        return 200, {"prompt_id": prompt_id, "number": self._number, "node_errors": {}}
+
+    def _queue(self, method: str, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET":
+            running = [list(self.running)] if self.running is not None else []
+            return 200, {"queue_running": running, "queue_pending": [list(item) for item in self.queue]}
+        if method == "DELETE" or data.get("clear"):
+            self.queue.clear()
+        elif "delete" in data:
+            doomed = set(data["delete"])
+            self.queue = deque(item for item in self.queue if item[1] not in doomed)
+        self._broadcast_status()
+        return 200, {}
+
+    def _history(
+        self, method: str, prompt_id: str, query: Dict[str, List[str]], data: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET":
+            if prompt_id:
+                entry = self.history.get(prompt_id)
+                return 200, {prompt_id: entry} if entry is not None else {}
+            items = list(self.history.items())
+            max_items = int(query["max_items"][0]) if "max_items" in query else None
+            offset = int(query["offset"][0]) if "offset" in query else -1
+            if offset < 0:
+                offset = max(len(items) - max_items, 0) if max_items is not None else 0
+            end = None if max_items is None else offset + max_items
+            return 200, dict(items[offset:end])
+        if prompt_id:
+            self.history.pop(prompt_id, None)
+        elif method == "DELETE" or data.get("clear"):
+            self.history.clear()
+        else:
+            for doomed in data.get("delete", []):
+                self.history.pop(doomed, None)
+        return 200, {}
+
+    def _view(self, query: Dict[str, List[str]]) -> Tuple[int, bytes, str]:
+        filename = query.get("filename", [""])[0]
+        if query.get("type", ["output"])[0] == "input" and filename not in self.uploads:
+            return 404, b"", "text/plain"
+        self.stats["bytes_downloaded"] += len(self._image)
+        return 200, self._image, "image/png"
+
+    def _upload(self, body: bytes) -> Tuple[int, bytes, str]:
+        match = _UPLOAD_NAME.search(body)
+        if match is None:
+            return 400, b"", "text/plain"
+        name = match.group(1).decode()
+        self.uploads[name] = len(body)
+        self.stats["bytes_uploaded"] += len(body)
+        return 200, json.dumps({"name": name, "subfolder": "", "type": "input"}).encode(), "application/json"
+
+    @staticmethod
+    def _system_stats() -> Dict[str, Any]:
+        return {
+            "system": {"os": "fake", "comfyui_version": "fake", "python_version": "", "embedded_python": False},
+            "devices": [
+                {
+                    "name": "fake:0",
+                    "type": "cpu",
+                    "index": 0,
+                    "vram_total": 24 << 30,
+                    "vram_free": 20 << 30,
+                    "torch_vram_total": 0,
+                    "torch_vram_free": 0,
+                }
+            ],
+        }
+
+    # -- WebSocket -----------------------------------------------------------
+
+    async def _websocket(
+        self, request: h11.Request, query: Dict[str, List[str]], reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        protocol = ServerProtocol(max_size=None)
+        # h11 already consumed the handshake; replay it so the protocol's parser moves on to frames.
+        lines = [b"GET " + request.target + b" HTTP/1.1"] + [name + b": " + value for name, value in request.headers]
+        protocol.receive_data(b"\r\n".join(lines) + b"\r\n\r\n")
+        (handshake,) = protocol.events_received()
+        response = protocol.accept(handshake)
+        protocol.send_response(response)
+        socket = _Socket(protocol, writer)
+        socket.flush()
+        if response.status_code != 101:
+            return
+        client_id = query.get("clientId", [""])[0] or uuid.uuid4().hex
+        self._sockets.setdefault(client_id, set()).add(socket)
+        try:
+            self._send(socket, {"type": "status", "data": {"status": {"exec_info": self._exec_info()}, "sid": client_id}})
+            await writer.drain()
+            while protocol.state is not State.CLOSED:
+                data = await reader.read(_READ_SIZE)
+                if data:
+                    protocol.receive_data(data)
+                else:
+                    protocol.receive_eof()
+                protocol.events_received()
+                socket.flush()
+                # After the closing handshake the server drops TCP first, as RFC 6455 expects.
+                if not data or protocol.close_expected():
+                    break
+        finally:
+            sockets = self._sockets.get(client_id)
+            if sockets is not None:
+                sockets.discard(socket)
+                if not sockets:
+                    del self._sockets[client_id]
+
+    def _send(self, socket: _Socket, message: Dict[str, Any]) -> None:
+        if socket.protocol.state is State.OPEN:
+            socket.protocol.send_text(json.dumps(message).encode())
+            socket.flush()
+            self.stats["ws_messages"] += 1
+
+    def _broadcast_status(self) -> None:
+        message = {"type": "status", "data": {"status": {"exec_info": self._exec_info()}}}
+        for sockets in self._sockets.values():
+            for socket in sockets:
+                self._send(socket, message)
+
+    async def _emit(self, client_id: str, kind: str, data: Dict[str, Any]) -> None:
+        # Like ComfyUI, execution messages only go to the client that submitted the prompt.
+        for socket in list(self._sockets.get(client_id, ())):
+            self._send(socket, {"type": kind, "data": data})
+            await self._drain(socket)
+
+    async def _emit_preview(self, client_id: str) -> None:
+        for socket in list(self._sockets.get(client_id, ())):
+            if socket.protocol.state is State.OPEN:
+                socket.protocol.send_binary(self._preview)
+                socket.flush()
+                self.stats["ws_messages"] += 1
+                await self._drain(socket)
+
+    @staticmethod
+    async def _drain(socket: _Socket) -> None:
+        try:
+            await socket.writer.drain()
+        except ConnectionError:
+            pass  # The reader side notices and unregisters the socket.
+
+    # -- execution -----------------------------------------------------------
+
+    async def _execute_loop(self) -> None:
+        while True:
+            if self.paused or not self.queue:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            self.running = self.queue.popleft()
+            await self._execute(*self.running)
+            self.running = None
+            self._interrupt = None
+            self._broadcast_status()
+
+    async def _execute(self, number: int, prompt_id: str, prompt: Dict[str, Any], client_id: str) -> None:
+        messages: List[Any] = []
+
+        def stamp(kind: str, **data: Any) -> Dict[str, Any]:
+            data = {"prompt_id": prompt_id, **data, "timestamp": int(time.time() * 1000)}
+            if kind.startswith("execution_"):
+                messages.append([kind, data])
+            return data
+
+        await self._emit(client_id, "execution_start", stamp("execution_start"))
+        await self._emit(client_id, "execution_cached", stamp("execution_cached", nodes=[]))
+        nodes = list(prompt)
+        outputs: Dict[str, Any] = {}
+        pause = self.exec_time / (len(nodes) * max(self.progress_steps, self.previews, 1))
+        for index, node in enumerate(nodes):
+            if self._interrupt == prompt_id:
+                class_type = prompt[node].get("class_type") if isinstance(prompt[node], dict) else None
+                data = stamp("execution_interrupted", node_id=node, node_type=class_type, executed=nodes[:index])
+                await self._emit(client_id, "execution_interrupted", data)
+                self._record(number, prompt_id, prompt, client_id, outputs, messages, "error")
+                return
+            await self._emit(client_id, "executing", {"node": node, "display_node": node, "prompt_id": prompt_id})
+            for step in range(max(self.progress_steps, self.previews)):
+                if step < self.progress_steps:
+                    progress = {"value": step + 1, "max": self.progress_steps, "prompt_id": prompt_id, "node": node}
+                    await self._emit(client_id, "progress", progress)
+                if step < self.previews:
+                    await self._emit_preview(client_id)
+                await asyncio.sleep(pause)  # Also yields to HTTP handlers when exec_time is 0.
+            output = None
+            if index == len(nodes) - 1 and self.images_per_prompt:
+                images = [
+                    {"filename": f"ComfyUI_{number:05d}_{image}.png", "subfolder": "", "type": "output"}
+                    for image in range(self.images_per_prompt)
+                ]
+                output = outputs[node] = {"images": images}
+            await self._emit(
+                client_id, "executed", {"node": node, "display_node": node, "output": output, "prompt_id": prompt_id}
+            )
+        success = stamp("execution_success")
+        self._record(number, prompt_id, prompt, client_id, outputs, messages, "success")
+        await self._emit(client_id, "execution_success", success)
+        await self._emit(client_id, "executing", {"node": None, "prompt_id": prompt_id})
+
+    def _record(
+        self,
+        number: int,
+        prompt_id: str,
+        prompt: Dict[str, Any],
+        client_id: str,
+        outputs: Dict[str, Any],
+        messages: List[Any],
+        status: str,
+    ) -> None:
+        self.history[prompt_id] = {
+            "prompt": [number, prompt_id, prompt, {"client_id": client_id}, list(outputs)],
+            "outputs": outputs,
+            "status": {"status_str": status, "completed": status == "success", "messages": messages},
+            "meta": {},
+        }
+        while len(self.history) > _MAX_HISTORY:
+            self.history.popitem(last=False)
+        self.stats["completed"] += 1
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m comfy_sdk.testing", description="Run a fake ComfyUI server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8188)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP response")
+    parser.add_argument("--exec-time", type=float, default=0.0, help="seconds each prompt takes to execute")
+    parser.add_argument("--progress-steps", type=int, default=1, help="progress events per node")
+    parser.add_argument("--previews", type=int, default=0, help="binary preview frames per node")
+    parser.add_argument("--preview-size", type=int, default=16 * 1024)
+    parser.add_argument("--images-per-prompt", type=int, default=1)
+    parser.add_argument("--image-size", type=int, default=64 * 1024)
+    parser.add_argument("--object-info-nodes", type=int, default=0, help="synthetic classes added to /object_info")
+    parser.add_argument("--paused", action="store_true", help="accept prompts without executing them")
+    args = parser.parse_args(argv)
+    options = vars(args)
+    server = FakeComfyServer(**options)
+
+    async def run() -> None:
+        await server.open()
+        # Benchmarks read the bound port from this line.
+        print(f"listening on {server.host}:{server.port}", flush=True)
+        await asyncio.Future()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+__all__ = ["FakeComfyServer"]
+
+
+if __name__ == "__main__":
+    main()
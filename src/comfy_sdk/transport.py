@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool, protocol and timeout settings for the HTTP side of a client.
+
+    ``timeout``-style fields are seconds (``None`` disables that timeout).
+    Downloads (``/view``, streamed ``/history`` and ``/object_info``) use
+    ``download_read_timeout`` for reads, and status polls (``/prompt``,
+    ``/queue``, ``/system_stats``) use ``poll_timeout`` end to end.
+    ``transport`` / ``async_transport`` replace the network layer, e.g. with
+    ``httpx.MockTransport``, and are never closed by the clients. With
+    ``share_pool`` every client built from this config reuses one connection
+    pool (one per event loop for async clients, since asyncio connections
+    cannot cross loops); call `close` / `aclose` once they are done.
+    """
+
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 5.0
+    http2: bool = False
+    connect_timeout: Optional[float] = 5.0
+    read_timeout: Optional[float] = 30.0
+    write_timeout: Optional[float] = 30.0
+    pool_timeout: Optional[float] = 30.0
+    download_read_timeout: Optional[float] = 300.0
+    poll_timeout: Optional[float] = 5.0
+    transport: Optional[httpx.BaseTransport] = None
+    async_transport: Optional[httpx.AsyncBaseTransport] = None
+    share_pool: bool = False
+    _shared: Optional[httpx.BaseTransport] = field(default=None, init=False, repr=False, compare=False)
+    _shared_async: Dict[asyncio.AbstractEventLoop, httpx.AsyncBaseTransport] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    @property
+    def download_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.download_read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    @property
+    def status_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.poll_timeout)
+
+    def build_transport(self) -> Tuple[httpx.BaseTransport, bool]:
+        """Return the transport for a new sync client and whether that client owns (closes) it."""
+        if self.transport is not None:
+            return self.transport, False
+        if not self.share_pool:
+            return httpx.HTTPTransport(limits=self.limits, http2=self.http2), True
+        with self._lock:
+            if self._shared is None:
+                self._shared = httpx.HTTPTransport(limits=self.limits, http2=self.http2)
+            return self._shared, False
+
+    def build_async_transport(self) -> Tuple[httpx.AsyncBaseTransport, bool]:
+        if self.async_transport is not None:
+            return self.async_transport, False
+        if not self.share_pool:
+            return httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2), True
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._drop_closed_loops()
+            shared = self._shared_async.get(loop)
+            if shared is None:
+                shared = self._shared_async[loop] = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            return shared, False
+
+    def _drop_closed_loops(self) -> None:
+        # Pools of finished loops hold dead connections and cannot be closed anymore; just forget them.
+        for loop in [loop for loop in self._shared_async if loop.is_closed()]:
+            del self._shared_async[loop]
+
+    def close(self) -> None:
+        """Close the shared sync pool (the async one needs `aclose`)."""
+        with self._lock:
+            shared, self._shared = self._shared, None
+        if shared is not None:
+            shared.close()
+
+    async def aclose(self) -> None:
+        """Close the shared sync pool and the running loop's async pool."""
+        self.close()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._drop_closed_loops()
+            shared = self._shared_async.pop(loop, None)
+        if shared is not None:
+            await shared.aclose()
+
+
+__all__ = ["TransportConfig"]
@@ -0,0 +1,151 @@
+import math
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+_NUMERIC = {"INT": int, "FLOAT": float}
+
+
+class ValidationIssue:
+    __slots__ = ("node_id", "input_name", "message")
+
+    def __init__(self, node_id: str, input_name: Optional[str], message: str):
+        self.node_id = node_id
+        self.input_name = input_name
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"ValidationIssue(node_id={self.node_id!r}, input_name={self.input_name!r}, message={self.message!r})"
+
+    def __str__(self) -> str:
+        where = self.node_id if self.input_name is None else f"{self.node_id}.{self.input_name}"
+        return f"{where}: {self.message}"
+
+
+class WorkflowValidationError(ValueError):
+    """Raised before submission when a workflow fails offline validation; ``issues`` lists every problem."""
+
+    def __init__(self, issues: List[ValidationIssue]):
+        super().__init__("Invalid workflow:\n" + "\n".join(f"  {issue}" for issue in issues))
+        self.issues = issues
+
+
+class _InputSpec:
+    __slots__ = ("type", "types", "choices", "min", "max")
+
+    def __init__(self, spec: Any):
+        kind = spec[0] if isinstance(spec, (list, tuple)) and spec else spec
+        options = spec[1] if isinstance(spec, (list, tuple)) and len(spec) > 1 and isinstance(spec[1], dict) else {}
+        self.choices: Optional[FrozenSet[Any]] = None
+        if isinstance(kind, (list, tuple)):
+            self.type, self.choices = "COMBO", frozenset(_hashable(choice) for choice in kind)
+        elif kind == "COMBO" and "options" in options:
+            self.type, self.choices = "COMBO", frozenset(_hashable(choice) for choice in options["options"])
+        else:
+            self.type = str(kind)
+        self.types = frozenset(self.type.split(","))
+        self.min = options.get("min")
+        self.max = options.get("max")
+
+
+class _NodeSchema:
+    __slots__ = ("required", "inputs", "outputs")
+
+    def __init__(self, info: Mapping[str, Any]):
+        declared = info.get("input") or {}
+        required = declared.get("required") or {}
+        self.inputs: Dict[str, _InputSpec] = {}
+        for section in (required, declared.get("optional") or {}):
+            for name, spec in section.items():
+                self.inputs[name] = _InputSpec(spec)
+        self.required: Tuple[str, ...] = tuple(required)
+        self.outputs: Tuple[FrozenSet[str], ...] = tuple(frozenset(str(kind).split(",")) for kind in info.get("output") or ())
+
+
+def _hashable(value: Any) -> Any:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _is_link(value: Any) -> bool:
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], (str, int)) and isinstance(value[1], int)
+
+
+def _compatible(produced: FrozenSet[str], expected: _InputSpec) -> bool:
+    if expected.choices is not None or "*" in produced or "*" in expected.types:
+        return True
+    return not produced.isdisjoint(expected.types)
+
+
+class WorkflowValidator:
+    """Check API-format workflows against an ``object_info`` snapshot without a server round trip.
+
+    Per-class input/output schemas are compiled once, so `validate` only walks
+    the nodes of the workflow being checked.
+    """
+
+    def __init__(self, object_info: Mapping[str, Any]):
+        self.schemas: Dict[str, _NodeSchema] = {name: _NodeSchema(info) for name, info in object_info.items()}
+
+    def validate(self, workflow: Mapping[str, Any]) -> List[ValidationIssue]:
+        issues: List[ValidationIssue] = []
+        schemas = self.schemas
+        for node_id, node in workflow.items():
+            class_type = node.get("class_type") if isinstance(node, dict) else None
+            schema = schemas.get(class_type)
+            if schema is None:
+                issues.append(ValidationIssue(node_id, None, f"Unknown node class {class_type!r}"))
+                continue
+            inputs = node.get("inputs") or {}
+            for name in schema.required:
+                if name not in inputs:
+                    issues.append(ValidationIssue(node_id, name, "Required input is missing"))
+            for name, value in inputs.items():
+                spec = schema.inputs.get(name)
+                if spec is None:
+                    continue
+                message = self._check_link(workflow, value, spec) if _is_link(value) else self._check_value(value, spec)
+                if message is not None:
+                    issues.append(ValidationIssue(node_id, name, message))
+        return issues
+
+    def check(self, workflow: Mapping[str, Any]) -> None:
+        issues = self.validate(workflow)
+        if issues:
+            raise WorkflowValidationError(issues)
+
+    def _check_link(self, workflow: Mapping[str, Any], value: List[Any], spec: _InputSpec) -> Optional[str]:
+        source_id, slot = str(value[0]), value[1]
+        source = workflow.get(source_id)
+        if not isinstance(source, dict):
+            return f"Links to missing node {source_id!r}"
+        source_schema = self.schemas.get(source.get("class_type"))
+        if source_schema is None:
+            return None  # Reported on the source node itself.
+        if not 0 <= slot < len(source_schema.outputs):
+            return f"Links to output {slot} of node {source_id!r}, which has {len(source_schema.outputs)} outputs"
+        produced = source_schema.outputs[slot]
+        if not _compatible(produced, spec):
+            return f"Expects {spec.type}, but output {slot} of node {source_id!r} is {','.join(sorted(produced))}"
+        return None
+
+    @staticmethod
+    def _check_value(value: Any, spec: _InputSpec) -> Optional[str]:
+        if spec.choices is not None:
+            if _hashable(value) not in spec.choices:
+                return f"Value {value!r} is not one of the {len(spec.choices)} allowed choices"
+            return None
+        convert = _NUMERIC.get(spec.type)
+        if convert is None:
+            return None
+        try:
+            number = convert(value)
+        except (TypeError, ValueError, OverflowError):
+            return f"Expects {spec.type}, got {value!r}"
+        if isinstance(number, float) and math.isnan(number):
+            return f"Expects {spec.type}, got NaN"
+        if spec.min is not None and number < spec.min:
+            return f"Value {value!r} is below the minimum {spec.min}"
+        if spec.max is not None and number > spec.max:
+            return f"Value {value!r} is above the maximum {spec.max}"
+        return None
+
+
+__all__ = ["WorkflowValidator", "WorkflowValidationError", "ValidationIssue"]
@@ -0,0 +1,113 @@
+import copy
+import itertools
+import json
+import re
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+
+InputPath = Tuple[str, str]
+ParamSpec = Union[InputPath, Sequence[InputPath]]
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class RenderedWorkflow:
+    """A workflow variant kept as serialized JSON; ``queue_prompt`` posts it without re-encoding."""
+
+    __slots__ = ("json", "values")
+
+    def __init__(self, json_bytes: bytes, values: Dict[str, Any]):
+        self.json = json_bytes
+        self.values = values
+
+    def to_dict(self) -> Dict[str, Any]:
+        return json.loads(self.json)
+
+    def __repr__(self) -> str:
+        return f"RenderedWorkflow(values={self.values!r}, size={len(self.json)})"
+
+
+def _paths(spec: ParamSpec) -> List[InputPath]:
+    if len(spec) == 2 and all(isinstance(part, (str, int)) for part in spec):
+        return [(str(spec[0]), spec[1])]
+    return [(str(node_id), name) for node_id, name in spec]
+
+
+class WorkflowTemplate:
+    """A workflow with named parameter slots, compiled once into a JSON skeleton.
+
+    ``params`` maps a parameter name to one ``(node_id, input_name)`` path or
+    a list of them (one value bound to several inputs). Rendering only encodes
+    the parameter values and splices them between the pre-encoded skeleton
+    segments, so the rest of the graph is neither copied nor re-serialized.
+    """
+
+    def __init__(self, workflow: Mapping[str, Any], params: Mapping[str, ParamSpec]):
+        skeleton = copy.deepcopy(dict(workflow))
+        token = uuid.uuid4().hex
+        self.defaults: Dict[str, Any] = {}
+        markers: Dict[str, str] = {}
+        for name, spec in params.items():
+            marker = f"@{token}:{name}@"
+            markers[_dumps(marker)] = name
+            for node_id, input_name in _paths(spec):
+                try:
+                    inputs = skeleton[node_id]["inputs"]
+                    value = inputs[input_name]
+                except KeyError:
+                    raise KeyError(f"Parameter {name!r}: workflow has no input {node_id}.{input_name}") from None
+                self.defaults.setdefault(name, value)
+                inputs[input_name] = marker
+        text = _dumps(skeleton)
+        pattern = re.compile("|".join(map(re.escape, markers)))
+        self._segments: List[bytes] = []
+        self._slots: List[str] = []
+        start = 0
+        for match in pattern.finditer(text):
+            self._segments.append(text[start:match.start()].encode())
+            self._slots.append(markers[match.group()])
+            start = match.end()
+        self._segments.append(text[start:].encode())
+
+    @property
+    def parameters(self) -> Tuple[str, ...]:
+        return tuple(self.defaults)
+
+    def _values(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        unknown = set(values) - self.defaults.keys()
+        if unknown:
+            raise TypeError(f"Unknown template parameters: {', '.join(sorted(unknown))}")
+        return {**self.defaults, **values}
+
+    def _splice(self, encoded: Mapping[str, bytes]) -> bytes:
+        parts = [self._segments[0]]
+        for name, segment in zip(self._slots, self._segments[1:]):
+            parts.append(encoded[name])
+            parts.append(segment)
+        return b"".join(parts)
+
+    def render(self, **values: Any) -> RenderedWorkflow:
+        values = self._values(values)
+        return RenderedWorkflow(self._splice({name: _dumps(value).encode() for name, value in values.items()}), values)
+
+    def sweep(self, **axes: Iterable[Any]) -> Iterator[RenderedWorkflow]:
+        """Lazily yield the cartesian product of ``axes``; parameters not swept keep their defaults.
+
+        Each axis value is encoded once, however many variants it appears in.
+        """
+        fixed = self._values({name: None for name in axes})
+        names = list(axes)
+        columns = [[(value, _dumps(value).encode()) for value in axis] for axis in axes.values()]
+        encoded = {name: _dumps(value).encode() for name, value in fixed.items() if name not in axes}
+        for combination in itertools.product(*columns):
+            values = dict(fixed)
+            for name, (value, blob) in zip(names, combination):
+                values[name] = value
+                encoded[name] = blob
+            yield RenderedWorkflow(self._splice(encoded), values)
+
+    def to_dict(self, **values: Any) -> Dict[str, Any]:
+        return self.render(**values).to_dict()
+
+
+__all__ = ["WorkflowTemplate", "RenderedWorkflow"]